@@ -0,0 +1,489 @@
+"""
+Incrementally maintained aggregates over game_results and financial_adjustments.
+
+Every write path that inserts or deletes game results or adjustments calls into this module
+inside its own transaction, so the aggregate rows commit (or roll back) together with the
+rows they summarize:
+
+- game_stats: one row per game (counts, bet and payout sums) for the admin dashboard.
+- ledger_summary: a single row with the house profit and adjustment totals.
+
+``rebuild_game_stats`` / ``rebuild_ledger_summary`` recompute them from the raw tables for
+databases created before the tables existed, and ``check_ledger`` reconciles both.
+
+``RESULT_TRACKER`` is the in-process counterpart for bias rules: a ring buffer of the latest
+results per game (recent RTP) and a win/lose streak per (user, game). It follows game_results
+itself, so every worker process sees the rounds committed by all of them (see ``sync``).
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, event, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+RTP_WINDOW = 100
+STREAK_LOOKBACK = 50
+RESULT_TRACKER_SYNC_SEC = float(os.environ.get("RESULT_TRACKER_SYNC_SEC", "1.0"))
+
+
+def _outcome_counts(result: str) -> Dict[str, int]:
+    return {
+        "player_wins": 1 if result == "win" else 0,
+        "casino_wins": 1 if result == "lose" else 0,
+        "ties": 0 if result in ("win", "lose") else 1,
+    }
+
+
+def _add_game_stat(db: Session, game_id: str, deltas: Dict[str, float]) -> None:
+    """Upsert one game's row, adding ``deltas`` (total, player_wins, casino_wins, ties, bet_sum, payout_sum)."""
+    table = models.GameStat.__table__
+    now = datetime.utcnow()
+    stmt = sqlite_insert(table).values(game_id=game_id, updated_at=now, **deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.game_id],
+        set_={**{name: table.c[name] + value for name, value in deltas.items()}, "updated_at": now},
+    )
+    db.execute(stmt)
+
+
+LEDGER_ID = 1
+# Incremental float sums drift from a fresh SUM() in the last bits; anything above this is a real mismatch.
+LEDGER_TOLERANCE = 1e-6
+
+
+def _add_ledger(db: Session, deltas: Dict[str, float]) -> None:
+    """Upsert the ledger row, adding ``deltas`` (results, game_profit, adjustments, adjustment_total)."""
+    table = models.LedgerSummary.__table__
+    now = datetime.utcnow()
+    stmt = sqlite_insert(table).values(
+        id=LEDGER_ID,
+        **{name: 0 for name in ("results", "game_profit", "adjustments", "adjustment_total")},
+        updated_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={**{name: table.c[name] + value for name, value in deltas.items()}, "updated_at": now},
+    )
+    db.execute(stmt)
+
+
+def record_game_stat(
+    db: Session,
+    game_id: str,
+    result: str,
+    bet_amount: float,
+    payout_amount: float,
+    user_id: Optional[int] = None,
+) -> None:
+    """Count one new game result; call in the same transaction that adds the GameResult."""
+    db.info["tracker_dirty"] = True
+    _add_ledger(db, {"results": 1, "game_profit": float(bet_amount or 0) - float(payout_amount or 0)})
+    _add_game_stat(
+        db,
+        game_id,
+        {
+            "total": 1,
+            **_outcome_counts(result),
+            "bet_sum": float(bet_amount or 0),
+            "payout_sum": float(payout_amount or 0),
+        },
+    )
+
+
+def _grouped_results(query):
+    r = models.GameResult
+    return query.with_entities(
+        r.game_id,
+        func.count(r.id),
+        func.sum(case((r.result == "win", 1), else_=0)),
+        func.sum(case((r.result == "lose", 1), else_=0)),
+        func.sum(case((r.result.in_(("win", "lose")), 0), else_=1)),
+        func.coalesce(func.sum(r.bet_amount), 0.0),
+        func.coalesce(func.sum(r.payout_amount), 0.0),
+    ).group_by(r.game_id)
+
+
+def forget_game_stats(db: Session, query) -> None:
+    """Subtract the results matched by ``query`` (a GameResult query) before deleting them."""
+    db.info["tracker_dirty"] = True
+    for game_id, total, wins, losses, ties, bet_sum, payout_sum in _grouped_results(query).all():
+        _add_ledger(db, {"results": -total, "game_profit": float(payout_sum) - float(bet_sum)})
+        _add_game_stat(
+            db,
+            game_id,
+            {
+                "total": -total,
+                "player_wins": -(wins or 0),
+                "casino_wins": -(losses or 0),
+                "ties": -(ties or 0),
+                "bet_sum": -float(bet_sum),
+                "payout_sum": -float(payout_sum),
+            },
+        )
+
+
+def clear_game_stats(db: Session) -> None:
+    """Zero the game side of the aggregates; call when every game result is deleted."""
+    db.info["tracker_dirty"] = True
+    db.query(models.GameStat).delete()
+    db.query(models.LedgerSummary).update(
+        {"results": 0, "game_profit": 0.0, "updated_at": datetime.utcnow()}, synchronize_session=False
+    )
+
+
+def record_adjustment(db: Session, amount: float, removed: bool = False) -> None:
+    """Count a FinancialAdjustment being added (or deleted, with ``removed``) in the caller's transaction."""
+    sign = -1 if removed else 1
+    _add_ledger(db, {"adjustments": sign, "adjustment_total": sign * float(amount or 0)})
+
+
+def rebuild_game_stats(db: Session) -> int:
+    """Recompute every game_stats row from game_results; returns the number of games. Does not commit."""
+    db.query(models.GameStat).delete()
+    games = 0
+    for game_id, total, wins, losses, ties, bet_sum, payout_sum in _grouped_results(db.query(models.GameResult)).all():
+        db.add(
+            models.GameStat(
+                game_id=game_id,
+                total=total,
+                player_wins=wins or 0,
+                casino_wins=losses or 0,
+                ties=ties or 0,
+                bet_sum=float(bet_sum),
+                payout_sum=float(payout_sum),
+                updated_at=datetime.utcnow(),
+            )
+        )
+        games += 1
+    return games
+
+
+def load_game_stats(db: Session, labels: Dict[str, str]) -> List[Dict[str, object]]:
+    """Dashboard rows (one per game) with win rates over decided games, sorted by display name."""
+    stats = []
+    for row in db.query(models.GameStat).filter(models.GameStat.total > 0).all():
+        contested = row.player_wins + row.casino_wins
+        stats.append(
+            {
+                "game_id": row.game_id,
+                "game_name": labels.get(row.game_id, row.game_id),
+                "total": row.total,
+                "player_wins": row.player_wins,
+                "casino_wins": row.casino_wins,
+                "ties": row.ties,
+                "profit": row.bet_sum - row.payout_sum,
+                "player_win_rate": (row.player_wins / contested * 100) if contested else 0.0,
+                "casino_win_rate": (row.casino_wins / contested * 100) if contested else 0.0,
+            }
+        )
+    stats.sort(key=lambda item: item["game_name"])
+    return stats
+
+
+def _raw_ledger(db: Session) -> Dict[str, float]:
+    r = models.GameResult
+    a = models.FinancialAdjustment
+    results, game_profit = db.query(
+        func.count(r.id), func.coalesce(func.sum(r.bet_amount - r.payout_amount), 0.0)
+    ).one()
+    adjustments, adjustment_total = db.query(func.count(a.id), func.coalesce(func.sum(a.amount), 0.0)).one()
+    return {
+        "results": results,
+        "game_profit": float(game_profit),
+        "adjustments": adjustments,
+        "adjustment_total": float(adjustment_total),
+    }
+
+
+def rebuild_ledger_summary(db: Session) -> Dict[str, float]:
+    """Recompute the ledger row from the raw tables (two full scans); returns the new totals. Does not commit."""
+    totals = _raw_ledger(db)
+    row = db.get(models.LedgerSummary, LEDGER_ID)
+    if row is None:
+        row = models.LedgerSummary(id=LEDGER_ID)
+        db.add(row)
+    for name, value in totals.items():
+        setattr(row, name, value)
+    row.updated_at = datetime.utcnow()
+    db.flush()
+    return totals
+
+
+def ledger_totals(db: Session) -> Tuple[float, float]:
+    """(game_profit, adjustment_total) from the ledger row; falls back to the raw SUMs if it is missing."""
+    row = db.query(models.LedgerSummary.game_profit, models.LedgerSummary.adjustment_total).filter(
+        models.LedgerSummary.id == LEDGER_ID
+    ).first()
+    if row is None:
+        raw = _raw_ledger(db)
+        return raw["game_profit"], raw["adjustment_total"]
+    return float(row.game_profit), float(row.adjustment_total)
+
+
+def check_ledger(db: Session) -> Dict[str, object]:
+    """
+    Reconcile ledger_summary and game_stats against game_results / financial_adjustments.
+
+    Returns ``{"ok", "ledger": {field: {"stored", "actual"}}, "games": {game_id: {field: {"stored", "actual"}}}}``
+    where only mismatching fields are listed.
+    """
+    row = db.get(models.LedgerSummary, LEDGER_ID)
+    ledger = {}
+    for name, actual in _raw_ledger(db).items():
+        stored = getattr(row, name) if row is not None else None
+        if stored is None or abs(stored - actual) > LEDGER_TOLERANCE * max(1.0, abs(actual)):
+            ledger[name] = {"stored": stored, "actual": actual}
+
+    fields = ("total", "player_wins", "casino_wins", "ties", "bet_sum", "payout_sum")
+    stored_games = {
+        stat.game_id: {name: getattr(stat, name) for name in fields}
+        for stat in db.query(models.GameStat).all()
+        if stat.total
+    }
+    actual_games = {
+        game_id: dict(zip(fields, (total, wins or 0, losses or 0, ties or 0, float(bet_sum), float(payout_sum))))
+        for game_id, total, wins, losses, ties, bet_sum, payout_sum in _grouped_results(db.query(models.GameResult)).all()
+    }
+    games = {}
+    for game_id in sorted(set(stored_games) | set(actual_games)):
+        stored = stored_games.get(game_id, {})
+        actual = actual_games.get(game_id, {})
+        diff = {}
+        for name in fields:
+            s_val, a_val = stored.get(name, 0), actual.get(name, 0)
+            if abs(s_val - a_val) > LEDGER_TOLERANCE * max(1.0, abs(a_val)):
+                diff[name] = {"stored": s_val, "actual": a_val}
+        if diff:
+            games[game_id] = diff
+    return {"ok": not ledger and not games, "ledger": ledger, "games": games}
+
+
+def _streak(results: Iterable[str], lookback: int = STREAK_LOOKBACK) -> Tuple[int, int]:
+    """(win_streak, lose_streak) from results ordered newest first, like get_user_streak."""
+    win_streak = lose_streak = 0
+    for index, result in enumerate(results):
+        if index >= lookback:
+            break
+        if result == "win" and not lose_streak:
+            win_streak += 1
+        elif result == "lose" and not win_streak:
+            lose_streak += 1
+        else:
+            break
+    return win_streak, lose_streak
+
+
+class ResultTracker:
+    """
+    Recent RTP per game and win/lose streaks per (user, game), kept in memory so bias rules
+    need no per-bet queries.
+
+    The tracker follows game_results by id: ``sync`` applies the rows above ``high_water`` in id
+    order, which is commit order since SQLite serializes writers. It also compares
+    ledger_summary.results with the count it expects; any other difference means results were
+    deleted (by any worker), and the tracker is rebuilt with ``warm``. Both reads share one
+    snapshot, so a concurrent commit is either fully seen or not at all. ``sync`` only queries when a result was committed in this process since the last
+    sync (``mark_dirty``) or ``sync_sec`` has passed, so rounds of other workers show up within
+    ``sync_sec`` and this worker's own rounds right away.
+    """
+
+    def __init__(
+        self, window: int = RTP_WINDOW, lookback: int = STREAK_LOOKBACK, sync_sec: float = RESULT_TRACKER_SYNC_SEC
+    ) -> None:
+        self.window = window
+        self.lookback = lookback
+        self.sync_sec = sync_sec
+        self.warmed = False
+        self.high_water = 0
+        self.results: Optional[int] = None
+        self.syncs = 0
+        self.rewarms = 0
+        self._dirty = False
+        self._synced = 0.0
+        self._lock = threading.Lock()
+        self._rounds: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._sums: Dict[str, List[float]] = {}
+        self._streaks: Dict[Tuple[int, str], Tuple[int, int]] = {}
+
+    def _push(self, game_id: str, user_id: Optional[int], result: str, bet: float, payout: float) -> None:
+        rounds = self._rounds.get(game_id)
+        if rounds is None:
+            rounds = self._rounds[game_id] = deque(maxlen=self.window)
+            self._sums[game_id] = [0.0, 0.0]
+        sums = self._sums[game_id]
+        if len(rounds) == self.window:
+            old_bet, old_payout = rounds[0]
+            sums[0] -= old_bet
+            sums[1] -= old_payout
+        rounds.append((bet, payout))
+        sums[0] += bet
+        sums[1] += payout
+        if user_id is None:
+            return
+        win_streak, lose_streak = self._streaks.get((user_id, game_id), (0, 0))
+        if result == "win":
+            streak = (min(win_streak + 1, self.lookback), 0)
+        elif result == "lose":
+            streak = (0, min(lose_streak + 1, self.lookback))
+        else:
+            streak = (0, 0)
+        if streak == (0, 0):
+            self._streaks.pop((user_id, game_id), None)
+        else:
+            self._streaks[(user_id, game_id)] = streak
+
+    def streak(self, user_id: int, game_id: str) -> Tuple[int, int]:
+        return self._streaks.get((user_id, game_id), (0, 0))
+
+    def recent_rtp(self, game_id: str) -> Optional[float]:
+        sums = self._sums.get(game_id)
+        if not sums or sums[0] <= 0:
+            return None
+        return sums[1] / sums[0]
+
+    def _load_rounds(self, db: Session, game_ids: Iterable[str]) -> None:
+        r = models.GameResult
+        for game_id in game_ids:
+            rows = (
+                db.query(r.bet_amount, r.payout_amount)
+                .filter(r.game_id == game_id)
+                .order_by(r.timestamp.desc())
+                .limit(self.window)
+                .all()
+            )
+            self._rounds.pop(game_id, None)
+            self._sums.pop(game_id, None)
+            for bet, payout in reversed(rows):
+                self._push(game_id, None, "", float(bet or 0), float(payout or 0))
+
+    def _load_streaks(self, db: Session) -> None:
+        # One indexed LIMIT query per (user, game) on ix_game_results_user_game_ts; a single
+        # ROW_NUMBER() window over the whole table sorts every row and is ~7x slower at 1M rows.
+        r = models.GameResult
+        pairs = db.query(r.user_id, r.game_id).filter(r.user_id.isnot(None)).distinct().all()
+        for user_id, game_id in pairs:
+            results = (
+                db.query(r.result)
+                .filter(r.user_id == user_id, r.game_id == game_id)
+                .order_by(r.timestamp.desc())
+                .limit(self.lookback)
+                .all()
+            )
+            streak = _streak((result for (result,) in results), self.lookback)
+            if streak != (0, 0):
+                self._streaks[(user_id, game_id)] = streak
+
+    def _warm(self, db: Session) -> None:
+        _begin_snapshot(db)
+        self.results = _ledger_results(db)
+        self.high_water = db.query(func.max(models.GameResult.id)).scalar() or 0
+        game_ids = [game_id for (game_id,) in db.query(models.GameResult.game_id).distinct().all()]
+        self._rounds.clear()
+        self._sums.clear()
+        self._streaks.clear()
+        self._load_rounds(db, game_ids)
+        self._load_streaks(db)
+        self._synced = time.monotonic()
+        self.warmed = True
+
+    def warm(self, db: Session) -> Dict[str, int]:
+        """Rebuild everything from game_results: latest ``window`` rounds per game, streaks of every user."""
+        with self._lock:
+            self._warm(db)
+            return self.stats()
+
+    def _sync(self, db: Session) -> None:
+        r = models.GameResult
+        _begin_snapshot(db)
+        results = _ledger_results(db)
+        rows = (
+            db.query(r.id, r.game_id, r.user_id, r.result, r.bet_amount, r.payout_amount)
+            .filter(r.id > self.high_water)
+            .order_by(r.id)
+            .all()
+        )
+        self.syncs += 1
+        if results is not None and self.results is not None and results != self.results + len(rows):
+            self.rewarms += 1
+            self._warm(db)
+            return
+        for row_id, game_id, user_id, result, bet, payout in rows:
+            self._push(game_id, user_id, result, float(bet or 0), float(payout or 0))
+            self.high_water = row_id
+        self.results = results
+
+    def _due(self) -> bool:
+        return self._dirty or time.monotonic() - self._synced >= self.sync_sec
+
+    def sync(self, force: bool = False) -> None:
+        """Apply rows committed since the last sync (by any process); rebuild if some were deleted."""
+        if not self.warmed or not (force or self._due()):
+            return
+        with self._lock:
+            if not (force or self._due()):
+                return  # another thread synced while this one waited
+            self._dirty = False
+            self._synced = time.monotonic()
+            db = SessionLocal()
+            try:
+                self._sync(db)
+            finally:
+                db.close()
+
+    def mark_dirty(self) -> None:
+        """A transaction of this process changed game_results; the next ``sync`` queries."""
+        self._dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rounds.clear()
+            self._sums.clear()
+            self._streaks.clear()
+            self.warmed = False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "games": len(self._rounds),
+            "streaks": len(self._streaks),
+            "window": self.window,
+            "high_water": self.high_water,
+            "syncs": self.syncs,
+            "rewarms": self.rewarms,
+        }
+
+
+def _begin_snapshot(db: Session) -> None:
+    """
+    Make the following reads share one snapshot. pysqlite only opens a transaction before a
+    write, so without this each SELECT sees the database as of its own start.
+    """
+    conn = db.connection()
+    if conn.dialect.name == "sqlite" and not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN")
+
+
+def _ledger_results(db: Session) -> Optional[int]:
+    row = db.get(models.LedgerSummary, 1)
+    return row.results if row is not None else None
+
+
+RESULT_TRACKER = ResultTracker()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _mark_tracker_dirty(session: Session) -> None:
+    if session.info.pop("tracker_dirty", False):
+        RESULT_TRACKER.mark_dirty()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _drop_tracker_dirty(session: Session) -> None:
+    session.info.pop("tracker_dirty", None)
@@ -0,0 +1,798 @@
+"""
+Benchmarks for server hot paths. Run from the repository root:
+
+    python -m server.bench engine --races 10
+    python -m server.bench golden            # parity + throughput gate, exit 1 on drift/regression
+    python -m server.bench golden --update   # re-record server/horse_golden.json
+    python -m server.bench indexes --rows 1000000   # query plans of the hot lookups, exit 1 on a scan
+    python -m server.bench bias --rules 10 100 500  # compiled vs per-round bias rule evaluation, exit 1 on a mismatch
+    python -m server.bench load --workers 1 2 4     # rounds/s through uvicorn --workers N, exit 1 on errors or drift
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import random
+import shlex
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from . import models
+from .bias import BiasCooldowns, compile_bias_rules
+from .database import Base
+from .horse_engine import (
+    HORSE_DT,
+    HORSE_ENGINES,
+    generate_horse_pool,
+    run_horse_race,
+    simulate_horse_batch,
+)
+
+GOLDEN_PATH = Path(__file__).with_name("horse_golden.json")
+TS_DRIVER = Path(__file__).resolve().parent.parent / "webclient" / "horse-sim" / "bench.ts"
+TS_RUNNER = os.environ.get("HORSE_TS_RUNNER", "npx --no-install tsx")
+GOLDEN_BATCH_SIMS = 16
+# Share of batch races allowed to finish in another order than settlement: NumPy's vectorized
+# pow may round a last bit differently from libm, which can rarely flip a photo finish.
+GOLDEN_BATCH_MAX_DIFFERING = 0.02
+
+
+def bench_engine(races: int, engines: List[str], record: bool, field: int = 4) -> List[dict]:
+    """Tick rate of the race engines over the same seeds (pool seed k, race seed k*7919+1)."""
+    rows = []
+    for engine in engines:
+        ticks = 0
+        elapsed = 0.0
+        for k in range(races):
+            horses = generate_horse_pool(k, field)
+            started = time.perf_counter()
+            _, _, _, sim_detail = run_horse_race(horses, "oval", k * 7919 + 1, engine, record)
+            elapsed += time.perf_counter() - started
+            ticks += round(max(sim_detail["finish_times"].values()) / HORSE_DT) + 1
+        rows.append(
+            {
+                "engine": engine,
+                "record": record,
+                "field": field,
+                "races": races,
+                "ticks": ticks,
+                "sec_per_race": elapsed / races,
+                "ticks_per_sec": ticks / elapsed,
+            }
+        )
+    return rows
+
+
+def golden_corpus(seeds: List[int], fields: List[int]) -> List[dict]:
+    """Fixed races: pool seed k with ``field`` horses, race seed k*7919+1."""
+    return [
+        {"field": field, "seed": k * 7919 + 1, "horses": generate_horse_pool(k, field)}
+        for field in fields
+        for k in seeds
+    ]
+
+
+def _digest(parts: list) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _race_ticks(finish_times) -> int:
+    return round(max(finish_times) / HORSE_DT) + 1
+
+
+def _engine_variant(engine: str, record: bool) -> Callable[[dict], tuple]:
+    def run(race: dict) -> tuple:
+        winner_id, events, _, sim_detail = run_horse_race(race["horses"], "oval", race["seed"], engine, record)
+        if record:
+            parts = [winner_id, events, sim_detail]
+        else:
+            parts = [winner_id, sim_detail["finish_times"], sim_detail["conditions"]]
+        return parts, _race_ticks(sim_detail["finish_times"].values()), 1
+
+    return run
+
+
+def _batch_seeds(race: dict) -> List[int]:
+    return [race["seed"] + k for k in range(GOLDEN_BATCH_SIMS)]
+
+
+def _batch_variant(race: dict) -> tuple:
+    finish = simulate_horse_batch(race["horses"], "oval", _batch_seeds(race))
+    return finish.round(9).tolist(), int(round(finish.max(axis=1).sum() / HORSE_DT)) + len(finish), len(finish)
+
+
+def batch_parity(corpus: List[dict]) -> tuple[int, int]:
+    """
+    (differing, total) races of the batch pricer against settlement races on the same seeds.
+    A race differs when its finishing order does; odds priced on drifting batch races would
+    no longer be the odds of the races that are settled.
+    """
+    differing = total = 0
+    for race in corpus:
+        seeds = _batch_seeds(race)
+        finish = simulate_horse_batch(race["horses"], "oval", seeds).tolist()
+        for row, seed in zip(finish, seeds):
+            _, _, _, sim_detail = run_horse_race(race["horses"], "oval", seed, "python", record=False)
+            settled = [sim_detail["finish_times"][h["id"]] for h in race["horses"]]
+            differing += sorted(range(len(row)), key=lambda k: (row[k], k)) != sorted(
+                range(len(settled)), key=lambda k: (settled[k], k)
+            )
+            total += 1
+    return differing, total
+
+
+# Every engine implementation the server ships; the "-settle" variants run without timeline/events
+# as settlement does, "batch" is the Monte Carlo pricer (GOLDEN_BATCH_SIMS races per pool,
+# also checked race by race against settlement, see batch_parity).
+# "numpy" must produce the same digests as "python": it is a seed-for-seed port.
+GOLDEN_VARIANTS = {
+    "python": _engine_variant("python", True),
+    "python-settle": _engine_variant("python", False),
+    "numpy": _engine_variant("numpy", True),
+    "numpy-settle": _engine_variant("numpy", False),
+    "batch": _batch_variant,
+}
+
+
+def bench_golden_variant(name: str, corpus: List[dict], repeat: int) -> dict:
+    """Digest, best-of-``repeat`` throughput and peak traced memory of one variant over the corpus."""
+    run = GOLDEN_VARIANTS[name]
+    best = None
+    for _ in range(repeat):
+        parts = []
+        ticks = races = 0
+        started = time.perf_counter()
+        for race in corpus:
+            out, race_ticks, race_count = run(race)
+            parts.append(out)
+            ticks += race_ticks
+            races += race_count
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    # Peak memory of a single race, measured separately: tracemalloc slows the run several-fold.
+    tracemalloc.start()
+    run(corpus[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "engine": name,
+        "races": races,
+        "ticks": ticks,
+        "races_per_sec": races / best,
+        "ticks_per_sec": ticks / best,
+        "peak_bytes": peak,
+        "digest": _digest(parts),
+    }
+
+
+def bench_golden_ts(corpus: List[dict], runner: str = TS_RUNNER) -> dict | None:
+    """Run webclient/horse-sim through ``runner`` (a TypeScript launcher); None if it is unavailable."""
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as fh:
+        json.dump({"races": [{"horses": r["horses"], "seed": r["seed"]} for r in corpus]}, fh)
+    try:
+        proc = subprocess.run(
+            [*shlex.split(runner), str(TS_DRIVER), fh.name],
+            cwd=TS_DRIVER.parent.parent.parent,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    finally:
+        os.unlink(fh.name)
+    if proc.returncode != 0 or not proc.stdout.strip():
+        return None
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+    seconds = out["elapsed_ms"] / 1000
+    return {
+        "engine": "ts",
+        "races": out["races"],
+        "ticks": out["ticks"],
+        "races_per_sec": out["races"] / seconds,
+        "ticks_per_sec": out["ticks"] / seconds,
+        "peak_bytes": out["peak_heap_bytes"],
+        "digest": out["digest"],
+    }
+
+
+def calibration_rate(repeat: int, loops: int = 200_000) -> float:
+    """
+    Best-of-``repeat`` iterations/s of a fixed float/list loop that shares no code with the engines.
+    Throughput baselines are stored next to the rate of the machine that recorded them, so the
+    gate compares engine speed relative to interpreter speed instead of raw wall-clock rates.
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        acc = 0.0
+        values = [0.0] * 8
+        for k in range(loops):
+            values[k & 7] = acc * 0.5 + k
+            acc = (acc + values[(k + 3) & 7]) % 1000.0
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return loops / best
+
+
+def check_golden(row: dict, baseline: dict | None, threshold: float, scale: float = 1.0) -> str:
+    """
+    "ok", "new" (no baseline), "DRIFT" (digest changed) or "SLOW" (ticks/s below baseline by > threshold).
+    ``scale`` is this machine's calibration rate over the recorded one; the baseline is scaled by it.
+    """
+    if not baseline:
+        return "new"
+    if row["digest"] != baseline["digest"]:
+        return "DRIFT"
+    if row["ticks_per_sec"] < baseline["ticks_per_sec"] * scale * (1 - threshold):
+        return "SLOW"
+    return "ok"
+
+
+def _cmd_golden(args: argparse.Namespace) -> None:
+    golden = json.loads(GOLDEN_PATH.read_text()) if GOLDEN_PATH.exists() else {}
+    spec = golden.get("corpus", {"seeds": list(range(4)), "fields": [4, 8]})
+    threshold = args.threshold if args.threshold is not None else golden.get("threshold", 0.25)
+    baselines = golden.get("engines", {})
+    corpus = golden_corpus(spec["seeds"], spec["fields"])
+
+    calibration = calibration_rate(args.repeat)
+    rows = [bench_golden_variant(name, corpus, args.repeat) for name in args.engine if name != "ts"]
+    # Measured again after the engines so a load change during the run shows up in the scale.
+    calibration = max(calibration, calibration_rate(args.repeat))
+    scale = calibration / golden["calibration"] if golden.get("calibration") else 1.0
+    print(f"calibration {calibration:,.0f} it/s (baseline {golden.get('calibration', 0):,.0f}, scale {scale:.2f})")
+    if "ts" in args.engine:
+        ts_row = bench_golden_ts(corpus, args.ts_runner)
+        if ts_row is None:
+            print(f"ts      skipped ({args.ts_runner} unavailable)")
+        else:
+            rows.append(ts_row)
+
+    failed = False
+    if "batch" in args.engine:
+        differing, total = batch_parity(corpus)
+        parity = "ok" if differing <= total * GOLDEN_BATCH_MAX_DIFFERING else "DRIFT"
+        failed = parity == "DRIFT"
+        print(f"batch parity  {total - differing}/{total} races finish in the settlement order {parity}")
+    for row in rows:
+        status = check_golden(row, baselines.get(row["engine"]), threshold, scale)
+        failed = failed or status in ("DRIFT", "SLOW")
+        base = baselines.get(row["engine"], {}).get("ticks_per_sec", 0) * scale
+        print(
+            f"{row['engine']:<13} races={row['races']:<4} {row['races_per_sec']:8.2f} races/s "
+            f"{row['ticks_per_sec']:10.0f} ticks/s (baseline {base or 0:8.0f}) "
+            f"peak {row['peak_bytes'] / 1024:8.0f} KiB digest {row['digest']} {status}"
+        )
+
+    if args.update:
+        for row in rows:
+            baselines[row["engine"]] = {"digest": row["digest"], "ticks_per_sec": round(row["ticks_per_sec"])}
+        golden.update({"corpus": spec, "threshold": threshold, "calibration": round(calibration), "engines": baselines})
+        GOLDEN_PATH.write_text(json.dumps(golden, indent=2) + "\n")
+        print(f"updated {GOLDEN_PATH}")
+    elif failed:
+        sys.exit(1)
+
+
+BIAS_GAMES = ("updown", "slot", "baccarat")
+BIAS_CHOICES = (None, "player", "banker", "tie")
+
+
+def _bias_rule_set(count: int, seed: int) -> List[dict]:
+    """``count`` enabled rules spread over games, choices, bet bands, streaks and RTP targets; low odds so most rounds walk far."""
+    rng = random.Random(seed)
+    rules = []
+    for k in range(count):
+        low = rng.choice((1, 10, 100, 1000))
+        rule = {
+            "id": f"r{k}",
+            "direction": rng.choice(("house", "player")),
+            "probability": rng.choice((0.005, 0.01, 0.02)),
+            "priority": rng.randint(0, 9),
+            "bet_min": low,
+            "bet_max": low * rng.choice((10, 100)),
+        }
+        if rng.random() < 0.8:
+            rule["games"] = rng.sample(BIAS_GAMES, rng.randint(1, 2))
+        if "baccarat" in rule.get("games", ()) and rng.random() < 0.5:
+            rule["bet_choices"] = rng.sample(BIAS_CHOICES[1:], rng.randint(1, 2))
+        if rng.random() < 0.3:
+            rule["streak_win_at_least" if rule["direction"] == "house" else "streak_lose_at_least"] = rng.randint(2, 5)
+        if rng.random() < 0.3:
+            rule["target_rtp"] = rng.choice((0.8, 0.9, 1.0))
+        if rng.random() < 0.1:
+            rule["cooldown_sec"] = 30
+        rules.append(rule)
+    return rules
+
+
+def _legacy_bias_select(text: str, game_id: str, bet_amount: int, context: dict, cooldowns: dict, now: float, rand):
+    """The pre-compilation apply_bias walk (decode, sort, filter every rule each round); reference for parity."""
+    rules = json.loads(text)
+    for rule in sorted(rules, key=lambda r: r.get("priority", 0), reverse=True):
+        if not rule.get("enabled", True):
+            continue
+        games = rule.get("games")
+        if games and game_id not in games:
+            continue
+        if bet_amount < rule.get("bet_min", 0) or bet_amount > rule.get("bet_max", 10**12):
+            continue
+        choice_in = rule.get("bet_choices")
+        if choice_in and context.get("bet_choice") not in choice_in:
+            continue
+        streak_win = rule.get("streak_win_at_least", 0)
+        streak_lose = rule.get("streak_lose_at_least", 0)
+        if streak_win and context.get("win_streak", 0) < streak_win:
+            continue
+        if streak_lose and context.get("lose_streak", 0) < streak_lose:
+            continue
+        target_rtp = rule.get("target_rtp")
+        rtp_recent = context.get("rtp_recent")
+        direction = rule.get("direction")
+        if direction not in ("house", "player"):
+            continue
+        if target_rtp is not None and rtp_recent is not None:
+            if direction == "house" and rtp_recent <= target_rtp:
+                continue
+            if direction == "player" and rtp_recent >= target_rtp:
+                continue
+        cooldown = rule.get("cooldown_sec", 0)
+        rule_id = str(rule.get("id") or rule.get("name") or hash(json.dumps(rule, sort_keys=True)))
+        if cooldown and now - cooldowns.get(rule_id, 0) < cooldown:
+            continue
+        prob = float(rule.get("probability", rule.get("weight", 0)))
+        if prob <= 0:
+            continue
+        if rand() >= prob:
+            continue
+        return rule_id
+    return None
+
+
+def bench_bias(rule_counts: List[int], rounds: int, seed: int = 1) -> List[dict]:
+    """µs per round for the legacy walk vs compiled rules over identical rounds and random draws."""
+    rows = []
+    for count in rule_counts:
+        text = json.dumps(_bias_rule_set(count, seed))
+        rng = random.Random(seed)
+        contexts = []
+        for _ in range(rounds):
+            game_id = rng.choice(BIAS_GAMES)
+            contexts.append(
+                (
+                    game_id,
+                    rng.choice((5, 50, 500, 5000)),
+                    {
+                        "bet_choice": rng.choice(BIAS_CHOICES[1:]) if game_id == "baccarat" else None,
+                        "win_streak": rng.randint(0, 4),
+                        "lose_streak": rng.randint(0, 4),
+                        "rtp_recent": rng.choice((None, 0.85, 0.95, 1.05)),
+                    },
+                )
+            )
+        compile_started = time.perf_counter()
+        compile_bias_rules(text)
+        compile_ms = (time.perf_counter() - compile_started) * 1000
+
+        picks = {}
+        for name in ("legacy", "compiled"):
+            draws = random.Random(seed).random
+            cooldowns: dict = {}
+            compiled_cooldowns = BiasCooldowns()
+            chosen = []
+            started = time.perf_counter()
+            for k, (game_id, bet_amount, context) in enumerate(contexts):
+                if name == "legacy":
+                    rule_id = _legacy_bias_select(text, game_id, bet_amount, context, cooldowns, float(k), draws)
+                    if rule_id is not None:
+                        cooldowns[rule_id] = float(k)
+                else:
+                    rule = compile_bias_rules(text).select(
+                        game_id, bet_amount, context, compiled_cooldowns, float(k), draws
+                    )
+                    rule_id = rule.rule_id if rule else None
+                chosen.append(rule_id)
+            picks[name] = (chosen, (time.perf_counter() - started) / rounds * 1e6)
+        mismatches = sum(a != b for a, b in zip(picks["legacy"][0], picks["compiled"][0]))
+        rows.append(
+            {
+                "rules": count,
+                "rounds": rounds,
+                "compile_ms": compile_ms,
+                "legacy_us": picks["legacy"][1],
+                "compiled_us": picks["compiled"][1],
+                "applied": sum(rule_id is not None for rule_id in picks["compiled"][0]),
+                "mismatches": mismatches,
+            }
+        )
+    return rows
+
+
+def _cmd_bias(args: argparse.Namespace) -> None:
+    rows = bench_bias(args.rules, args.rounds)
+    for row in rows:
+        print(
+            f"rules={row['rules']:<5} legacy {row['legacy_us']:8.1f} us/round  compiled {row['compiled_us']:6.1f} us/round "
+            f"({row['legacy_us'] / max(row['compiled_us'], 1e-9):5.1f}x, compile {row['compile_ms']:.1f} ms) "
+            f"applied={row['applied']} mismatches={row['mismatches']}"
+        )
+    if any(row["mismatches"] for row in rows):
+        sys.exit(1)
+
+
+def _hot_queries(db: Session) -> List[tuple]:
+    """(name, query, index it must use) for the lookups main.py runs per request or per admin page."""
+    since = datetime.utcnow() - timedelta(minutes=30)
+    return [
+        (
+            "get_user_streak",
+            db.query(models.GameResult)
+            .filter(models.GameResult.user_id == 7, models.GameResult.game_id == "slot")
+            .order_by(models.GameResult.timestamp.desc())
+            .limit(50),
+            "ix_game_results_user_game_ts",
+        ),
+        (
+            "get_recent_rtp",
+            db.query(models.GameResult)
+            .filter(models.GameResult.game_id == "slot")
+            .order_by(models.GameResult.timestamp.desc())
+            .limit(100),
+            "ix_game_results_game_ts",
+        ),
+        (
+            "admin_dashboard",
+            db.query(models.GameResult).order_by(models.GameResult.timestamp.desc()).limit(25),
+            "ix_game_results_timestamp",
+        ),
+        (
+            "admin_user_transactions",
+            db.query(models.Transaction)
+            .filter(models.Transaction.user_id == 7)
+            .order_by(models.Transaction.created_at.desc())
+            .limit(200),
+            "ix_transactions_user_created",
+        ),
+        (
+            "admin_game_logs",
+            db.query(models.GameLog).order_by(models.GameLog.created_at.desc()).limit(500),
+            "ix_game_logs_created",
+        ),
+        (
+            "admin_active_games",
+            db.query(models.GameLog)
+            .filter(models.GameLog.created_at >= since, models.GameLog.game_id.isnot(None))
+            .order_by(models.GameLog.created_at.desc()),
+            "ix_game_logs_created",
+        ),
+    ]
+
+
+def _seed_index_db(engine, rows: int) -> None:
+    games = ("updown", "slot", "baccarat", "horse")
+    start = datetime.utcnow() - timedelta(seconds=rows)
+    batch = 50_000
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch):
+            span = range(offset, min(rows, offset + batch))
+            conn.execute(
+                insert(models.GameResult),
+                [
+                    {
+                        "user_id": i % 500,
+                        "session_key": f"s{i}",
+                        "game_id": games[i % 4],
+                        "bet_amount": 10,
+                        "result": "lose",
+                        "payout_multiplier": 0.0,
+                        "payout_amount": 0.0,
+                        "timestamp": start + timedelta(seconds=i),
+                    }
+                    for i in span
+                ],
+            )
+            conn.execute(
+                insert(models.Transaction),
+                [
+                    {
+                        "user_id": i % 500,
+                        "type": "game",
+                        "amount": -10,
+                        "before_balance": 1000,
+                        "after_balance": 990,
+                        "created_at": start + timedelta(seconds=i),
+                    }
+                    for i in span
+                ],
+            )
+            conn.execute(
+                insert(models.GameLog),
+                [
+                    {"user_id": i % 500, "game_id": games[i % 4], "action": "finish", "created_at": start + timedelta(seconds=i)}
+                    for i in span
+                ],
+            )
+
+
+def check_query_plans(rows: int) -> List[dict]:
+    """
+    Build the schema from models.py in a scratch SQLite file, load ``rows`` rows per table and
+    report each hot query's plan and latency. A query passes when its plan uses the expected
+    index and needs no temporary B-tree for ORDER BY.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/plans.db", future=True)
+        Base.metadata.create_all(bind=engine)
+        _seed_index_db(engine, rows)
+        out = []
+        with Session(engine) as db:
+            for name, query, index in _hot_queries(db):
+                compiled = query.statement.compile(dialect=engine.dialect)
+                params = tuple(compiled.params[key] for key in compiled.positiontup)
+                sql = str(compiled)
+                plan = [
+                    row[-1]
+                    for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+                ]
+                started = time.perf_counter()
+                db.connection().exec_driver_sql(sql, params).fetchall()
+                elapsed = time.perf_counter() - started
+                ok = any(index in step for step in plan) and not any("TEMP B-TREE" in step for step in plan)
+                out.append({"query": name, "index": index, "ok": ok, "ms": elapsed * 1000, "plan": plan})
+        engine.dispose()
+    return out
+
+
+def _cmd_indexes(args: argparse.Namespace) -> None:
+    rows = check_query_plans(args.rows)
+    for row in rows:
+        print(f"{row['query']:<24} {row['ms']:8.2f} ms {'ok' if row['ok'] else 'FAIL'}  {' | '.join(row['plan'])}")
+    if not all(row["ok"] for row in rows):
+        sys.exit(1)
+
+
+def _cmd_engine(args: argparse.Namespace) -> None:
+    for field in args.field:
+        for record in (True, False):
+            for row in bench_engine(args.races, args.engine, record, field):
+                print(
+                    f"{row['engine']:<7} field={row['field']:<2} record={str(row['record']):<5} races={row['races']} "
+                    f"{row['sec_per_race'] * 1000:8.1f} ms/race {row['ticks_per_sec']:10.0f} ticks/s"
+                )
+
+
+LOAD_GAMES = ("slot", "baccarat", "horse")
+LOAD_ADMIN_SECRET = "bench-admin"
+LOAD_INITIAL_BALANCE = 10**9
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _load_request(conn: http.client.HTTPConnection, method: str, path: str, body=None, headers=None) -> dict:
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers={
+        "Content-Type": "application/json",
+        **(headers or {}),
+    })
+    response = conn.getresponse()
+    data = response.read()
+    if response.status >= 400:
+        raise RuntimeError(f"{method} {path} -> {response.status} {data[:200]!r}")
+    return json.loads(data) if data else {}
+
+
+def _load_round(conn: http.client.HTTPConnection, game: str, auth: dict) -> None:
+    if game == "horse":
+        sess = _load_request(conn, "POST", "/api/horse/session/create", {"bet_amount": 10}, auth)
+        lock = {"session_id": sess["session_id"], "horse_id": sess["horses"][0]["id"], "bet_amount": 10}
+        _load_request(conn, "POST", "/api/horse/session/lock", lock, auth)
+        _load_request(conn, "POST", "/api/horse/session/finish", {"session_id": sess["session_id"]}, auth)
+        return
+    start = {"bet_amount": 10, **({"bet_choice": "player"} if game == "baccarat" else {})}
+    started = _load_request(conn, "POST", f"/api/game/{game}/start", start, auth)
+    resolve = {"session_id": started["detail"]["session_id"]}
+    _load_request(conn, "POST", f"/api/game/{game}/resolve", resolve, auth)
+
+
+def _wait_for_server(port: int, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {server.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/api/public/global_settings")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("uvicorn did not start")
+
+
+def _stop_process_group(server: subprocess.Popen) -> None:
+    try:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        pass
+    except ProcessLookupError:
+        return
+    try:
+        os.killpg(server.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _check_load_db(path: str, users: int) -> List[str]:
+    """Balances must equal the initial grant plus every logged transaction; no session left claimed twice."""
+    problems = []
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute(
+            "SELECT u.name, u.balance, COALESCE(SUM(t.amount), 0) FROM users u "
+            "LEFT JOIN transactions t ON t.user_id = u.id AND t.type = 'game' GROUP BY u.id"
+        ).fetchall()
+        for name, balance, moved in rows:
+            if balance != LOAD_INITIAL_BALANCE + moved:
+                problems.append(f"{name}: balance {balance} != {LOAD_INITIAL_BALANCE} + {moved}")
+        duplicated = conn.execute(
+            "SELECT COUNT(*) FROM (SELECT json_extract(detail, '$.session_id') AS sid FROM game_results "
+            "WHERE game_id = 'horse' GROUP BY sid HAVING COUNT(*) > 1)"
+        ).fetchone()[0]
+        if duplicated:
+            problems.append(f"{duplicated} horse sessions settled more than once")
+    if len(rows) != users:
+        problems.append(f"expected {users} users, found {len(rows)}")
+    return problems
+
+
+def bench_load(workers: int, game: str, clients: int, seconds: float, port: int) -> dict:
+    """Start ``uvicorn --workers N`` on a fresh database and drive ``clients`` users for ``seconds``."""
+    with tempfile.TemporaryDirectory(prefix="bench-load-") as tmp:
+        db_path = os.path.join(tmp, "load.db")
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{db_path}",
+            "ADMIN_SECRET": LOAD_ADMIN_SECRET,
+            "SESSION_STORE": "sqlite",
+        }
+        # schema/defaults once, so the workers do not race on first-time setup
+        subprocess.run(
+            [sys.executable, "-c", "from server import main; main.startup(); main.shutdown()"],
+            cwd=REPO_ROOT, env={**env, "HORSE_ODDS_WORKERS": "0"}, check=True,
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server.main:app", "--port", str(port), "--workers", str(workers),
+             "--log-level", "warning"],
+            cwd=REPO_ROOT, env=env,
+            # own process group: forked odds/race pool processes keep the listening socket open
+            # after uvicorn exits, so the whole group is stopped at the end
+            start_new_session=True,
+        )
+        try:
+            _wait_for_server(port, server)
+            admin = {"admin-secret": LOAD_ADMIN_SECRET}
+            tokens = []
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            for k in range(clients):
+                user = {"name": f"load{k}", "pin": "0000", "initial_balance": LOAD_INITIAL_BALANCE}
+                _load_request(conn, "POST", "/api/admin/users", user, admin)
+                login = _load_request(conn, "POST", "/api/login", {"name": user["name"], "pin": "0000"})
+                tokens.append({"Authorization": f"Bearer {login['token']}"})
+            conn.close()
+
+            rounds = [0] * clients
+            errors: List[str] = []
+            deadline = time.monotonic() + seconds
+
+            def client(k: int) -> None:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                while time.monotonic() < deadline:
+                    try:
+                        _load_round(conn, game, tokens[k])
+                        rounds[k] += 1
+                    except Exception as exc:  # keep driving load; errors fail the run at the end
+                        errors.append(str(exc))
+                        conn.close()
+                        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                conn.close()
+
+            started = time.perf_counter()
+            threads = [threading.Thread(target=client, args=(k,)) for k in range(clients)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            ledger = _load_request(conn, "GET", "/api/admin/ledger/check", headers=admin)
+            conn.close()
+        finally:
+            _stop_process_group(server)
+        problems = _check_load_db(db_path, clients)
+        if not ledger.get("ok"):
+            problems.append(f"ledger mismatch: {ledger}")
+    return {
+        "workers": workers,
+        "game": game,
+        "rounds": sum(rounds),
+        "rounds_per_sec": sum(rounds) / elapsed,
+        "errors": errors,
+        "problems": problems,
+    }
+
+
+def _cmd_load(args: argparse.Namespace) -> None:
+    print(f"cpus={os.cpu_count()} game={args.game} clients={args.clients} seconds={args.seconds}")
+    base = None
+    failed = False
+    for workers in args.workers:
+        row = bench_load(workers, args.game, args.clients, args.seconds, args.port)
+        base = base or row["rounds_per_sec"]
+        print(
+            f"workers={workers:<2} rounds={row['rounds']:<6} {row['rounds_per_sec']:8.1f} rounds/s "
+            f"({row['rounds_per_sec'] / base:4.2f}x) errors={len(row['errors'])} problems={len(row['problems'])}"
+        )
+        for message in (row["errors"][:3] + row["problems"])[:10]:
+            print(f"  {message}")
+        failed = failed or bool(row["errors"] or row["problems"])
+    if failed:
+        sys.exit(1)
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m server.bench")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    engine = sub.add_parser("engine", help="horse race engine tick rate")
+    engine.add_argument("--races", type=int, default=10)
+    engine.add_argument("--engine", nargs="+", choices=HORSE_ENGINES, default=list(HORSE_ENGINES))
+    engine.add_argument("--field", nargs="+", type=int, default=[4], help="horses per race")
+    engine.set_defaults(func=_cmd_engine)
+
+    golden = sub.add_parser("golden", help="golden-seed parity and throughput gate for every engine")
+    golden.add_argument(
+        "--engine", nargs="+", choices=[*GOLDEN_VARIANTS, "ts"], default=[*GOLDEN_VARIANTS, "ts"]
+    )
+    golden.add_argument("--repeat", type=int, default=5, help="timed passes; the best one counts")
+    golden.add_argument("--threshold", type=float, default=None, help="allowed ticks/s drop (default from golden file)")
+    golden.add_argument("--ts-runner", default=TS_RUNNER, help="command that runs a .ts file (env HORSE_TS_RUNNER)")
+    golden.add_argument("--update", action="store_true", help="record current digests and throughput as the baseline")
+    golden.set_defaults(func=_cmd_golden)
+
+    indexes = sub.add_parser("indexes", help="query plans of the hot game_results/transactions/game_logs lookups")
+    indexes.add_argument("--rows", type=int, default=100_000, help="rows loaded into each table")
+    indexes.set_defaults(func=_cmd_indexes)
+
+    bias = sub.add_parser("bias", help="compiled vs per-round bias rule evaluation, with parity check")
+    bias.add_argument("--rules", nargs="+", type=int, default=[10, 100, 500], help="rule set sizes")
+    bias.add_argument("--rounds", type=int, default=5000)
+    bias.set_defaults(func=_cmd_bias)
+
+    load = sub.add_parser("load", help="throughput and consistency under uvicorn --workers N")
+    load.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    load.add_argument("--game", choices=LOAD_GAMES, default="horse")
+    load.add_argument("--clients", type=int, default=16, help="concurrent users, one connection each")
+    load.add_argument("--seconds", type=float, default=10.0)
+    load.add_argument("--port", type=int, default=8765)
+    load.set_defaults(func=_cmd_load)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
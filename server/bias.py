@@ -0,0 +1,233 @@
+"""
+Compiled bias rules.
+
+``GameSetting.bias_rules`` is JSON text that used to be decoded, sorted and re-hashed on every
+round. ``compile_bias_rules`` turns it into a ``CompiledBiasRules`` once per distinct rule text:
+invalid rules are dropped (and logged), numeric fields are converted to floats, rules are sorted
+by priority (ties keep their order) and every rule gets a stable id. Candidate lists are then
+bucketed per (game, bet choice) on first use, so a round only walks rules that can match it.
+
+Rule fields (all optional except ``direction``)::
+
+    id / name            rule id; otherwise "rule-" + sha1 of the rule JSON (stable across processes)
+    enabled              default true
+    direction            "house" (flip wins to losses) or "player" (flip losses to wins)
+    probability / weight chance of applying once every condition holds
+    priority             higher first
+    games, bet_choices   lists restricting the game / bet choice
+    bet_min, bet_max     inclusive bet bounds
+    streak_win_at_least, streak_lose_at_least
+    target_rtp           house rules only fire above it, player rules only below it
+    cooldown_sec         per-rule minimum interval between applications (see ``BiasCooldowns``)
+    win_multiplier       multiplier of a forced player win (default max(multiplier, 1.0))
+"""
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger("uvicorn.error")
+
+BIAS_DIRECTIONS = ("house", "player")
+BIAS_RULE_CACHE_SIZE = 64
+
+
+class BiasRule:
+    __slots__ = (
+        "rule",
+        "rule_id",
+        "direction",
+        "probability",
+        "games",
+        "bet_choices",
+        "bet_min",
+        "bet_max",
+        "streak_win",
+        "streak_lose",
+        "target_rtp",
+        "cooldown",
+        "win_multiplier",
+    )
+
+    def __init__(self, rule: dict) -> None:
+        self.rule = rule
+        self.rule_id = str(rule.get("id") or rule.get("name") or _rule_digest(rule))
+        self.direction = rule.get("direction")
+        if self.direction not in BIAS_DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(BIAS_DIRECTIONS)}")
+        self.probability = float(rule.get("probability", rule.get("weight", 0)))
+        self.games = _name_set(rule.get("games"))
+        self.bet_choices = _name_set(rule.get("bet_choices"))
+        self.bet_min = float(rule.get("bet_min", 0))
+        self.bet_max = float(rule.get("bet_max", 10**12))
+        self.streak_win = float(rule.get("streak_win_at_least") or 0)
+        self.streak_lose = float(rule.get("streak_lose_at_least") or 0)
+        target_rtp = rule.get("target_rtp")
+        self.target_rtp = float(target_rtp) if target_rtp is not None else None
+        self.cooldown = float(rule.get("cooldown_sec") or 0)
+        win_multiplier = rule.get("win_multiplier")
+        self.win_multiplier = float(win_multiplier) if win_multiplier is not None else None
+
+    def matches(self, bet_amount: float, context: Mapping[str, object]) -> bool:
+        """Conditions that depend on the round (the game and bet choice are settled by the bucket)."""
+        if bet_amount < self.bet_min or bet_amount > self.bet_max:
+            return False
+        if self.streak_win and context.get("win_streak", 0) < self.streak_win:
+            return False
+        if self.streak_lose and context.get("lose_streak", 0) < self.streak_lose:
+            return False
+        rtp_recent = context.get("rtp_recent")
+        if self.target_rtp is not None and rtp_recent is not None:
+            if self.direction == "house" and rtp_recent <= self.target_rtp:
+                return False
+            if self.direction == "player" and rtp_recent >= self.target_rtp:
+                return False
+        return True
+
+
+def _rule_digest(rule: dict) -> str:
+    return "rule-" + hashlib.sha1(json.dumps(rule, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+
+
+def _name_set(value) -> Optional[frozenset]:
+    if not value:
+        return None
+    if isinstance(value, str):
+        return frozenset((value,))
+    return frozenset(value)
+
+
+class BiasCooldowns:
+    """Last application time per rule id, local to this process."""
+
+    def __init__(self) -> None:
+        self.last: Dict[str, float] = {}
+
+    def active(self, rule_id: str, now: float, cooldown: float) -> bool:
+        return now - self.last.get(rule_id, 0) < cooldown
+
+    def claim(self, rule_id: str, now: float, cooldown: float) -> bool:
+        self.last[rule_id] = now
+        return True
+
+
+class SharedBiasCooldowns(BiasCooldowns):
+    """
+    Cooldowns every worker process sees: one entry per rule in a session store with the rule's
+    cooldown as TTL. ``claim`` is the store's insert-if-absent, so of two workers that pick the
+    same rule at once only one applies it.
+
+    ``active`` runs on every candidate of every round, so it only reads ``last``: the claims this
+    process made or lost. A cooldown another worker started is learned on the first claim that
+    loses to it (its start time is read back then), so the store is touched only when a rule
+    actually wins its draw.
+    """
+
+    def __init__(self, store) -> None:
+        super().__init__()
+        self.store = store
+
+    def claim(self, rule_id: str, now: float, cooldown: float) -> bool:
+        for _ in range(2):
+            if self.store.add(rule_id, {"at": now}, ttl=cooldown):
+                self.last[rule_id] = now
+                return True
+            entry = self.store.get(rule_id)
+            if entry is not None:
+                self.last[rule_id] = entry.get("at", now)
+                return False
+            # The other claim expired between add and get; try once more.
+        return False
+
+
+class CompiledBiasRules:
+    def __init__(self, rules: Iterable[BiasRule], dropped: int = 0) -> None:
+        self.rules: Tuple[BiasRule, ...] = tuple(rules)
+        self.dropped = dropped
+        self._buckets: Dict[Tuple[str, Optional[str]], Tuple[BiasRule, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def candidates(self, game_id: str, bet_choice: Optional[str]) -> Tuple[BiasRule, ...]:
+        key = (game_id, bet_choice)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = tuple(
+                rule
+                for rule in self.rules
+                if (rule.games is None or game_id in rule.games)
+                and (rule.bet_choices is None or bet_choice in rule.bet_choices)
+            )
+            self._buckets[key] = bucket
+        return bucket
+
+    def select(
+        self,
+        game_id: str,
+        bet_amount: float,
+        context: Mapping[str, object],
+        cooldowns: BiasCooldowns,
+        now: float,
+        rand: Callable[[], float],
+    ) -> Optional[BiasRule]:
+        """
+        First candidate whose conditions hold, that is off cooldown and wins its probability draw.
+        The chosen rule's cooldown is claimed here; a rule whose claim is lost is skipped.
+        """
+        for rule in self.candidates(game_id, context.get("bet_choice")):
+            if not rule.matches(bet_amount, context):
+                continue
+            if rule.cooldown and cooldowns.active(rule.rule_id, now, rule.cooldown):
+                continue
+            if rand() >= rule.probability:
+                continue
+            if rule.cooldown and not cooldowns.claim(rule.rule_id, now, rule.cooldown):
+                continue
+            return rule
+        return None
+
+
+def _build(rules: List[dict]) -> CompiledBiasRules:
+    compiled: List[Tuple[float, int, BiasRule]] = []
+    dropped = 0
+    for index, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            dropped += 1
+            continue
+        if not rule.get("enabled", True):
+            continue
+        try:
+            priority = float(rule.get("priority", 0))
+            item = BiasRule(rule)
+        except (TypeError, ValueError) as exc:
+            dropped += 1
+            logger.warning("Ignoring bias rule #%d (%s): %s", index, rule.get("id") or rule.get("name"), exc)
+            continue
+        if item.probability > 0:
+            compiled.append((priority, index, item))
+    compiled.sort(key=lambda entry: (-entry[0], entry[1]))
+    return CompiledBiasRules((item for _, _, item in compiled), dropped)
+
+
+@lru_cache(maxsize=BIAS_RULE_CACHE_SIZE)
+def _compile_text(text: str) -> CompiledBiasRules:
+    try:
+        rules = json.loads(text or "[]")
+    except ValueError:
+        logger.warning("Ignoring bias_rules: not valid JSON")
+        return CompiledBiasRules(())
+    return _build(rules if isinstance(rules, list) else [])
+
+
+def compile_bias_rules(rules) -> CompiledBiasRules:
+    """
+    Compile ``bias_rules`` (JSON text or an already decoded list). Keyed by the rule text, so a
+    settings change compiles once and every later round reuses the result.
+    """
+    if isinstance(rules, CompiledBiasRules):
+        return rules
+    if isinstance(rules, list):
+        return _compile_text(json.dumps(rules, sort_keys=True, default=str))
+    return _compile_text(rules if isinstance(rules, str) else "[]")
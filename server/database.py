@@ -1,10 +1,39 @@
+import os
 from pathlib import Path
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATABASE_URL = f"sqlite:///{(BASE_DIR / 'bet_simulator.db').as_posix()}"
+DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{(BASE_DIR / 'bet_simulator.db').as_posix()}")
+
+# Storage profile applied to every new SQLite connection. WAL lets readers run next to the
+# single writer and NORMAL synchronous only fsyncs at checkpoints, so game commits no longer
+# serialize on the rollback-journal lock; busy_timeout makes a writer wait instead of failing
+# with "database is locked". cache_size < 0 is in KiB, mmap_size in bytes.
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL").upper()
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_TEMP_STORE = os.environ.get("SQLITE_TEMP_STORE", "MEMORY").upper()
+
+_SQLITE_CHOICES = {
+    "journal_mode": ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"),
+    "synchronous": ("OFF", "NORMAL", "FULL", "EXTRA"),
+    "temp_store": ("DEFAULT", "FILE", "MEMORY"),
+}
+SQLITE_PRAGMAS = {
+    "journal_mode": SQLITE_JOURNAL_MODE,
+    "synchronous": SQLITE_SYNCHRONOUS,
+    "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+    "cache_size": SQLITE_CACHE_SIZE,
+    "mmap_size": SQLITE_MMAP_SIZE,
+    "temp_store": SQLITE_TEMP_STORE,
+}
+for _name, _choices in _SQLITE_CHOICES.items():
+    if SQLITE_PRAGMAS[_name] not in _choices:
+        raise ValueError(f"SQLITE_{_name.upper()} must be one of {', '.join(_choices)}")
 
 engine = create_engine(
     DATABASE_URL, echo=False, future=True, connect_args={"check_same_thread": False}
@@ -13,6 +42,36 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+@event.listens_for(engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    if engine.dialect.name != "sqlite":
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def sqlite_settings() -> dict:
+    """Effective pragma values as SQLite reports them on a pooled connection."""
+    if engine.dialect.name != "sqlite":
+        return {}
+    names = {
+        "synchronous": _SQLITE_CHOICES["synchronous"],
+        "temp_store": _SQLITE_CHOICES["temp_store"],
+    }
+    settings = {}
+    with engine.connect() as conn:
+        for name in SQLITE_PRAGMAS:
+            value = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            if name in names and isinstance(value, int):
+                value = names[name][value]
+            settings[name] = value.upper() if isinstance(value, str) else value
+    return settings
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,1645 @@
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from random import NV_MAGICCONST
+from typing import Dict, List
+
+import numpy as np
+
+# Horse race simulation constants (pure probability engine)
+HORSE_TRACK_LENGTH = 1000.0
+HORSE_DT = 1 / 60
+HORSE_MAX_TICKS = 20000
+HORSE_TIMELINE_INTERVAL = 0.2
+HORSE_SEGMENTS = [
+    (0.0, 0.40, "straight"),
+    (0.40, 0.5, "corner"),
+    (0.5, 0.90, "straight"),
+    (0.90, 1.0, "corner"),
+]
+HORSE_LAPS = 2
+HORSE_FIELD_SIZE = max(2, min(16, int(os.environ.get("HORSE_FIELD_SIZE", "4"))))
+HORSE_STAT_TOTAL = 300
+HORSE_MIN_STAT = 20
+OD_ALPHA = 0.15
+OD_PHI = 0.35
+OD_ETA_MIN = 1.0
+OD_LAMBDA = 0.035
+OD_RHO = 2.0
+OD_MU = 0.6
+OD_H_HALF = 1.5
+HT_TWEAK = 0.15
+SPD_K_SD = 0.45
+ACC_K_A = 1.4
+K_T = 1.2
+K_C = 1.3
+K_R = 1.4
+SIGMA_MIN = 0.03
+SIGMA_MAX = 0.25
+NOISE_MAX = 0.05
+PHYS_VREF = 15.0
+PHYS_GAMMA = 2.2
+PHYS_GAMMA2 = 2.6
+PHYS_E0 = 0.015
+PHYS_E1 = 0.035
+PHYS_P0 = 8.0
+PHYS_P1 = 10.0
+PHYS_V0 = 14.0
+PHYS_V1 = 6.0
+PHYS_D0 = 0.010
+PHYS_D1 = 0.0006
+PHYS_BC = 2.3
+PHYS_KAPPA = 0.03
+PHYS_EPS = 1e-6
+PHYS_ALAT0 = 2.0
+PHYS_ALAT1 = 5.5
+PHYS_H0 = 0.9
+PHYS_HDECAY = 2.8
+HORSE_P_CONTACT = 1 - math.exp(-0.02 * HORSE_DT)
+HORSE_ENGINES = ("python", "numpy")
+HORSE_ENGINE = os.environ.get("HORSE_ENGINE", "python")
+# Bump whenever a change alters the output of run_horse_race for an existing seed;
+# stored races record it so replays can tell whether regeneration is faithful.
+HORSE_ENGINE_VERSION = 1
+# Events format: 1 = one event per tick for every state; 2 = continuous states
+# (HORSE_SPAN_EVENTS) are coalesced into intervals with t_end and the peak mag.
+HORSE_EVENTS_VERSION = 2
+HORSE_SPAN_EVENTS = ("SLIP", "HEATCAP")
+# Timeline samples per chunk when a race is streamed (iter_horse_race).
+HORSE_STREAM_CHUNK = max(1, int(os.environ.get("HORSE_STREAM_CHUNK", "25")))
+HORSE_REPLAY_CACHE_SIZE = int(os.environ.get("HORSE_REPLAY_CACHE_SIZE", "64"))
+HORSE_TIMELINE_ENCODING = "qdelta-v1"
+# Fixed-point scale per timeline field: t in ms, positions/speeds in cm(/s), energy/heat in 1e-4.
+HORSE_TIMELINE_SCALES = {"t": 1000, "positions": 100, "speeds": 100, "energy": 10000, "heat": 10000}
+HORSE_ODDS_SIMS = int(os.environ.get("HORSE_ODDS_SIMS", "2000"))
+# Both process pools are started by every uvicorn worker, so a host runs --workers times
+# (HORSE_ODDS_WORKERS + HORSE_RACE_WORKERS) of them: small fixed defaults, sized per host by env.
+HORSE_ODDS_WORKERS = int(os.environ.get("HORSE_ODDS_WORKERS", "1"))
+HORSE_ODDS_BUFFER = int(os.environ.get("HORSE_ODDS_BUFFER", "8"))
+HORSE_PLACE_RANKS = 2
+HORSE_ODDS_MIN = 1.05
+HORSE_ODDS_MAX = 50.0
+HORSE_FIXED_PAYOUT = 3.0
+_ODDS_EXECUTOR: ProcessPoolExecutor | None = None
+_PRICED_POOLS: deque = deque()
+_PRICING_JOBS: set = set()
+_PRICING_LOCK = threading.Lock()
+HORSE_RACE_WORKERS = int(os.environ.get("HORSE_RACE_WORKERS", "1"))
+HORSE_RACE_QUEUE = int(os.environ.get("HORSE_RACE_QUEUE", "32"))
+HORSE_RACE_TIMEOUT = float(os.environ.get("HORSE_RACE_TIMEOUT", "15"))
+HORSE_MAPS: Dict[str, dict] = {
+    "oval": {
+        "id": "oval",
+        "name": "OVAL",
+        "corner_count": 2,
+        "weights": {"speed": 1.0, "accel": 0.9, "stamina": 0.5, "cornering": 0.6, "stability": -0.25},
+        "wind_mean": 0.0,
+        "wind_sigma": 0.08,
+        "slope_profile": [(0.0, 0.25, 0.0), (0.25, 0.5, 0.01), (0.5, 0.75, -0.008), (0.75, 1.0, 0.0)],
+        # segments: (start, end, type[, kappa]) as lap fractions; defaults to HORSE_SEGMENTS / PHYS_KAPPA
+    },
+    # 향후 L/U 맵 추가 예정
+}
+HORSE_TRACK_BINS = 1000
+HORSE_TACTIC_FRONT = 0
+HORSE_TACTIC_STALKER = 1
+HORSE_TACTIC_CLOSER = 2
+_HORSE_TRACKS: Dict[str, "HorseTrack"] = {}
+
+
+def smoothstep(edge0: float, edge1: float, t: float) -> float:
+    u = min(1.0, max(0.0, (t - edge0) / (edge1 - edge0)))
+    return u * u * (3 - 2 * u)
+
+
+def eff_exp(raw: float, k: float) -> float:
+    return 1 - math.exp(-k * raw)
+
+
+class HorseTrack:
+    """
+    Lookup tables compiled once per map: corner flag, curvature and slope per lap position.
+
+    The lap is cut into HORSE_TRACK_BINS equal bins, so a lookup is one index. Bins that
+    touch a segment or slope boundary are marked and answered by scanning the segment
+    lists with the original ``start <= frac < end`` rule; every lookup therefore returns
+    exactly what the scans used to.
+    """
+
+    __slots__ = ("map_key", "segments", "slope_profile", "wind_mean", "wind_sigma", "cells", "boundary",
+                 "corner_arr", "kappa_arr", "slope_arr", "boundary_arr")
+
+    def __init__(self, map_key: str, profile: dict):
+        self.map_key = map_key
+        self.segments = [
+            (seg[0], seg[1], seg[2] == "corner", seg[3] if len(seg) > 3 else PHYS_KAPPA)
+            for seg in profile.get("segments", HORSE_SEGMENTS)
+        ]
+        self.slope_profile = [tuple(seg) for seg in profile.get("slope_profile") or [(0.0, 1.0, 0.0)]]
+        self.wind_mean = profile.get("wind_mean", 0.0)
+        self.wind_sigma = profile.get("wind_sigma", 0.08)
+        edges = {edge for seg in self.segments for edge in seg[:2]}
+        edges |= {edge for seg in self.slope_profile for edge in seg[:2]}
+        n = HORSE_TRACK_BINS
+        self.boundary = [any(k / n - 1e-9 <= edge <= (k + 1) / n + 1e-9 for edge in edges) for k in range(n)]
+        self.cells = [self.scan((k + 0.5) / n) for k in range(n)]
+        self.corner_arr = np.array([c[0] for c in self.cells])
+        self.kappa_arr = np.array([c[1] for c in self.cells])
+        self.slope_arr = np.array([c[2] for c in self.cells])
+        self.boundary_arr = np.array(self.boundary)
+
+    def scan(self, frac: float) -> tuple[bool, float, float]:
+        corner = next((seg for seg in self.segments if seg[2] and seg[0] <= frac < seg[1]), None)
+        slope = next((s for start, end, s in self.slope_profile if start <= frac < end), 0.0)
+        return (corner is not None, corner[3] if corner else 0.0, slope)
+
+    def at(self, frac: float) -> tuple[bool, float, float]:
+        """(in_corner, kappa, slope) at lap fraction ``frac``."""
+        k = int(frac * HORSE_TRACK_BINS)
+        if 0 <= k < HORSE_TRACK_BINS and not self.boundary[k]:
+            return self.cells[k]
+        return self.scan(frac)
+
+    def lookup(self, frac: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized ``at``: arrays of corner flags, curvature and slope."""
+        k = np.clip((frac * HORSE_TRACK_BINS).astype(np.int64), 0, HORSE_TRACK_BINS - 1)
+        corner = self.corner_arr[k]
+        kappa = self.kappa_arr[k]
+        slope = self.slope_arr[k]
+        exact = self.boundary_arr[k]
+        if exact.any():
+            # Same first-match ``start <= frac < end`` rule as scan, one segment at a time.
+            f = frac[exact]
+            seg_corner = np.zeros(f.shape, dtype=bool)
+            seg_kappa = np.zeros(f.shape)
+            open_ = np.ones(f.shape, dtype=bool)
+            for start, end, is_corner, seg_k in self.segments:
+                if is_corner:
+                    hit = open_ & (start <= f) & (f < end)
+                    seg_corner |= hit
+                    seg_kappa[hit] = seg_k
+                    open_ &= ~hit
+            seg_slope = np.zeros(f.shape)
+            open_ = np.ones(f.shape, dtype=bool)
+            for start, end, s in self.slope_profile:
+                hit = open_ & (start <= f) & (f < end)
+                seg_slope[hit] = s
+                open_ &= ~hit
+            corner[exact], kappa[exact], slope[exact] = seg_corner, seg_kappa, seg_slope
+        return corner, kappa, slope
+
+
+def get_horse_track(map_key: str) -> HorseTrack:
+    """Compiled track for ``map_key`` (unknown keys fall back to oval), built on first use."""
+    key = map_key if map_key in HORSE_MAPS else "oval"
+    track = _HORSE_TRACKS.get(key)
+    if track is None:
+        track = _HORSE_TRACKS[key] = HorseTrack(key, HORSE_MAPS[key])
+    return track
+
+
+class HorseParams:
+    """
+    Per-horse constants of one race, derived once from stats, hidden traits and condition.
+
+    Expressions are evaluated exactly as the race loop used to evaluate them every tick,
+    so hoisting them does not change a single bit of the result.
+    """
+
+    __slots__ = (
+        "tactic", "condition", "heat_resist", "recover_mul", "Vcap_base", "Vcap_safe", "eta",
+        "eta_od0", "PmaxF", "a_lat_max", "e0_load", "e1_coef", "dH_c1", "dH_c2", "heat_cap", "iod_stat",
+        "iod_acc", "p_stumble", "p_stumble_again", "p_boost",
+    )
+
+    def __init__(
+        self, stats: dict, heat_resist: float, recover_rate: float, luck: float, tactic: int, condition: float
+    ):
+        Sn = stats.get("speed", HORSE_MIN_STAT) / 100
+        An = stats.get("accel", HORSE_MIN_STAT) / 100
+        Tn = stats.get("stamina", HORSE_MIN_STAT) / 100
+        Cn = stats.get("cornering", HORSE_MIN_STAT) / 100
+        T_eff = eff_exp(Tn, K_T)
+        C_eff = eff_exp(Cn, K_C)
+        R_eff = eff_exp(stats.get("stability", HORSE_MIN_STAT) / 100, K_R)
+        lambda_stumble = 0.003 * (1 + (1 - R_eff))
+        self.tactic = tactic
+        self.condition = condition
+        self.heat_resist = heat_resist
+        self.recover_mul = 0.8 * recover_rate
+        self.Vcap_base = PHYS_V0 + PHYS_V1 * math.sqrt(Sn)
+        self.Vcap_safe = max(self.Vcap_base, 1e-6)
+        self.eta = 1.8 + 1.2 * (1 - An)
+        self.eta_od0 = max(OD_ETA_MIN, self.eta * (1 - OD_PHI * 0.0))
+        self.PmaxF = (PHYS_P0 + PHYS_P1 * Sn) * condition
+        self.a_lat_max = PHYS_ALAT0 + PHYS_ALAT1 * (C_eff ** 1.1)
+        self.e0_load = PHYS_E0 * (1 + SPD_K_SD * Sn)
+        self.e1_coef = 1 - 0.5 * T_eff
+        self.dH_c1 = 1 - C_eff
+        self.dH_c2 = 1 + HT_TWEAK * (1 - T_eff)
+        self.heat_cap = max(0.6, 1.0 - 0.2 * heat_resist)
+        self.iod_stat = max(0.0, min(1.0, 0.35 + 0.65 * T_eff - 0.3 * (1 - R_eff)))
+        self.iod_acc = 1 - math.exp(-ACC_K_A * An)
+        self.p_stumble = 1 - math.exp(-lambda_stumble * HORSE_DT)
+        self.p_stumble_again = 1 - math.exp(-(lambda_stumble * (1 + (1 - R_eff))) * HORSE_DT)
+        self.p_boost = 1 - math.exp(-(0.0025 * luck) * HORSE_DT)
+
+
+class _HorseState:
+    __slots__ = (
+        "idx", "horse_id", "params", "pos", "v", "E", "H", "rank", "finished", "finish_time", "prev_event",
+        "slip_span", "heat_span",
+    )
+
+    def __init__(self, idx: int, horse_id: str, params: HorseParams):
+        self.idx = idx
+        self.horse_id = horse_id
+        self.params = params
+        self.pos = 0.0
+        self.v = 0.0
+        self.E = 1.0
+        self.H = 0.0
+        self.rank = 0
+        self.finished = False
+        self.finish_time = math.inf
+        self.prev_event = None
+        self.slip_span = None  # open SLIP / HEATCAP interval events while recording
+        self.heat_span = None
+
+
+class _HorseEventSpans:
+    """
+    Open interval events of one race, keyed by (horse, kind).
+
+    ``mark`` is called once per tick per horse and kind: the first tick in the state appends
+    an event (so events stay ordered by start time), later ones extend ``t_end`` and keep the
+    peak ``mag``, and a tick outside the state closes the interval.
+    """
+
+    __slots__ = ("events", "open")
+
+    def __init__(self, events: list):
+        self.events = events
+        self.open = {}
+
+    def mark(self, t_evt: float, key, horse_id: str, kind: str, on: bool, magnitude: float, note: str):
+        """Record one tick in (``on``) or out of a state; returns the open event, if any."""
+        ev = self.open.get((key, kind))
+        if not on:
+            if ev is not None:
+                del self.open[(key, kind)]
+            return None
+        if ev is None:
+            ev = {"t": t_evt, "t_end": t_evt, "horse_id": horse_id, "kind": kind, "mag": magnitude, "note": note}
+            self.open[(key, kind)] = ev
+            self.events.append(ev)
+        else:
+            ev["t_end"] = t_evt
+            if magnitude > ev["mag"]:
+                ev["mag"] = magnitude
+        return ev
+
+    def drain(self, final: bool = False) -> list:
+        """Remove and return the leading events that can no longer change (all of them if ``final``)."""
+        events = self.events
+        if final:
+            k = len(events)
+            self.open.clear()
+        else:
+            still_open = {id(ev) for ev in self.open.values()}
+            k = 0
+            while k < len(events) and id(events[k]) not in still_open:
+                k += 1
+        out = events[:k]
+        del events[:k]
+        return out
+
+
+def coalesce_horse_events(events: List[dict]) -> List[dict]:
+    """
+    Convert a version-1 event list (one SLIP/HEATCAP per tick) to the interval format.
+
+    Per-tick events of the same horse and kind on consecutive ticks merge into one interval;
+    instantaneous events are kept as they are. Version-2 lists pass through unchanged.
+    """
+    out = []
+    spans = _HorseEventSpans(out)
+    last_t = {}
+    for ev in events:
+        kind = ev.get("kind")
+        if kind not in HORSE_SPAN_EVENTS or "t_end" in ev:
+            out.append(ev)
+            continue
+        key = ev.get("horse_id")
+        t_evt = ev.get("t", 0.0)
+        prev = last_t.get((key, kind))
+        if prev is not None and t_evt - prev > HORSE_DT * 1.5:
+            spans.mark(t_evt, key, key, kind, False, 0.0, "")
+        spans.mark(t_evt, key, key, kind, True, ev.get("mag", 0.0), ev.get("note", ""))
+        last_t[(key, kind)] = t_evt
+    return out
+
+
+def generate_horse_pool(seed: int | None = None, count: int | None = None) -> List[dict]:
+    """Generate ``count`` horses (default HORSE_FIELD_SIZE) using fixed stat budget (sum=N) with constrained speed."""
+    rng = random.Random(seed)
+    horses = []
+    total = HORSE_STAT_TOTAL
+    min_stat = HORSE_MIN_STAT
+    min_other_sum = 4 * min_stat
+    # Base speed ensures >=50 and <=100, and spread <=30 using per-horse offset.
+    base_speed = min(70, 50 + rng.randint(0, 20))
+    for i in range(count or HORSE_FIELD_SIZE):
+        # Speed with max spread 30
+        speed_offset = rng.randint(0, 30)
+        speed_val = min(100, base_speed + speed_offset)
+        # Ensure enough budget remains for other stats
+        max_allowed_speed = total - min_other_sum
+        if speed_val > max_allowed_speed:
+            speed_val = max(max_allowed_speed, 50)
+        remaining = total - speed_val
+        extra = max(0, remaining - min_other_sum)
+        cuts = sorted([rng.randint(0, extra) for _ in range(3)])
+        portions = [
+            cuts[0],
+            cuts[1] - cuts[0],
+            cuts[2] - cuts[1],
+            extra - cuts[2],
+        ]
+        rng.shuffle(portions)
+        stats = {
+            "speed": speed_val,
+            "accel": min_stat + portions[0],
+            "stamina": min_stat + portions[1],
+            "stability": min_stat + portions[2],
+            "cornering": min_stat + portions[3],
+        }
+        horses.append({"id": f"h{i+1}", "name": f"Horse {i+1}", "stats": stats})
+    return horses
+
+
+def run_horse_race(
+    horses: List[dict],
+    map_key: str,
+    seed: int | None = None,
+    engine: str | None = None,
+    record: bool = True,
+) -> tuple[str, list, dict, dict]:
+    """
+    Horse race engine (pure physics + stochastic events) per FINAL INTEGRATED SPEC.
+
+    ``engine`` selects the implementation (see HORSE_ENGINES); defaults to HORSE_ENGINE.
+    With ``record=False`` no timeline samples or events are captured (both come back
+    empty); winner, finish times and conditions are identical because recording never
+    touches the RNG stream. Settlement uses this; replays re-run with ``record=True``.
+    """
+    steps = _HORSE_ENGINE_STEPS[_resolve_horse_engine(engine)]
+    return _finish_horse_race(steps(horses, map_key, seed, record, 0))
+
+
+def iter_horse_race(
+    horses: List[dict],
+    map_key: str,
+    seed: int | None = None,
+    engine: str | None = None,
+    chunk: int = HORSE_STREAM_CHUNK,
+):
+    """
+    Run a recorded race as a generator of ``(timeline, events)`` chunks.
+
+    Every ``chunk`` timeline samples the engine yields them together with the events that
+    are final by then (an interval event is held back until it closes), so only one chunk
+    is ever in memory. The generator's return value is the usual run_horse_race tuple,
+    with empty timeline and events since those were already yielded.
+    """
+    steps = _HORSE_ENGINE_STEPS[_resolve_horse_engine(engine)]
+    return (yield from steps(horses, map_key, seed, True, chunk))
+
+
+def _resolve_horse_engine(engine: str | None) -> str:
+    engine = engine or HORSE_ENGINE
+    if engine not in HORSE_ENGINES:
+        raise ValueError(f"unknown horse engine: {engine}")
+    return engine
+
+
+def _finish_horse_race(steps) -> tuple[str, list, dict, dict]:
+    """Drive a race generator that never yields (chunk=0) and return its result."""
+    try:
+        while True:
+            next(steps)
+    except StopIteration as done:
+        return done.value
+
+
+def _horse_race_setup(horses: List[dict], map_key: str, seed: int | None):
+    """Seeded RNG, map profile, compiled track and initial states; every engine starts from these."""
+    rng = random.Random(seed)
+    profile = HORSE_MAPS.get(map_key, HORSE_MAPS["oval"])
+    track = get_horse_track(map_key)
+
+    def condition_factor(stability: int) -> float:
+        R_eff = eff_exp(stability / 100, K_R)
+        sigma = SIGMA_MIN + (SIGMA_MAX - SIGMA_MIN) * (1 - R_eff)
+        z = rng.normalvariate(0, sigma)
+        return math.exp(z)
+
+    traits = []
+    for h in horses:
+        heat_resist = 0.9 + 0.3 * rng.random()  # [0.9,1.2]
+        recover_rate = 0.85 + 0.25 * rng.random()  # [0.85,1.1]
+        luck = 0.8 + 0.4 * rng.random()  # [0.8,1.2]
+        tactic_roll = rng.random()
+        if tactic_roll < 0.33:
+            tactic = HORSE_TACTIC_FRONT
+        elif tactic_roll < 0.66:
+            tactic = HORSE_TACTIC_STALKER
+        else:
+            tactic = HORSE_TACTIC_CLOSER
+        traits.append((heat_resist, recover_rate, luck, tactic, h.get("stats", {})))
+
+    states = []
+    for idx, (h, trait) in enumerate(zip(horses, traits)):
+        heat_resist, recover_rate, luck, tactic, stats = trait
+        F = condition_factor(stats.get("stability", HORSE_MIN_STAT))
+        states.append(_HorseState(idx, h["id"], HorseParams(stats, heat_resist, recover_rate, luck, tactic, F)))
+    return rng, profile, track, states
+
+
+def _horse_race_result(states: list, t: float, timeline: list, events: list, profile: dict):
+    # ensure all finish times are finite
+    for st in states:
+        if not math.isfinite(st.finish_time):
+            st.finish_time = t
+
+    winner_idx = min(range(len(states)), key=lambda i: (states[i].finish_time, states[i].idx))
+    winner_id = states[winner_idx].horse_id
+    finish_times = {s.horse_id: s.finish_time for s in states}
+
+    sim_detail = {
+        "timeline": timeline,
+        "finish_times": finish_times,
+        "laps": HORSE_LAPS,
+        "track_length": HORSE_TRACK_LENGTH,
+        "conditions": {s.horse_id: s.params.condition for s in states},
+    }
+
+    return winner_id, events, profile, sim_detail
+
+
+def _horse_race_steps(horses: List[dict], map_key: str, seed: int | None, record: bool, chunk: int):
+    rng, profile, track, states = _horse_race_setup(horses, map_key, seed)
+    dt = HORSE_DT
+    ordered = sorted(states, key=lambda s: (-s.pos, s.horse_id))
+    timeline = []
+    next_sample = 0.0
+    t = 0.0
+    events_flat = []
+    spans = _HorseEventSpans(events_flat) if record else None
+
+    while t < HORSE_MAX_TICKS * dt:
+        if all(st.finished for st in states):
+            break
+        _horse_tick(states, ordered, track, rng, t, spans)
+
+        t += dt
+        if record and t >= next_sample:
+            timeline.append(
+                {
+                    "t": round(t, 3),
+                    "positions": [s.pos for s in states],
+                    "speeds": [s.v for s in states],
+                    "energy": [s.E for s in states],
+                    "heat": [s.H for s in states],
+                }
+            )
+            next_sample += HORSE_TIMELINE_INTERVAL
+            if chunk and len(timeline) >= chunk:
+                yield timeline, spans.drain()
+                timeline = []
+
+    if chunk:
+        yield timeline, spans.drain(final=True)
+        timeline = []
+
+    return _horse_race_result(states, t, timeline, events_flat, profile)
+
+
+def _horse_tick(states: list, ordered: list, track: HorseTrack, rng, t: float, spans: "_HorseEventSpans | None"):
+    """
+    Advance every unfinished horse by one tick, in index order, drawing from ``rng``.
+
+    ``ordered`` is last tick's front-to-back order and is updated in place. Events are
+    recorded into ``spans`` (and its event list) unless it is None.
+    """
+    record = spans is not None
+    events_flat = spans.events if record else None
+    track_at = track.at
+    finish_distance = HORSE_TRACK_LENGTH * HORSE_LAPS
+    Vref = PHYS_VREF
+    gamma = PHYS_GAMMA
+    gamma2 = PHYS_GAMMA2
+    e1 = PHYS_E1
+    D0 = PHYS_D0
+    D1 = PHYS_D1
+    Bc = PHYS_BC
+    eps = PHYS_EPS
+    H0 = PHYS_H0
+    Hdecay = PHYS_HDECAY
+    dt = HORSE_DT
+    inf = math.inf
+    p_contact = HORSE_P_CONTACT
+    n = len(states)
+
+    def push_event(kind: str, st, magnitude: float, note: str):
+        if not record:
+            return
+        events_flat.append(
+            {
+                "t": round(t, 3),
+                "horse_id": st.horse_id,
+                "kind": kind,
+                "mag": magnitude,
+                "note": note,
+            }
+        )
+
+    wind = rng.normalvariate(track.wind_mean, track.wind_sigma)
+    wind_factor = max(0.2, 1 + wind)
+
+    # Front-to-back order (ties by id) for slipstream/contact. Positions change little
+    # per tick, so one insertion pass over last tick's order restores it in ~O(n).
+    for k in range(1, n):
+        st = ordered[k]
+        j = k - 1
+        while j >= 0 and (
+            ordered[j].pos < st.pos or (ordered[j].pos == st.pos and ordered[j].horse_id > st.horse_id)
+        ):
+            ordered[j + 1] = ordered[j]
+            j -= 1
+        ordered[j + 1] = st
+    start_neg = []
+    for rank, st in enumerate(ordered):
+        st.rank = rank + 1
+        start_neg.append(-st.pos)
+    moved_max = 0.0  # largest distance covered so far this tick
+    t_evt = round(t, 3)
+
+    for st in states:
+        if st.finished:
+            continue
+        p = st.params
+        pos = st.pos
+        v = st.v
+        H = st.H
+        E = st.E
+        total_frac = pos / finish_distance
+        in_cor, kappa, slope = track_at((pos % HORSE_TRACK_LENGTH) / HORSE_TRACK_LENGTH)
+
+        # Target speed (profiling only)
+        if p.tactic == HORSE_TACTIC_FRONT:
+            target_v = p.Vcap_base * 0.90
+            if total_frac > 0.65:
+                target_v *= 0.92
+        elif p.tactic == HORSE_TACTIC_STALKER:
+            target_v = p.Vcap_base * 0.85
+            if total_frac > 0.50:
+                target_v *= 1.05
+        else:  # closer
+            target_v = p.Vcap_base * (0.75 + 0.15 * total_frac)
+
+        # Speed cap & saturation (conditional expressions instead of max/min: same values, no call)
+        sat = 1 - (v / p.Vcap_safe) ** p.eta
+        sat = sat if sat > 0.0 else 0.0
+
+        # Power
+        P = p.PmaxF * (0.35 + 0.65 * E)
+        power_push = P * sat
+
+        # Drag
+        drag = (D0 * (v ** 2) + D1 * (v ** 3)) * wind_factor
+
+        # Slipstream: the first horse in start-of-tick order that is 0-20m ahead right now.
+        # Horses starting 20m+ ahead are skipped by bisection; the walk stops once even the
+        # largest move this tick cannot bring a horse past us (margins absorb rounding).
+        lead = None
+        k = bisect_right(start_neg, -(pos + 20 + 1e-6))
+        while k < n and moved_max + 1e-6 - start_neg[k] >= pos:
+            s_pos = ordered[k].pos
+            if s_pos > pos and (s_pos - pos) < 20:
+                lead = ordered[k]
+                break
+            k += 1
+        if lead:
+            drag *= 0.9
+            H += 0.01
+        # Continuous states go through spans only on enter/leave; the open event is
+        # extended in place on the ticks in between.
+        if record:
+            ev = st.slip_span
+            if lead is None:
+                if ev is not None:
+                    st.slip_span = spans.mark(t_evt, st.idx, st.horse_id, "SLIP", False, 0.0, "")
+            elif ev is None:
+                st.slip_span = spans.mark(t_evt, st.idx, st.horse_id, "SLIP", True, 0.1, "슬립스트림")
+            else:
+                ev["t_end"] = t_evt
+
+        # Slope
+        drag += 9.8 * slope * v / Vref
+
+        # Events (Poisson)
+        p_stumble = p.p_stumble_again if st.prev_event == "STUMBLE" else p.p_stumble
+        if rng.random() < p_stumble:
+            mag = rng.uniform(0.08, 0.18)
+            power_push *= (1 - mag)
+            v *= (1 - 0.5 * mag)
+            st.prev_event = "STUMBLE"
+            push_event("STUMBLE", st, mag, "stumble")
+        else:
+            st.prev_event = None
+
+        if rng.random() < p.p_boost:
+            mag = rng.uniform(0.04, 0.12)
+            power_push *= (1 + mag)
+            st.prev_event = "BOOST"
+            push_event("BOOST", st, mag, "boost")
+
+        if lead and (lead.pos - pos) < 6:
+            if rng.random() < p_contact:
+                hit = rng.uniform(0.05, 0.15)
+                v *= (1 - hit)
+                st.prev_event = "CONTACT"
+                push_event("CONTACT", st, hit, "contact")
+
+        # Corner braking
+        a_lat_eff = p.a_lat_max / (1 + H)
+        v_corner_max = math.sqrt(a_lat_eff / max(kappa, eps)) if kappa > 0 else inf
+        corner_brake = Bc * (v - v_corner_max) ** 2 if v > v_corner_max else 0.0
+
+        # Corner miss penalty
+        if in_cor and v_corner_max < inf and v_corner_max > 0:
+            excess = (v - v_corner_max) / v_corner_max
+            if excess > 0.25:
+                H += 0.15 * excess
+                v *= (1 - 0.08 * excess)
+                push_event("CORNER_MISS", st, excess, "corner miss")
+
+        # Energy/heat drain
+        ratio = v / Vref
+        if in_cor:
+            dE = (p.e0_load * (ratio ** gamma) + e1 * (ratio ** gamma2) * p.e1_coef) * dt
+            dH = H0 * (ratio ** 2) * p.dH_c1 * p.dH_c2 * dt
+        else:
+            dE = p.e0_load * (ratio ** gamma) * dt
+            dH = 0.0
+
+        # Overheat cap
+        if H > p.heat_cap:
+            power_push *= 0.75
+            if record:
+                ev = st.heat_span
+                if ev is None:
+                    st.heat_span = spans.mark(t_evt, st.idx, st.horse_id, "HEATCAP", True, H, "heat cap")
+                else:
+                    ev["t_end"] = t_evt
+                    if H > ev["mag"]:
+                        ev["mag"] = H
+        elif record and st.heat_span is not None:
+            st.heat_span = spans.mark(t_evt, st.idx, st.horse_id, "HEATCAP", False, 0.0, "")
+
+        # Overdrive (the smoothstep window is exactly 0 before 70% of the race)
+        if total_frac > 0.7:
+            w_od = smoothstep(0.7, 0.9, total_frac)
+            h_ratio = H / (H + OD_H_HALF)
+            spurt_gate = max(0.35, min(1.0, 0.7 + 0.3 * E - 0.2 * h_ratio))
+            iod = w_od * p.iod_stat * smoothstep(0.12, 0.3, E) * p.iod_acc * spurt_gate
+            eta_eff = max(OD_ETA_MIN, p.eta * (1 - OD_PHI * iod))
+        else:
+            iod = 0.0
+            eta_eff = p.eta_od0
+        sat_eff = 1 - (v / p.Vcap_safe) ** eta_eff
+        sat_eff = sat_eff if sat_eff > 0.0 else 0.0
+        # Preserve prior modifiers (events/heat cap) by scaling current push
+        if sat > 1e-6:
+            power_push *= (sat_eff / sat)
+        else:
+            power_push = P * sat_eff
+        power_push *= (1 + OD_ALPHA * iod)
+        dE += OD_LAMBDA * iod * ratio ** OD_RHO * dt
+        dH *= (1 + OD_MU * iod)
+
+        # Recovery when slow
+        if v < target_v * 0.6:
+            dE *= p.recover_mul
+            dH *= p.recover_mul
+
+        E -= dE
+        st.E = (E if E < 1.0 else 1.0) if E > 0.0 else 0.0
+        H = H + dH - Hdecay * H * dt * p.heat_resist
+        st.H = H if H > 0.0 else 0.0
+
+        # Acceleration
+        a_val = power_push - drag - corner_brake
+        v = v + a_val * dt
+        v = v if v > 0.0 else 0.0
+        st.v = v
+        start_pos = pos
+        pos += v * dt
+        if pos >= finish_distance:
+            pos = finish_distance
+            st.finished = True
+            st.finish_time = t
+        st.pos = pos
+        if pos - start_pos > moved_max:
+            moved_max = pos - start_pos
+
+
+class _UniformStream:
+    """
+    Stand-in for a race's ``random.Random`` that reads the same MT19937 stream in NumPy blocks.
+
+    NumPy's legacy generator builds doubles exactly like ``random.random()``, so once the state
+    is copied every draw equals the scalar engine's; ``uniform`` and ``normalvariate`` repeat
+    CPython's formulas on top. ``mark`` reserves room for a tick and ``rewind`` returns to it.
+    """
+
+    __slots__ = ("_mt", "buf", "i", "_mark")
+
+    def __init__(self, rng: random.Random, block: int = 4096):
+        _, internal, _ = rng.getstate()
+        self._mt = np.random.RandomState()
+        self._mt.set_state(("MT19937", np.array(internal[:-1], dtype=np.uint32), internal[-1]))
+        self.buf = self._mt.random_sample(block)
+        self.i = 0
+        self._mark = 0
+
+    def _reserve(self, k: int) -> None:
+        if len(self.buf) - self.i < k:
+            keep = self.buf[self._mark:]
+            self.buf = np.concatenate((keep, self._mt.random_sample(max(len(self.buf), k))))
+            self.i -= self._mark
+            self._mark = 0
+
+    def mark(self, reserve: int) -> None:
+        self._mark = self.i
+        self._reserve(reserve)
+        self._mark = self.i
+
+    def rewind(self) -> None:
+        self.i = self._mark
+
+    def take(self, k: int) -> np.ndarray:
+        self._reserve(k)
+        out = self.buf[self.i:self.i + k]
+        self.i += k
+        return out
+
+    def random(self) -> float:
+        self._reserve(1)
+        u = float(self.buf[self.i])
+        self.i += 1
+        return u
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+    def normalvariate(self, mu: float = 0.0, sigma: float = 1.0) -> float:
+        while True:
+            u1 = self.random()
+            u2 = 1.0 - self.random()
+            z = NV_MAGICCONST * (u1 - 0.5) / u2
+            zz = z * z / 4.0
+            if zz <= -math.log(u2):
+                break
+        return mu + z * sigma
+
+
+def _smoothstep_np(edge0: float, edge1: float, t: np.ndarray) -> np.ndarray:
+    u = np.minimum(1.0, np.maximum(0.0, (t - edge0) / (edge1 - edge0)))
+    return u * u * (3 - 2 * u)
+
+
+def _horse_leads(gap: np.ndarray, pos: np.ndarray, order: np.ndarray, rank: np.ndarray, seen: np.ndarray | None = None):
+    """
+    Slipstream lead of every horse: the first horse in start-of-tick order (``order``/``rank``)
+    that is 0-20m ahead. ``gap[i, j]`` is how far ahead horse ``i`` sees horse ``j`` on its turn
+    (``seen`` holds those positions). Returns (has_lead, lead index, lead position as seen).
+    """
+    n = len(pos)
+    first = np.where((gap > 0) & (gap < 20), rank, n).min(axis=1)
+    has = first < n
+    lead = order[np.minimum(first, n - 1)]
+    return has, lead, (seen[np.arange(n), lead] if seen is not None else None)
+
+
+def _pow(base: np.ndarray, exp) -> np.ndarray:
+    """
+    Elementwise ``base ** exp`` through the C library's pow, as the scalar engine computes it.
+    NumPy's SIMD power differs from it in the last bit for a few percent of inputs, which would
+    break seed-for-seed parity.
+    """
+    if isinstance(exp, np.ndarray):
+        return np.array([b ** e for b, e in zip(base.tolist(), exp.tolist())])
+    return np.array([b ** exp for b in base.tolist()])
+
+
+def _horse_race_steps_np(horses: List[dict], map_key: str, seed: int | None, record: bool, chunk: int):
+    """
+    The ``numpy`` engine: every horse's state lives in arrays and one tick is one pass of array
+    operations; results are bit-for-bit those of ``_horse_race_steps``.
+
+    The scalar loop is sequential inside a tick: a horse sees the new positions of horses before
+    it in index order, and draws extra random numbers only when an event fires. A tick is
+    therefore computed speculatively (leads from start-of-tick positions, no events) and then
+    checked: if any lead changes under the in-tick positions, or a stumble/boost/contact draw
+    fires, the tick is rewound and replayed by ``_horse_tick`` on the same draws.
+    """
+    rng, profile, track, states = _horse_race_setup(horses, map_key, seed)
+    stream = _UniformStream(rng)
+    n = len(states)
+    params = [st.params for st in states]
+
+    def column(name: str) -> np.ndarray:
+        return np.array([getattr(p, name) for p in params], dtype=np.float64)
+
+    Vcap_base, Vcap_safe, eta, eta_od0 = column("Vcap_base"), column("Vcap_safe"), column("eta"), column("eta_od0")
+    PmaxF, a_lat_max, e0_load, e1_coef = column("PmaxF"), column("a_lat_max"), column("e0_load"), column("e1_coef")
+    dH_c1, dH_c2, heat_cap = column("dH_c1"), column("dH_c2"), column("heat_cap")
+    iod_stat, iod_acc, recover_mul, heat_resist = (
+        column("iod_stat"), column("iod_acc"), column("recover_mul"), column("heat_resist"),
+    )
+    p_stumble, p_stumble_again, p_boost = column("p_stumble"), column("p_stumble_again"), column("p_boost")
+    tactic = np.array([p.tactic for p in params])
+    front = tactic == HORSE_TACTIC_FRONT
+    stalker = tactic == HORSE_TACTIC_STALKER
+    front_v = Vcap_base * 0.90
+    front_late_v = front_v * 0.92
+    stalker_v = Vcap_base * 0.85
+    stalker_late_v = stalker_v * 1.05
+    id_rank = np.argsort(np.argsort([st.horse_id for st in states], kind="stable"))
+    before = np.tri(n, k=-1, dtype=bool)  # before[i, j]: j moves before i within a tick
+    finish_distance = HORSE_TRACK_LENGTH * HORSE_LAPS
+    dt = HORSE_DT
+
+    pos = np.zeros(n)
+    v = np.zeros(n)
+    E = np.ones(n)
+    H = np.zeros(n)
+    finished = np.zeros(n, dtype=bool)
+    finish_time = np.full(n, math.inf)
+    prev_stumble = np.zeros(n, dtype=bool)
+
+    timeline = []
+    next_sample = 0.0
+    t = 0.0
+    events_flat = []
+    spans = _HorseEventSpans(events_flat) if record else None
+
+    while t < HORSE_MAX_TICKS * dt:
+        if finished.all():
+            break
+        active = ~finished
+        stream.mark(8 * n + 64)
+        wind = stream.normalvariate(track.wind_mean, track.wind_sigma)
+        wind_factor = max(0.2, 1 + wind)
+        order = np.lexsort((id_rank, -pos))
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n)
+
+        total_frac = pos / finish_distance
+        in_cor, kappa, slope = track.lookup((pos % HORSE_TRACK_LENGTH) / HORSE_TRACK_LENGTH)
+        target_v = np.where(
+            front,
+            np.where(total_frac > 0.65, front_late_v, front_v),
+            np.where(stalker, np.where(total_frac > 0.50, stalker_late_v, stalker_v), Vcap_base * (0.75 + 0.15 * total_frac)),
+        )
+        sat = 1 - _pow(v / Vcap_safe, eta)
+        sat = np.where(sat > 0.0, sat, 0.0)
+        P = PmaxF * (0.35 + 0.65 * E)
+        power_push = P * sat
+        drag = (PHYS_D0 * _pow(v, 2) + PHYS_D1 * _pow(v, 3)) * wind_factor
+        has_lead, lead, _ = _horse_leads(pos[None, :] - pos[:, None], pos, order, rank)
+        drag = np.where(has_lead, drag * 0.9, drag)
+        H_tick = np.where(has_lead, H + 0.01, H)
+        drag = drag + 9.8 * slope * v / PHYS_VREF
+
+        a_lat_eff = a_lat_max / (1 + H_tick)
+        curved = kappa > 0
+        v_corner_max = np.where(curved, np.sqrt(a_lat_eff / np.maximum(kappa, PHYS_EPS)), 1.0)
+        braking = curved & (v > v_corner_max)
+        corner_brake = np.where(braking, PHYS_BC * _pow(v - v_corner_max, 2), 0.0)
+        excess = (v - v_corner_max) / v_corner_max
+        miss = in_cor & curved & (v_corner_max > 0) & (excess > 0.25)
+        if miss.any():
+            H_tick = np.where(miss, H_tick + 0.15 * excess, H_tick)
+            v_tick = np.where(miss, v * (1 - 0.08 * excess), v)
+        else:
+            v_tick = v
+
+        ratio = v_tick / PHYS_VREF
+        load = e0_load * _pow(ratio, PHYS_GAMMA)
+        if in_cor.any():
+            dE = np.where(in_cor, (load + PHYS_E1 * _pow(ratio, PHYS_GAMMA2) * e1_coef) * dt, load * dt)
+            dH = np.where(in_cor, PHYS_H0 * _pow(ratio, 2) * dH_c1 * dH_c2 * dt, 0.0)
+        else:
+            dE = load * dt
+            dH = np.zeros(n)
+        heat_on = H_tick > heat_cap
+        power_push = np.where(heat_on, power_push * 0.75, power_push)
+
+        late = active & (total_frac > 0.7)
+        if late.any():
+            h_ratio = H_tick / (H_tick + OD_H_HALF)
+            spurt_gate = np.maximum(0.35, np.minimum(1.0, 0.7 + 0.3 * E - 0.2 * h_ratio))
+            iod = _smoothstep_np(0.7, 0.9, total_frac) * iod_stat * _smoothstep_np(0.12, 0.3, E) * iod_acc * spurt_gate
+            iod = np.where(late, iod, 0.0)
+            eta_eff = np.where(late, np.maximum(OD_ETA_MIN, eta * (1 - OD_PHI * iod)), eta_od0)
+        else:
+            iod = np.zeros(n)
+            eta_eff = eta_od0
+        sat_eff = 1 - _pow(v_tick / Vcap_safe, eta_eff)
+        sat_eff = np.where(sat_eff > 0.0, sat_eff, 0.0)
+        power_push = np.where(sat > 1e-6, power_push * (sat_eff / np.where(sat > 1e-6, sat, 1.0)), P * sat_eff)
+        if late.any():
+            power_push = power_push * (1 + OD_ALPHA * iod)
+            dE = dE + OD_LAMBDA * iod * _pow(ratio, OD_RHO) * dt
+            dH = dH * (1 + OD_MU * iod)
+        slow = v_tick < target_v * 0.6
+        dE = np.where(slow, dE * recover_mul, dE)
+        dH = np.where(slow, dH * recover_mul, dH)
+
+        E_new = E - dE
+        E_new = np.where(E_new > 0.0, np.where(E_new < 1.0, E_new, 1.0), 0.0)
+        H_new = H_tick + dH - PHYS_HDECAY * H_tick * dt * heat_resist
+        H_new = np.where(H_new > 0.0, H_new, 0.0)
+        v_new = v_tick + (power_push - drag - corner_brake) * dt
+        v_new = np.where(v_new > 0.0, v_new, 0.0)
+        pos_new = pos + v_new * dt
+        done = active & (pos_new >= finish_distance)
+        pos_new = np.where(done, finish_distance, pos_new)
+        pos_new = np.where(active, pos_new, pos)
+
+        # Check the speculation: leads as each horse sees the field on its turn, then the draws.
+        seen = np.where(before, pos_new, pos)
+        seen_has, seen_lead, seen_lead_pos = _horse_leads(seen - pos[:, None], pos, order, rank, seen)
+        exact = not (
+            (seen_has != has_lead)[active].any() or ((seen_lead != lead) & has_lead)[active].any()
+        )
+        if exact:
+            contact = active & seen_has & (seen_lead_pos - pos < 6)
+            draws = np.where(active, 2 + contact, 0)
+            offsets = (np.cumsum(draws) - draws)[active]
+            u = stream.take(int(draws.sum()))
+            exact = not (
+                (u[offsets] < np.where(prev_stumble, p_stumble_again, p_stumble)[active]).any()
+                or (u[offsets + 1] < p_boost[active]).any()
+                or (u[offsets[contact[active]] + 2] < HORSE_P_CONTACT).any()
+            )
+
+        if exact:
+            if record:
+                t_evt = round(t, 3)
+                flags = zip(
+                    np.flatnonzero(active).tolist(), has_lead[active].tolist(), miss[active].tolist(),
+                    excess[active].tolist(), heat_on[active].tolist(), H_tick[active].tolist(),
+                )
+                for i, slip, corner_miss, exc, heat, h_val in flags:
+                    st = states[i]
+                    ev = st.slip_span
+                    if not slip:
+                        if ev is not None:
+                            st.slip_span = spans.mark(t_evt, i, st.horse_id, "SLIP", False, 0.0, "")
+                    elif ev is None:
+                        st.slip_span = spans.mark(t_evt, i, st.horse_id, "SLIP", True, 0.1, "슬립스트림")
+                    else:
+                        ev["t_end"] = t_evt
+                    if corner_miss:
+                        events_flat.append(
+                            {"t": t_evt, "horse_id": st.horse_id, "kind": "CORNER_MISS", "mag": exc, "note": "corner miss"}
+                        )
+                    ev = st.heat_span
+                    if heat:
+                        if ev is None:
+                            st.heat_span = spans.mark(t_evt, i, st.horse_id, "HEATCAP", True, h_val, "heat cap")
+                        else:
+                            ev["t_end"] = t_evt
+                            if h_val > ev["mag"]:
+                                ev["mag"] = h_val
+                    elif ev is not None:
+                        st.heat_span = spans.mark(t_evt, i, st.horse_id, "HEATCAP", False, 0.0, "")
+            pos = pos_new
+            v = np.where(active, v_new, v)
+            E = np.where(active, E_new, E)
+            H = np.where(active, H_new, H)
+            finish_time[done] = t
+            finished |= done
+            prev_stumble &= ~active
+        else:
+            stream.rewind()
+            values = zip(pos.tolist(), v.tolist(), E.tolist(), H.tolist(), finish_time.tolist(), prev_stumble.tolist())
+            for st, (st.pos, st.v, st.E, st.H, st.finish_time, stumbled) in zip(states, values):
+                st.finished = st.pos >= finish_distance
+                st.prev_event = "STUMBLE" if stumbled else None
+            _horse_tick(states, [states[k] for k in order.tolist()], track, stream, t, spans)
+            pos = np.array([st.pos for st in states])
+            v = np.array([st.v for st in states])
+            E = np.array([st.E for st in states])
+            H = np.array([st.H for st in states])
+            prev_stumble = np.array([st.prev_event == "STUMBLE" for st in states])
+            finish_time = np.array([st.finish_time for st in states])
+            finished = np.array([st.finished for st in states])
+
+        t += dt
+        if record and t >= next_sample:
+            timeline.append(
+                {
+                    "t": round(t, 3),
+                    "positions": pos.tolist(),
+                    "speeds": v.tolist(),
+                    "energy": E.tolist(),
+                    "heat": H.tolist(),
+                }
+            )
+            next_sample += HORSE_TIMELINE_INTERVAL
+            if chunk and len(timeline) >= chunk:
+                yield timeline, spans.drain()
+                timeline = []
+
+    if chunk:
+        yield timeline, spans.drain(final=True)
+        timeline = []
+
+    for st, values in zip(states, zip(pos.tolist(), v.tolist(), E.tolist(), H.tolist(), finish_time.tolist())):
+        st.pos, st.v, st.E, st.H, st.finish_time = values
+    return _horse_race_result(states, t, timeline, events_flat, profile)
+
+
+_HORSE_ENGINE_STEPS = {"python": _horse_race_steps, "numpy": _horse_race_steps_np}
+
+
+@lru_cache(maxsize=HORSE_REPLAY_CACHE_SIZE)
+def _replay_horse_race_cached(horses_key: str, map_key: str, seed: int, engine: str) -> tuple:
+    return run_horse_race(json.loads(horses_key), map_key, seed, engine)
+
+
+def replay_horse_race(
+    horses: List[dict], map_key: str, seed: int, engine: str | None = None
+) -> tuple[str, list, dict, dict]:
+    """
+    Regenerate a full race (timeline + events) from its stored inputs, behind an LRU cache.
+
+    Only id and stats of each horse feed the simulation, so the cache key ignores other
+    fields. The returned objects are shared with the cache and must not be mutated.
+    """
+    key = json.dumps(
+        [{"id": h["id"], "stats": h.get("stats") or {}} for h in horses], sort_keys=True
+    )
+    return _replay_horse_race_cached(key, map_key, int(seed), engine or HORSE_ENGINE)
+
+
+def encode_horse_timeline(timeline: List[dict]) -> dict:
+    """
+    Pack a timeline into quantized, delta-coded little-endian integer arrays (base64).
+
+    Each field is rounded to HORSE_TIMELINE_SCALES fixed point; the first sample is kept
+    as ``base`` and later ones are differenced sample to sample (per horse), and each field
+    is stored in the narrowest of int8/int16/int32 that holds all its deltas. Values are
+    quantized before differencing, so decoding never accumulates error beyond one quantum.
+    """
+    n = len(timeline[0]["positions"]) if timeline else 0
+    fields = {}
+    for name, scale in HORSE_TIMELINE_SCALES.items():
+        if name == "t":
+            values = np.array([row["t"] for row in timeline], dtype=np.float64).reshape(len(timeline), 1)
+        else:
+            values = np.array([row[name] for row in timeline], dtype=np.float64).reshape(len(timeline), n)
+        fixed = np.rint(values * scale).astype(np.int64)
+        deltas = np.diff(fixed, axis=0)
+        low, high = (int(deltas.min()), int(deltas.max())) if deltas.size else (0, 0)
+        width = next(w for w in (1, 2, 4) if -(1 << (8 * w - 1)) <= low and high < (1 << (8 * w - 1)))
+        fields[name] = {
+            "scale": scale,
+            "dtype": f"i{width}",
+            "base": fixed[0].tolist() if len(fixed) else [],
+            "data": base64.b64encode(deltas.astype(f"<i{width}").tobytes()).decode("ascii"),
+        }
+    return {"encoding": HORSE_TIMELINE_ENCODING, "samples": len(timeline), "horses": n, "fields": fields}
+
+
+def decode_horse_timeline(encoded: dict) -> List[dict]:
+    """Inverse of encode_horse_timeline (values come back rounded to the field scale)."""
+    if encoded.get("encoding") != HORSE_TIMELINE_ENCODING:
+        raise ValueError(f"unknown timeline encoding: {encoded.get('encoding')}")
+    m = encoded["samples"]
+    n = encoded["horses"]
+    columns = {}
+    for name, field in encoded["fields"].items():
+        if not m:
+            columns[name] = []
+            continue
+        deltas = np.frombuffer(base64.b64decode(field["data"]), dtype=f"<{field['dtype']}").astype(np.int64)
+        width = 1 if name == "t" else n
+        fixed = np.vstack([np.array(field["base"], dtype=np.int64).reshape(1, width), deltas.reshape(m - 1, width)])
+        columns[name] = (np.cumsum(fixed, axis=0) / field["scale"]).tolist()
+    return [
+        {
+            "t": columns["t"][i][0],
+            "positions": columns["positions"][i],
+            "speeds": columns["speeds"][i],
+            "energy": columns["energy"][i],
+            "heat": columns["heat"][i],
+        }
+        for i in range(m)
+    ]
+
+
+class _UniformStreams:
+    """
+    One ``_UniformStream`` per race, side by side: row ``r`` continues ``rngs[r]`` draw for draw.
+
+    ``take(rows)`` hands out the next number of each listed row; ``reserve`` refills rows whose
+    buffer runs low, so a tick never has to stop for more numbers.
+    """
+
+    __slots__ = ("_mts", "buf", "i")
+
+    def __init__(self, rngs: List[random.Random], block: int = 1024):
+        self._mts = []
+        for rng in rngs:
+            _, internal, _ = rng.getstate()
+            mt = np.random.RandomState()
+            mt.set_state(("MT19937", np.array(internal[:-1], dtype=np.uint32), internal[-1]))
+            self._mts.append(mt)
+        self.buf = np.array([mt.random_sample(block) for mt in self._mts]).reshape(len(rngs), block)
+        self.i = np.zeros(len(rngs), dtype=np.int64)
+
+    def reserve(self, k: int) -> None:
+        block = self.buf.shape[1]
+        for r in np.flatnonzero(self.i > block - k).tolist():
+            rest = self.buf[r, self.i[r]:]
+            self.buf[r] = np.concatenate((rest, self._mts[r].random_sample(block - len(rest))))
+            self.i[r] = 0
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        out = self.buf[rows, self.i[rows]]
+        self.i[rows] += 1
+        return out
+
+    def keep(self, rows: np.ndarray) -> None:
+        self._mts = [self._mts[r] for r in rows.tolist()]
+        self.buf = self.buf[rows]
+        self.i = self.i[rows]
+
+    def normalvariate(self, mu: float, sigma: float) -> np.ndarray:
+        z = np.empty(len(self.i))
+        pending = np.arange(len(self.i))
+        while len(pending):
+            u1 = self.take(pending)
+            u2 = 1.0 - self.take(pending)
+            zt = NV_MAGICCONST * (u1 - 0.5) / u2
+            ok = zt * zt / 4.0 <= -np.log(u2)
+            z[pending[ok]] = zt[ok]
+            pending = pending[~ok]
+        return mu + z * sigma
+
+
+def simulate_horse_batch(horses: List[dict], map_key: str, seeds: List[int]) -> np.ndarray:
+    """
+    Monte Carlo twin of run_horse_race: one settlement race per seed, all in one batch.
+
+    Every race starts from ``_horse_race_setup`` and reads its own MT19937 stream in the
+    scalar engine's draw order; within a tick the horses advance one column at a time in
+    index order, every race in the same array step. Race ``k`` is therefore
+    ``run_horse_race(horses, map_key, seeds[k], record=False)`` except where NumPy's
+    vectorized pow rounds the last bit differently from libm (the golden bench checks how
+    often that changes an outcome). Returns finish times, shape (len(seeds), horses).
+    """
+    n = len(horses)
+    setups = [_horse_race_setup(horses, map_key, seed) for seed in seeds]
+    track = get_horse_track(map_key)
+    streams = _UniformStreams([rng for rng, _, _, _ in setups])
+    params = [[st.params for st in states] for _, _, _, states in setups]
+    finish_distance = HORSE_TRACK_LENGTH * HORSE_LAPS
+    dt = HORSE_DT
+    shape = (len(seeds), n)
+
+    def column(name: str) -> np.ndarray:
+        return np.array([[getattr(p, name) for p in row] for row in params], dtype=np.float64).reshape(shape)
+
+    per_race = {
+        name: column(name)
+        for name in (
+            "Vcap_base", "Vcap_safe", "eta", "eta_od0", "PmaxF", "a_lat_max", "e0_load", "e1_coef", "dH_c1",
+            "dH_c2", "heat_cap", "iod_stat", "iod_acc", "recover_mul", "heat_resist", "p_stumble",
+            "p_stumble_again", "p_boost", "tactic",
+        )
+    }
+    id_keys = np.broadcast_to(np.argsort(np.argsort([h["id"] for h in horses], kind="stable")), shape)
+    race_ids = np.arange(len(seeds))
+    pos = np.zeros(shape)
+    v = np.zeros(shape)
+    E = np.ones(shape)
+    H = np.zeros(shape)
+    active = np.ones(shape, dtype=bool)
+    prev_stumble = np.zeros(shape, dtype=bool)
+    finish_time = np.full(shape, np.nan)
+
+    t = 0.0
+    for _ in range(HORSE_MAX_TICKS):
+        running = active.any(axis=1)
+        if not running.any():
+            break
+        if 2 * np.count_nonzero(running) <= len(running):
+            # Most races are over: drop them so the stragglers do not carry the whole batch.
+            keep = np.flatnonzero(running)
+            race_ids, id_keys, pos, v, E, H, active, prev_stumble = (
+                a[keep] for a in (race_ids, id_keys, pos, v, E, H, active, prev_stumble)
+            )
+            per_race = {name: a[keep] for name, a in per_race.items()}
+            streams.keep(keep)
+        c = per_race
+        streams.reserve(8 * n + 64)
+        wind_factor = np.maximum(0.2, 1 + streams.normalvariate(track.wind_mean, track.wind_sigma))[:, None]
+        # Front-to-back order at the start of the tick, ties by id, as the scalar engine sorts.
+        order = np.lexsort((id_keys, -pos))
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.arange(n)[None, :], axis=1)
+
+        # Everything that depends only on a horse's own start-of-tick state, for all horses at once.
+        total_frac = pos / finish_distance
+        in_cor, kappa, slope = track.lookup((pos % HORSE_TRACK_LENGTH) / HORSE_TRACK_LENGTH)
+        target_v = np.where(
+            c["tactic"] == HORSE_TACTIC_FRONT,
+            np.where(total_frac > 0.65, c["Vcap_base"] * 0.90 * 0.92, c["Vcap_base"] * 0.90),
+            np.where(
+                c["tactic"] == HORSE_TACTIC_STALKER,
+                np.where(total_frac > 0.50, c["Vcap_base"] * 0.85 * 1.05, c["Vcap_base"] * 0.85),
+                c["Vcap_base"] * (0.75 + 0.15 * total_frac),
+            ),
+        )
+        sat = np.maximum(0.0, 1 - (v / c["Vcap_safe"]) ** c["eta"])
+        P = c["PmaxF"] * (0.35 + 0.65 * E)
+        drag = (PHYS_D0 * v ** 2 + PHYS_D1 * v ** 3) * wind_factor
+        climb = 9.8 * slope * v / PHYS_VREF
+
+        # Horses move in index order and see the new positions of the horses before them,
+        # so the slipstream lead of horse i is taken after horses 0..i-1 have moved.
+        for i in range(n):
+            rows = np.flatnonzero(active[:, i])
+            if not len(rows):
+                continue
+            # Plain slices (views, no gathers) while every race still runs this horse.
+            sel = slice(None) if len(rows) == len(race_ids) else rows
+            col = (sel, i)
+            gap = pos[sel] - pos[sel, i:i + 1]
+            first = np.where((gap > 0) & (gap < 20), rank[sel], n).min(axis=1)
+            has_lead = first < n
+            k = np.arange(len(rows))
+            lead_gap = gap[k, order[sel][k, np.minimum(first, n - 1)]]
+            vv = v[col].copy()
+            h = np.where(has_lead, H[col] + 0.01, H[col])
+            d = np.where(has_lead, drag[col] * 0.9, drag[col]) + climb[col]
+            power_push = P[col] * sat[col]
+
+            stumbled = streams.take(rows) < np.where(prev_stumble[col], c["p_stumble_again"][col], c["p_stumble"][col])
+            if stumbled.any():
+                mag = 0.08 + (0.18 - 0.08) * streams.take(rows[stumbled])
+                power_push[stumbled] *= 1 - mag
+                vv[stumbled] *= 1 - 0.5 * mag
+            boosted = streams.take(rows) < c["p_boost"][col]
+            if boosted.any():
+                power_push[boosted] *= 1 + (0.04 + (0.12 - 0.04) * streams.take(rows[boosted]))
+            near = np.flatnonzero(has_lead & (lead_gap < 6))
+            contacted = np.zeros(len(rows), dtype=bool)
+            if len(near):
+                contacted[near[streams.take(rows[near]) < HORSE_P_CONTACT]] = True
+                if contacted.any():
+                    vv[contacted] *= 1 - (0.05 + (0.15 - 0.05) * streams.take(rows[contacted]))
+            prev_stumble[col] = stumbled & ~boosted & ~contacted
+
+            cor = in_cor[col]
+            curved = kappa[col] > 0
+            v_corner_max = np.where(
+                curved, np.sqrt(c["a_lat_max"][col] / (1 + h) / np.maximum(kappa[col], PHYS_EPS)), np.inf
+            )
+            braking = vv > v_corner_max
+            corner_brake = np.where(braking, PHYS_BC * (vv - np.where(braking, v_corner_max, 0.0)) ** 2, 0.0)
+            excess = (vv - v_corner_max) / np.where(curved, v_corner_max, 1.0)
+            missed = cor & curved & (excess > 0.25)
+            if missed.any():
+                h = np.where(missed, h + 0.15 * excess, h)
+                vv = np.where(missed, vv * (1 - 0.08 * excess), vv)
+
+            ratio = vv / PHYS_VREF
+            load = c["e0_load"][col] * ratio ** PHYS_GAMMA
+            dE = np.where(cor, (load + PHYS_E1 * ratio ** PHYS_GAMMA2 * c["e1_coef"][col]) * dt, load * dt)
+            dH = np.where(cor, PHYS_H0 * ratio ** 2 * c["dH_c1"][col] * c["dH_c2"][col] * dt, 0.0)
+            power_push = np.where(h > c["heat_cap"][col], power_push * 0.75, power_push)
+
+            e = E[col]
+            late = total_frac[col] > 0.7
+            eta_eff = c["eta_od0"][col]
+            iod = np.zeros(len(rows))
+            if late.any():
+                w_od = np.clip((total_frac[col] - 0.7) / (0.9 - 0.7), 0.0, 1.0)
+                ue = np.clip((e - 0.12) / (0.3 - 0.12), 0.0, 1.0)
+                spurt_gate = np.clip(0.7 + 0.3 * e - 0.2 * (h / (h + OD_H_HALF)), 0.35, 1.0)
+                od = w_od * w_od * (3 - 2 * w_od) * c["iod_stat"][col] * (ue * ue * (3 - 2 * ue)) * c["iod_acc"][col]
+                iod = np.where(late, od * spurt_gate, 0.0)
+                eta_eff = np.where(late, np.maximum(OD_ETA_MIN, c["eta"][col] * (1 - OD_PHI * iod)), eta_eff)
+            sat_eff = np.maximum(0.0, 1 - (vv / c["Vcap_safe"][col]) ** eta_eff)
+            live_sat = sat[col] > 1e-6
+            power_push = np.where(
+                live_sat, power_push * (sat_eff / np.where(live_sat, sat[col], 1.0)), P[col] * sat_eff
+            )
+            power_push = power_push * (1 + OD_ALPHA * iod)
+            dE = dE + OD_LAMBDA * iod * ratio ** OD_RHO * dt
+            dH = dH * (1 + OD_MU * iod)
+            slow = vv < target_v[col] * 0.6
+            dE = np.where(slow, dE * c["recover_mul"][col], dE)
+            dH = np.where(slow, dH * c["recover_mul"][col], dH)
+
+            E[col] = np.clip(e - dE, 0.0, 1.0)
+            H[col] = np.maximum(0.0, h + dH - PHYS_HDECAY * h * dt * c["heat_resist"][col])
+            v_new = np.maximum(0.0, vv + (power_push - d - corner_brake) * dt)
+            v[col] = v_new
+            pos_new = pos[col] + v_new * dt
+            crossed = pos_new >= finish_distance
+            pos[col] = np.where(crossed, finish_distance, pos_new)
+            finish_time[race_ids[rows[crossed]], i] = t
+            active[rows[crossed], i] = False
+        t += dt
+
+    return np.where(np.isnan(finish_time), t, finish_time)
+
+
+def _simulate_horse_batch_chunk(args: tuple) -> np.ndarray:
+    return simulate_horse_batch(*args)
+
+
+def _get_odds_executor() -> ProcessPoolExecutor | None:
+    global _ODDS_EXECUTOR
+    if HORSE_ODDS_WORKERS <= 0:
+        return None
+    if _ODDS_EXECUTOR is None:
+        _ODDS_EXECUTOR = ProcessPoolExecutor(max_workers=HORSE_ODDS_WORKERS)
+    return _ODDS_EXECUTOR
+
+
+def shutdown_odds_executor() -> None:
+    global _ODDS_EXECUTOR
+    if _ODDS_EXECUTOR is not None:
+        _ODDS_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        _ODDS_EXECUTOR = None
+    with _PRICING_LOCK:
+        _PRICING_JOBS.clear()
+
+
+def price_horse_odds(stats: Dict[str, dict], sims: int, house_edge_percent: float = 0.0) -> Dict[str, float]:
+    """Decimal odds from win probabilities, with the house edge taken off the fair price."""
+    margin = max(0.0, 1 - house_edge_percent / 100.0)
+    odds = {}
+    for hid, row in stats.items():
+        # Unseen winners are priced as if they won once in sims + 1 races.
+        fair = margin / max(row["win"], 1 / (sims + 1))
+        odds[hid] = round(min(HORSE_ODDS_MAX, max(HORSE_ODDS_MIN, fair)), 2)
+    return odds
+
+
+def estimate_horse_odds(
+    horses: List[dict],
+    map_key: str = "oval",
+    sims: int = HORSE_ODDS_SIMS,
+    seed: int | None = None,
+    house_edge_percent: float = 0.0,
+    parallel: bool = True,
+) -> dict:
+    """
+    Win/place probabilities, finish-time distribution and fair odds for one horse pool.
+
+    The simulated races are settlement races for race seeds drawn from ``seed``, so the
+    estimate is reproducible whatever the worker count. With ``parallel`` the seeds are
+    split into one chunk per worker of the shared process pool. Place means finishing in
+    the top HORSE_PLACE_RANKS.
+    """
+    sims = max(1, int(sims))
+    seed_rng = random.Random(seed)
+    race_seeds = [seed_rng.getrandbits(32) for _ in range(sims)]
+    executor = _get_odds_executor() if parallel else None
+    chunks = min(sims, HORSE_ODDS_WORKERS) if executor else 1
+    jobs = [(horses, map_key, race_seeds[k::chunks]) for k in range(chunks)]
+    if executor:
+        parts = list(executor.map(_simulate_horse_batch_chunk, jobs))
+    else:
+        parts = [_simulate_horse_batch_chunk(job) for job in jobs]
+    finish = np.concatenate(parts, axis=0)
+
+    # Ties resolve to the lower index, like run_horse_race.
+    order = np.argsort(finish, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(len(horses))[None, :], axis=1)
+    stats = {}
+    for idx, h in enumerate(horses):
+        times = finish[:, idx]
+        p10, p50, p90 = np.percentile(times, [10, 50, 90]).tolist()
+        stats[h["id"]] = {
+            "win": float(np.mean(ranks[:, idx] == 0)),
+            "place": float(np.mean(ranks[:, idx] < HORSE_PLACE_RANKS)),
+            "finish_mean": float(times.mean()),
+            "finish_std": float(times.std()),
+            "finish_p10": p10,
+            "finish_p50": p50,
+            "finish_p90": p90,
+        }
+    return {"sims": sims, "horses": stats, "odds": price_horse_odds(stats, sims, house_edge_percent)}
+
+
+def price_horse_pool(seed: int, map_key: str = "oval", sims: int = HORSE_ODDS_SIMS) -> dict:
+    """Generate the pool for ``seed`` and estimate its odds in the calling process."""
+    horses = generate_horse_pool(seed)
+    estimate = estimate_horse_odds(horses, map_key, sims, seed, parallel=False)
+    return {"seed": seed, "map_type": map_key, "horses": horses, "sims": estimate["sims"], "stats": estimate["horses"]}
+
+
+def _collect_priced_pool(future: Future) -> None:
+    with _PRICING_LOCK:
+        if future not in _PRICING_JOBS:
+            return
+        _PRICING_JOBS.discard(future)
+        if not future.cancelled() and future.exception() is None:
+            _PRICED_POOLS.append(future.result())
+
+
+def refill_priced_pools(map_key: str = "oval") -> None:
+    """Keep HORSE_ODDS_BUFFER pools priced ahead of demand on the odds process pool."""
+    executor = _get_odds_executor()
+    if executor is None:
+        return
+    with _PRICING_LOCK:
+        missing = HORSE_ODDS_BUFFER - len(_PRICED_POOLS) - len(_PRICING_JOBS)
+        futures = []
+        for _ in range(max(0, missing)):
+            future = executor.submit(price_horse_pool, random.getrandbits(32), map_key, HORSE_ODDS_SIMS)
+            _PRICING_JOBS.add(future)
+            futures.append(future)
+    for future in futures:
+        future.add_done_callback(_collect_priced_pool)
+
+
+def take_priced_pool(map_key: str = "oval") -> dict | None:
+    """
+    Pop a pre-priced pool without waiting; None when the buffer is empty.
+
+    The returned dict carries seed, horses and per-horse stats. Odds are priced by the
+    caller with price_horse_odds so the current house edge applies.
+    """
+    entry = None
+    with _PRICING_LOCK:
+        for idx, pool in enumerate(_PRICED_POOLS):
+            if pool["map_type"] == map_key:
+                entry = pool
+                del _PRICED_POOLS[idx]
+                break
+    refill_priced_pools(map_key)
+    return entry
+
+
+def estimate_horse_win_probs(horses: List[dict], sims: int = 200, seed: int | None = None) -> List[float]:
+    stats = estimate_horse_odds(horses, "oval", sims, seed)["horses"]
+    return [stats[h["id"]]["win"] for h in horses]
+
+
+class HorseRaceQueueFull(RuntimeError):
+    """Raised by HorseRacePool.submit when the bounded queue has no free slot."""
+
+
+def _run_horse_race_job(horses: List[dict], map_key: str, seed: int, engine: str) -> tuple:
+    started = time.time()
+    result = run_horse_race(horses, map_key, seed, engine, record=False)
+    return result, started, time.time()
+
+
+def _percentiles_ms(samples: deque) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+    return {"p50": pick(0.5), "p95": pick(0.95), "max": round(ordered[-1] * 1000, 1)}
+
+
+class HorseRacePool:
+    """
+    Settlement races (record=False) on a dedicated process pool with a bounded queue.
+
+    At most ``workers + queue_size`` races are in flight; submit raises HorseRaceQueueFull
+    beyond that instead of letting the backlog grow. With ``workers=0`` races run on one
+    background thread (no extra processes). Queue wait and run times of recent races are
+    kept for stats().
+    """
+
+    def __init__(self, workers: int = HORSE_RACE_WORKERS, queue_size: int = HORSE_RACE_QUEUE):
+        self.workers = max(0, workers)
+        self.queue_size = max(0, queue_size)
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._waits: deque = deque(maxlen=256)
+        self._runs: deque = deque(maxlen=256)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.workers:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="horse-race")
+        return self._executor
+
+    def submit(self, horses: List[dict], map_key: str, seed: int, engine: str | None = None) -> Future:
+        with self._lock:
+            if self._in_flight >= max(1, self.workers) + self.queue_size:
+                self._rejected += 1
+                raise HorseRaceQueueFull("horse race queue is full")
+            self._in_flight += 1
+        submitted = time.time()
+        try:
+            inner = self._get_executor().submit(_run_horse_race_job, horses, map_key, seed, engine or HORSE_ENGINE)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        outer: Future = Future()
+
+        def done(fut: Future) -> None:
+            with self._lock:
+                self._in_flight -= 1
+                if fut.cancelled():
+                    self._cancelled += 1
+                elif fut.exception() is not None:
+                    self._failed += 1
+                else:
+                    _, started, finished = fut.result()
+                    self._completed += 1
+                    self._waits.append(max(0.0, started - submitted))
+                    self._runs.append(finished - started)
+            if outer.cancelled():
+                return
+            if fut.cancelled():
+                outer.cancel()
+            elif fut.exception() is not None:
+                outer.set_exception(fut.exception())
+            else:
+                outer.set_result(fut.result()[0])
+
+        inner.add_done_callback(done)
+        # Cancelling the returned future drops the race if a worker has not picked it up yet.
+        outer.add_done_callback(lambda fut: inner.cancel() if fut.cancelled() else None)
+        return outer
+
+    async def wait(self, future: Future, timeout: float = HORSE_RACE_TIMEOUT) -> tuple:
+        """Await a submitted race; on timeout the race keeps running and can be awaited again."""
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = min(self._in_flight, max(1, self.workers))
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_size,
+                "in_flight": self._in_flight,
+                "queue_depth": self._in_flight - running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "wait_ms": _percentiles_ms(self._waits),
+                "run_ms": _percentiles_ms(self._runs),
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 import os
 import secrets
@@ -6,23 +7,65 @@ import time
 import hmac
 import hashlib
 import json
+import logging
 import math
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Dict, List, Tuple
 
 from fastapi import Depends, FastAPI, HTTPException, Request, Header
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import func, text
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import text, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from . import models, schemas
-from .database import Base, SessionLocal, engine, get_db
+from .bias import CompiledBiasRules, SharedBiasCooldowns, compile_bias_rules
+from .aggregates import (
+    RESULT_TRACKER,
+    check_ledger,
+    clear_game_stats,
+    forget_game_stats,
+    ledger_totals,
+    load_game_stats,
+    rebuild_game_stats,
+    rebuild_ledger_summary,
+    record_adjustment,
+    record_game_stat,
+)
+from .database import SQLITE_PRAGMAS, Base, SessionLocal, engine, get_db, sqlite_settings
+from .session_store import DeadlineTimer, SessionConflict, SessionSweeper, make_session_store
+from .settings_cache import SETTINGS_CACHE, bump_settings_version
+from .user_cache import TOKEN_CACHE, USER_CACHE, UserSnapshot, load_user_snapshot, mark_user_changed
+from .horse_engine import (
+    HORSE_ENGINE,
+    HORSE_ENGINE_VERSION,
+    HORSE_EVENTS_VERSION,
+    HORSE_FIXED_PAYOUT,
+    HORSE_LAPS,
+    HORSE_RACE_TIMEOUT,
+    HORSE_TIMELINE_ENCODING,
+    HORSE_TRACK_LENGTH,
+    HorseRacePool,
+    HorseRaceQueueFull,
+    coalesce_horse_events,
+    encode_horse_timeline,
+    generate_horse_pool,
+    iter_horse_race,
+    price_horse_odds,
+    refill_priced_pools,
+    replay_horse_race,
+    run_horse_race,
+    shutdown_odds_executor,
+    take_priced_pool,
+)
 
 
 BASE_DIR = Path(__file__).resolve().parent
+logger = logging.getLogger("uvicorn.error")
 WEBCLIENT_DIR = BASE_DIR.parent / "webclient"
 KST = timezone(timedelta(hours=9))
 GAME_LABELS: Dict[str, str] = {
@@ -33,57 +76,35 @@ GAME_LABELS: Dict[str, str] = {
 }
 SECRET_KEY = os.environ.get("TOKEN_SECRET", "dev-secret")
 ADMIN_SECRET = os.environ.get("ADMIN_SECRET", "adminpass")
-UPDOWN_STATE: Dict[str, dict] = {}
-SLOT_PENDING: Dict[str, dict] = {}
-BACCARAT_PENDING: Dict[str, dict] = {}
-HORSE_PENDING: Dict[str, dict] = {}
-HORSE_SESSIONS: Dict[str, dict] = {}
+UPDOWN_SESSION_TTL = 1800  # seconds, 업다운 한 판(시작~마지막 추측)의 최대 진행 시간
+PENDING_SESSION_TTL = 600  # seconds, 슬롯/바카라 start 후 resolve까지 기다리는 시간
+HORSE_SESSION_TTL = 600  # seconds, 마지막 갱신 이후 경마 세션 보관 시간
+HORSE_ENDED_TTL = 120  # seconds, 끝난(정산/포기) 경마 세션을 스트림 조회용으로 남겨 두는 시간
+# 진행 중인 게임 세션 저장소(SESSION_STORE=sqlite|memory). 만료/초과분은 SESSION_SWEEPER가 백그라운드에서 정리한다.
+# sqlite 저장소는 모든 워커가 같이 보므로, 여러 요청이 같은 세션을 바꾸는 곳은 update/pop(원자적)만 쓴다.
+UPDOWN_STATE = make_session_store("updown", UPDOWN_SESSION_TTL, on_evict=lambda ns, ev: _on_sessions_evicted(ns, ev))
+SLOT_PENDING = make_session_store("slot", PENDING_SESSION_TTL, on_evict=lambda ns, ev: _on_sessions_evicted(ns, ev))
+BACCARAT_PENDING = make_session_store("baccarat", PENDING_SESSION_TTL, on_evict=lambda ns, ev: _on_sessions_evicted(ns, ev))
+HORSE_SESSIONS = make_session_store("horse", HORSE_SESSION_TTL, on_evict=lambda ns, ev: _on_sessions_evicted(ns, ev))
+HORSE_RACE_FUTURES: Dict[str, object] = {}  # session_id -> 경주 계산 future (프로세스 로컬, 저장소에 넣지 않음)
+# 보정 규칙 쿨다운: 규칙마다 TTL=cooldown_sec인 항목 하나. 워커끼리 공유되고 적용 여부는 add(없을 때만 삽입)로 정한다.
+BIAS_COOLDOWN_STORE = make_session_store("bias_cooldown", 0)
+BIAS_COOLDOWNS = SharedBiasCooldowns(BIAS_COOLDOWN_STORE)
+SESSION_SWEEPER = SessionSweeper(
+    [UPDOWN_STATE, SLOT_PENDING, BACCARAT_PENDING, HORSE_SESSIONS, BIAS_COOLDOWN_STORE], logger=logger
+)
 TOKEN_PREFIX = "Bearer "
 
-# Horse race simulation constants (pure probability engine)
-HORSE_TRACK_LENGTH = 1000.0
-HORSE_DT = 1 / 60
-HORSE_MAX_TICKS = 20000
-HORSE_TIMELINE_INTERVAL = 0.2
-HORSE_SEGMENTS = [
-    (0.0, 0.40, "straight"),
-    (0.40, 0.5, "corner"),
-    (0.5, 0.90, "straight"),
-    (0.90, 1.0, "corner"),
-]
-HORSE_LAPS = 2
-HORSE_STAT_TOTAL = 300
-HORSE_MIN_STAT = 20
 HORSE_HEARTBEAT_TIMEOUT = 8  # seconds
-OD_ALPHA = 0.15
-OD_PHI = 0.35
-OD_ETA_MIN = 1.0
-OD_LAMBDA = 0.035
-OD_RHO = 2.0
-OD_MU = 0.6
-OD_H_HALF = 1.5
-HT_TWEAK = 0.15
-SPD_K_SD = 0.45
-ACC_K_A = 1.4
-K_T = 1.2
-K_C = 1.3
-K_R = 1.4
-SIGMA_MIN = 0.03
-SIGMA_MAX = 0.25
-NOISE_MAX = 0.05
-BIAS_COOLDOWN_STATE: dict[str, float] = {}
-HORSE_MAPS: Dict[str, dict] = {
-    "oval": {
-        "id": "oval",
-        "name": "OVAL",
-        "corner_count": 2,
-        "weights": {"speed": 1.0, "accel": 0.9, "stamina": 0.5, "cornering": 0.6, "stability": -0.25},
-        "wind_mean": 0.0,
-        "wind_sigma": 0.08,
-        "slope_profile": [(0.0, 0.25, 0.0), (0.25, 0.5, 0.01), (0.5, 0.75, -0.008), (0.75, 1.0, 0.0)],
-    },
-    # 향후 L/U 맵 추가 예정
-}
+# seconds, 정산 대기(SETTLING)가 이보다 길면 finish 요청이 사라진 것(워커 재시작 등)으로 보고 직접 정산한다.
+HORSE_SETTLING_GRACE = HORSE_RACE_TIMEOUT + 2 * HORSE_HEARTBEAT_TIMEOUT
+# 진행 중(RUNNING) 경마 세션의 하트비트 기한. 기한이 지나면 백그라운드 스레드가 FORFEIT 처리한다.
+HORSE_HEARTBEAT_TIMER = DeadlineTimer(
+    lambda session_id: _expire_horse_session(session_id), name="horse-heartbeat", logger=logger
+)
+HORSE_STREAM_HEARTBEAT = 2  # seconds, 세션 스트림이 하트비트를 갱신/전송하는 주기
+HORSE_STREAM_POLL = 0.2  # seconds, 세션 스트림이 정산 완료를 확인하는 주기
+HORSE_RACE_POOL = HorseRacePool()
 
 
 def to_kst_str(dt: datetime) -> str:
@@ -93,21 +114,8 @@ def to_kst_str(dt: datetime) -> str:
 
 
 def get_profit_totals(db: Session) -> Tuple[float, float, float]:
-    game_total = (
-        db.query(
-            func.coalesce(
-                func.sum(models.GameResult.bet_amount - models.GameResult.payout_amount),
-                0.0,
-            )
-        ).scalar()
-        or 0.0
-    )
-    adjustment_total = (
-        db.query(func.coalesce(func.sum(models.FinancialAdjustment.amount), 0.0)).scalar()
-        or 0.0
-    )
-    game_total = float(game_total)
-    adjustment_total = float(adjustment_total)
+    # 전체 테이블 SUM 대신 결과/조정 기록 시 함께 갱신되는 ledger_summary 한 행을 읽는다.
+    game_total, adjustment_total = ledger_totals(db)
     return game_total, adjustment_total, game_total + adjustment_total
 
 
@@ -235,6 +243,7 @@ def ensure_game_settings_columns() -> None:
                     max_bet INTEGER NOT NULL DEFAULT 10000,
                     term_cycle_enabled INTEGER NOT NULL DEFAULT 0,
                     neutral_bg_enabled INTEGER NOT NULL DEFAULT 0,
+                    settings_version INTEGER NOT NULL DEFAULT 0,
                     updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
                 )
                 """
@@ -248,6 +257,10 @@ def ensure_game_settings_columns() -> None:
                 conn.exec_driver_sql(
                     "ALTER TABLE global_settings ADD COLUMN neutral_bg_enabled INTEGER NOT NULL DEFAULT 0"
                 )
+            if "settings_version" not in existing_cols_global:
+                conn.exec_driver_sql(
+                    "ALTER TABLE global_settings ADD COLUMN settings_version INTEGER NOT NULL DEFAULT 0"
+                )
 
 
 def ensure_user_balance_columns() -> None:
@@ -285,6 +298,75 @@ def ensure_user_balance_columns() -> None:
         )
 
 
+def ensure_game_result_columns() -> None:
+    with engine.begin() as conn:
+        existing_cols = {
+            row[1]
+            for row in conn.exec_driver_sql("PRAGMA table_info('game_results')").fetchall()
+        }
+        if "race_seed" not in existing_cols:
+            conn.exec_driver_sql("ALTER TABLE game_results ADD COLUMN race_seed INTEGER")
+            # 기존 경마 기록은 detail JSON의 race_seed로 채운다.
+            conn.exec_driver_sql(
+                """
+                UPDATE game_results
+                SET race_seed = CAST(json_extract(detail, '$.race_seed') AS INTEGER)
+                WHERE game_id = 'horse' AND json_valid(detail)
+                  AND json_extract(detail, '$.race_seed') IS NOT NULL
+                """
+            )
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_game_results_race_seed ON game_results (race_seed)"
+        )
+
+
+def ensure_indexes() -> None:
+    """
+    models.py에 선언된 인덱스 중 기존 DB에 없는 것을 만든다.
+    create_all은 이미 있는 테이블의 인덱스를 추가하지 않으므로 예전 DB는 여기서 채운다.
+    """
+    with engine.begin() as conn:
+        created = False
+        for table in Base.metadata.sorted_tables:
+            existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA index_list('{table.name}')").fetchall()}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(bind=conn)
+                    created = True
+        if created:
+            # 필요한 경우에만 통계를 갱신해 쿼리 플래너가 새 인덱스를 고르도록 한다.
+            conn.exec_driver_sql("PRAGMA optimize")
+
+
+def ensure_aggregates() -> None:
+    """
+    집계 테이블 도입 전 DB라면 한 번 재구축한다: game_stats가 비어 있는데 game_results에 기록이 있거나,
+    ledger_summary 행이 없을 때. 이후에는 결과/조정을 기록·삭제하는 모든 경로가 같은 트랜잭션에서 집계를 갱신한다.
+    """
+    db = SessionLocal()
+    try:
+        if db.query(models.GameStat.id).first() is None and db.query(models.GameResult.id).first() is not None:
+            games = rebuild_game_stats(db)
+            logger.info("Rebuilt game_stats for %d games", games)
+        if db.query(models.LedgerSummary.id).first() is None:
+            totals = rebuild_ledger_summary(db)
+            logger.info("Rebuilt ledger_summary: %s", totals)
+        db.commit()
+    finally:
+        db.close()
+
+
+def warm_result_tracker() -> None:
+    """보정 규칙용 최근 RTP/연승·연패 추적기를 game_results로 채운다."""
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        stats = RESULT_TRACKER.warm(db)
+        logger.info("Result tracker warmed in %.0f ms: %s", (time.perf_counter() - started) * 1000, stats)
+    finally:
+        db.close()
+
+
 def ensure_default_game_settings(db: Session) -> None:
     defaults = {
         "updown": {
@@ -573,7 +655,10 @@ def ensure_default_game_settings(db: Session) -> None:
             bias_rules=cfg.get("bias_rules", "[]"),
         )
         db.add(setting)
+    if db.new or db.dirty:
+        bump_settings_version(db)
     db.commit()
+    SETTINGS_CACHE.invalidate()
 
 
 def log_game_event(
@@ -626,19 +711,43 @@ def verify_token(token: str) -> int:
     return user_id_int
 
 
-def get_current_user(
-    authorization: str | None = Header(None), db: Session = Depends(get_db)
-):
+def authenticated_user_id(authorization: str | None) -> int:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Unauthorized")
     token = authorization.split(" ", 1)[1]
-    user_id = verify_token(token)
+    user_id = TOKEN_CACHE.get(token)
+    if user_id is None:
+        user_id = verify_token(token)
+        # 토큰 자체의 만료 시각을 넘겨 캐시하지 않는다.
+        TOKEN_CACHE.put(token, user_id, ttl=min(TOKEN_CACHE.ttl, int(token.split(":")[2]) - time.time()))
+    return user_id
+
+
+def get_current_user(
+    authorization: str | None = Header(None), db: Session = Depends(get_db)
+):
+    """
+    잔액을 바꾸는 엔드포인트용: 유저 행을 새로 읽는다. 동시 요청끼리의 잔액 직렬화는
+    apply_balance_change의 조건부 UPDATE가 DB에서 맡으므로 요청 동안 잡는 잠금은 없다.
+    """
+    user_id = authenticated_user_id(authorization)
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=401, detail="Invalid token")
     return user
 
 
+def get_current_identity(authorization: str | None = Header(None)) -> UserSnapshot:
+    """
+    읽기 전용 엔드포인트용: 캐시된 유저 스냅샷(USER_CACHE)을 돌려주며 캐시 적중 시 DB를 읽지 않는다.
+    잔액은 이 프로세스의 변경은 즉시, 다른 워커의 변경은 USER_CACHE_SEC 안에 반영된다.
+    """
+    user = USER_CACHE.load(authenticated_user_id(authorization), load_user_snapshot)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return user
+
+
 def require_admin(admin_secret: str | None = Header(None)):
     if admin_secret != ADMIN_SECRET:
         raise HTTPException(status_code=401, detail="Admin unauthorized")
@@ -648,10 +757,6 @@ def get_total_balance(user: models.User) -> int:
     return int(user.seed_balance + user.charge_balance + user.exchange_balance)
 
 
-def sync_total_balance(user: models.User) -> None:
-    user.balance = get_total_balance(user)
-
-
 def build_user_item(user: models.User, include_pin: bool = False) -> schemas.UserItem:
     data = {
         "id": user.id,
@@ -667,12 +772,8 @@ def build_user_item(user: models.User, include_pin: bool = False) -> schemas.Use
 
 
 def get_global_limits(db: Session) -> tuple[int, int]:
-    gs = db.query(models.GlobalSetting).filter(models.GlobalSetting.id == 1).first()
-    if not gs:
-        gs = models.GlobalSetting(id=1, min_bet=1, max_bet=10000)
-        db.add(gs)
-        db.commit()
-        db.refresh(gs)
+    # 설정 캐시의 스냅샷을 읽는다(없으면 캐시가 기본 행을 만든다).
+    gs = SETTINGS_CACHE.global_settings()
     return gs.min_bet, gs.max_bet
 
 
@@ -707,11 +808,27 @@ app.mount(
 )
 
 
+def report_sqlite_settings() -> dict:
+    """시작 시 실제로 적용된 SQLite pragma 값을 로그로 남기고, 요청값과 다르면 경고한다."""
+    settings = sqlite_settings()
+    if settings:
+        logger.info("SQLite settings: %s", ", ".join(f"{k}={v}" for k, v in settings.items()))
+    for name, wanted in SQLITE_PRAGMAS.items():
+        if name in settings and str(settings[name]) != str(wanted):
+            logger.warning("SQLite %s is %s (requested %s)", name, settings[name], wanted)
+    return settings
+
+
 @app.on_event("startup")
 def startup() -> None:
+    report_sqlite_settings()
     Base.metadata.create_all(bind=engine)
     ensure_game_settings_columns()
     ensure_user_balance_columns()
+    ensure_game_result_columns()
+    ensure_indexes()
+    ensure_aggregates()
+    warm_result_tracker()
     with engine.begin() as conn:
         conn.exec_driver_sql(
             "INSERT OR IGNORE INTO global_settings (id, min_bet, max_bet) VALUES (1, 1, 10000)"
@@ -721,6 +838,19 @@ def startup() -> None:
         ensure_default_game_settings(db)
     finally:
         db.close()
+    refill_priced_pools()
+    SESSION_SWEEPER.sweep()
+    SESSION_SWEEPER.start()
+    watch_running_horse_sessions()
+    HORSE_HEARTBEAT_TIMER.start()
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    SESSION_SWEEPER.stop()
+    HORSE_HEARTBEAT_TIMER.stop()
+    shutdown_odds_executor()
+    HORSE_RACE_POOL.shutdown()
 
 
 @app.get("/", include_in_schema=False)
@@ -742,7 +872,6 @@ def admin_dashboard(request: Request, db: Session = Depends(get_db)):
         .limit(25)
         .all()
     )
-    all_results = db.query(models.GameResult).all()
 
     def _format_kst(dt):
         if dt.tzinfo is None:
@@ -754,40 +883,8 @@ def admin_dashboard(request: Request, db: Session = Depends(get_db)):
     for result in results:
         result.timestamp_kst = _format_kst(result.timestamp)
 
-    game_stats: List[Dict[str, object]] = []
-    stats_map: Dict[str, Dict[str, object]] = {}
-    for row in all_results:
-        stat = stats_map.setdefault(
-            row.game_id,
-            {
-                "game_id": row.game_id,
-                "game_name": GAME_LABELS.get(row.game_id, row.game_id),
-                "total": 0,
-                "player_wins": 0,
-                "casino_wins": 0,
-                "ties": 0,
-                "profit": 0.0,
-            },
-        )
-        stat["total"] += 1
-        if row.result == "win":
-            stat["player_wins"] += 1
-        elif row.result == "lose":
-            stat["casino_wins"] += 1
-        else:
-            stat["ties"] += 1
-        stat["profit"] += row.bet_amount - row.payout_amount
-
-    for stat in stats_map.values():
-        contested = stat["player_wins"] + stat["casino_wins"]
-        stat["player_win_rate"] = (
-            (stat["player_wins"] / contested * 100) if contested else 0.0
-        )
-        stat["casino_win_rate"] = (
-            (stat["casino_wins"] / contested * 100) if contested else 0.0
-        )
-        game_stats.append(stat)
-    game_stats.sort(key=lambda item: item["game_name"])
+    # 전체 결과를 훑지 않고 게임별 누적 집계(game_stats)만 읽는다.
+    game_stats = load_game_stats(db, GAME_LABELS)
     adjustments = (
         db.query(models.FinancialAdjustment)
         .order_by(models.FinancialAdjustment.created_at.desc())
@@ -936,6 +1033,7 @@ def report_result(
     )
 
     db.add(result)
+    record_game_stat(db, payload.game_id, payload.result, payload.bet_amount, payload.payout_amount)
     db.commit()
 
     return {
@@ -986,7 +1084,7 @@ def api_login(payload: schemas.LoginRequest, db: Session = Depends(get_db)):
 
 
 @app.get("/api/me", response_model=schemas.MeResponse)
-def api_me(current_user: models.User = Depends(get_current_user)):
+def api_me(current_user: UserSnapshot = Depends(get_current_identity)):
     return build_user_item(current_user)
 
 
@@ -1004,6 +1102,7 @@ def create_adjustment(
         description=payload.description,
     )
     db.add(adjustment)
+    record_adjustment(db, payload.amount)
     db.commit()
     db.refresh(adjustment)
 
@@ -1027,6 +1126,7 @@ def delete_adjustment(adjustment_id: int, db: Session = Depends(get_db)):
     )
     if adjustment is None:
         raise HTTPException(status_code=404, detail="Adjustment not found.")
+    record_adjustment(db, adjustment.amount, removed=True)
     db.delete(adjustment)
     db.commit()
     _, _, total_profit = get_profit_totals(db)
@@ -1049,9 +1149,11 @@ def delete_session(
     if session is None:
         raise HTTPException(status_code=404, detail="Session key not found.")
 
-    db.query(models.GameResult).filter(
+    session_results = db.query(models.GameResult).filter(
         models.GameResult.session_key == session_key
-    ).delete()
+    )
+    forget_game_stats(db, session_results)
+    session_results.delete()
     db.delete(session)
     db.commit()
 
@@ -1069,6 +1171,7 @@ def delete_session(
 @app.delete("/reset")
 def reset_database(db: Session = Depends(get_db), admin=Depends(require_admin)):
     deleted_results = db.query(models.GameResult).delete()
+    clear_game_stats(db)
     deleted_sessions = db.query(models.Session).delete()
     db.commit()
     return {
@@ -1155,6 +1258,30 @@ def compute_bet_split(user: models.User, bet_amount: int) -> dict:
     return {"seed": int(seed), "charge": int(charge), "exchange": int(exchange)}
 
 
+def charge_pending_bet(db: Session, user: models.User, store, session_id: str, state: dict, game_id: str) -> None:
+    """
+    resolve를 기다리는 게임의 세션을 저장하고 베팅을 차감한다(커밋은 호출한 쪽). 잔액 UPDATE가 커밋까지
+    DB 쓰기 잠금을 잡으므로 세션 저장을 먼저 하고, 차감이 실패하면 세션을 지워 차감 없는 판이 남지 않게 한다.
+    """
+    bet_split = state["bet_split"]
+    store.put(session_id, state)
+    try:
+        apply_balance_change(
+            db,
+            user,
+            description=f"game:{game_id}:start",
+            game_type=game_id,
+            result_type="game",
+            delta_seed=-bet_split["seed"],
+            delta_charge=-bet_split["charge"],
+            delta_exchange=-bet_split["exchange"],
+        )
+    except Exception:
+        db.rollback()  # 갱신되지 않은 UPDATE도 쓰기 잠금을 잡고 있으므로 세션 저장소에 쓰기 전에 놓는다.
+        store.pop(session_id)
+        raise
+
+
 def split_int_by_weights(total: int, weights: List[int]) -> List[int]:
     if total <= 0 or sum(weights) <= 0:
         return [0 for _ in weights]
@@ -1266,6 +1393,7 @@ def process_game_result(
             timestamp=datetime.utcnow(),
         )
     )
+    record_game_stat(db, game_id, result, bet_amount, payout_amount, user_id=user.id)
     log_game_event(
         db,
         user,
@@ -1305,7 +1433,9 @@ def admin_delete_user(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     db.query(models.Transaction).filter(models.Transaction.user_id == user_id).delete()
-    db.query(models.GameResult).filter(models.GameResult.user_id == user_id).delete()
+    user_results = db.query(models.GameResult).filter(models.GameResult.user_id == user_id)
+    forget_game_stats(db, user_results)
+    user_results.delete()
     db.delete(user)
     db.commit()
     return {"message": "deleted", "user_id": user_id}
@@ -1359,6 +1489,47 @@ def admin_game_logs(
     return items
 
 
+@app.get("/api/admin/db/settings")
+def admin_db_settings(admin=Depends(require_admin)):
+    """현재 DB 연결에 적용된 SQLite pragma(저널 모드, synchronous, 캐시/mmap, busy_timeout, temp_store)."""
+    return {"requested": SQLITE_PRAGMAS, "effective": sqlite_settings()}
+
+
+@app.post("/api/admin/stats/rebuild")
+def admin_rebuild_game_stats(db: Session = Depends(get_db), admin=Depends(require_admin)):
+    """game_results 전체로 게임별 누적 집계(game_stats)를 다시 만든다. 수동으로 DB를 고친 뒤에 사용."""
+    games = rebuild_game_stats(db)
+    db.commit()
+    return {"games": games, "game_stats": load_game_stats(db, GAME_LABELS)}
+
+
+@app.get("/api/admin/ledger/check")
+def admin_check_ledger(fix: bool = False, db: Session = Depends(get_db), admin=Depends(require_admin)):
+    """
+    ledger_summary/game_stats를 원본 테이블(game_results, financial_adjustments)과 대조한다.
+    fix=true면 어긋난 경우 둘 다 재구축한 뒤 다시 대조한 결과를 돌려준다.
+    """
+    report = check_ledger(db)
+    if fix and not report["ok"]:
+        rebuild_game_stats(db)
+        rebuild_ledger_summary(db)
+        db.commit()
+        report = {**check_ledger(db), "fixed": True}
+    return report
+
+
+@app.get("/api/admin/horse/race_pool")
+def admin_horse_race_pool(admin=Depends(require_admin)):
+    """경주 전용 프로세스 풀 상태: 대기열 길이, 최근 대기/계산 시간(ms)."""
+    return HORSE_RACE_POOL.stats()
+
+
+@app.get("/api/admin/sessions")
+def admin_session_store(admin=Depends(require_admin)):
+    """진행 중 세션 저장소 상태: 백엔드, 정리 주기, 누적 정리 수, 네임스페이스별 세션 수, 경마 하트비트 기한 수."""
+    return {**SESSION_SWEEPER.stats(), "horse_heartbeats": HORSE_HEARTBEAT_TIMER.stats()}
+
+
 @app.get("/api/admin/active_games")
 def admin_active_games(
     db: Session = Depends(get_db),
@@ -1425,7 +1596,7 @@ def admin_active_games(
 
     for session_id, sess in HORSE_SESSIONS.items():
         status = sess.get("status")
-        if status not in ("CREATED", "RUNNING"):
+        if status not in ("CREATED", "RUNNING", "SETTLING"):
             continue
         user_id = sess.get("user_id")
         if user_id is None:
@@ -1519,11 +1690,7 @@ def api_game_updown(
 ):
     if get_total_balance(current_user) < payload.bet_amount:
         raise HTTPException(status_code=400, detail="잔액이 부족합니다.")
-    setting = (
-        db.query(models.GameSetting)
-        .filter(models.GameSetting.game_id == "updown")
-        .first()
-    )
+    setting = SETTINGS_CACHE.game("updown")
     if setting is None:
         raise HTTPException(status_code=400, detail="설정이 없습니다.")
     global_min, global_max = get_global_limits(db)
@@ -1580,11 +1747,7 @@ def api_game_updown_start(
         raise HTTPException(status_code=400, detail="베팅 포인트가 필요합니다.")
     if get_total_balance(current_user) < bet_amount:
         raise HTTPException(status_code=400, detail="잔액이 부족합니다.")
-    setting = (
-        db.query(models.GameSetting)
-        .filter(models.GameSetting.game_id == "updown")
-        .first()
-    )
+    setting = SETTINGS_CACHE.game("updown")
     if setting is None:
         raise HTTPException(status_code=400, detail="설정이 없습니다.")
     global_min, global_max = get_global_limits(db)
@@ -1605,25 +1768,22 @@ def api_game_updown_start(
     target = random.randint(1, 100)
     bet_split = compute_bet_split(current_user, bet_amount)
     session_id = str(uuid.uuid4())
-    UPDOWN_STATE[session_id] = {
-        "user_id": current_user.id,
-        "target": target,
-        "attempts": 0,
-        "guesses": [],
-        "bet_amount": bet_amount,
-        "payouts": payouts,
-        "bet_split": bet_split,
-        "created_at": datetime.utcnow(),
-    }
-    apply_balance_change(
+    charge_pending_bet(
         db,
         current_user,
-        description="game:updown:start",
-        game_type="updown",
-        result_type="game",
-        delta_seed=-bet_split["seed"],
-        delta_charge=-bet_split["charge"],
-        delta_exchange=-bet_split["exchange"],
+        UPDOWN_STATE,
+        session_id,
+        {
+            "user_id": current_user.id,
+            "target": target,
+            "attempts": 0,
+            "guesses": [],
+            "bet_amount": bet_amount,
+            "payouts": payouts,
+            "bet_split": bet_split,
+            "created_at": datetime.utcnow(),
+        },
+        "updown",
     )
     log_game_event(
         db,
@@ -1652,6 +1812,9 @@ def api_game_updown_guess(
     db: Session = Depends(get_db),
 ):
     result_data, finished = play_updown_guess(payload.session_id, current_user.id, payload.guess)
+    # 끝난 판은 먼저 꺼낸(pop) 요청 하나만 정산한다(다른 워커의 동시 추측과 중복 정산 방지).
+    if finished and UPDOWN_STATE.pop(payload.session_id) is None:
+        raise HTTPException(status_code=400, detail="이미 끝난 게임입니다.")
     detail = result_data["detail"]
     log_game_event(
         db,
@@ -1666,13 +1829,8 @@ def api_game_updown_guess(
         },
     )
     if finished:
-        UPDOWN_STATE.pop(payload.session_id, None)
         # Apply bias for final outcome
-        setting = (
-            db.query(models.GameSetting)
-            .filter(models.GameSetting.game_id == "updown")
-            .first()
-        )
+        setting = SETTINGS_CACHE.game("updown")
         rules = parse_bias_rules(setting) if setting else []
         bias_ctx = build_bias_context(db, current_user, "updown", result_data["bet_amount"], None)
         base_result = result_data["result"]
@@ -1718,33 +1876,26 @@ def api_game_slot_start(
 ):
     if get_total_balance(current_user) < payload.bet_amount:
         raise HTTPException(status_code=400, detail="잔액이 부족합니다.")
-    setting = (
-        db.query(models.GameSetting)
-        .filter(models.GameSetting.game_id == "slot")
-        .first()
-    )
+    setting = SETTINGS_CACHE.game("slot")
     if setting is None:
         raise HTTPException(status_code=400, detail="설정이 없습니다.")
     global_min, global_max = get_global_limits(db)
     enforce_bet_limits(setting, global_min, global_max, payload.bet_amount)
     bet_split = compute_bet_split(current_user, payload.bet_amount)
-    apply_balance_change(
+    session_id = str(uuid.uuid4())
+    charge_pending_bet(
         db,
         current_user,
-        description="game:slot:start",
-        game_type="slot",
-        result_type="game",
-        delta_seed=-bet_split["seed"],
-        delta_charge=-bet_split["charge"],
-        delta_exchange=-bet_split["exchange"],
+        SLOT_PENDING,
+        session_id,
+        {
+            "user_id": current_user.id,
+            "bet_amount": payload.bet_amount,
+            "bet_split": bet_split,
+            "created_at": datetime.utcnow(),
+        },
+        "slot",
     )
-    session_id = str(uuid.uuid4())
-    SLOT_PENDING[session_id] = {
-        "user_id": current_user.id,
-        "bet_amount": payload.bet_amount,
-        "bet_split": bet_split,
-        "created_at": datetime.utcnow(),
-    }
     log_game_event(
         db,
         current_user,
@@ -1781,15 +1932,15 @@ def api_game_slot_resolve(
         raise HTTPException(status_code=403, detail="본인의 게임만 완료할 수 있습니다.")
     bet_amount = pending["bet_amount"]
     bet_split = pending.get("bet_split")
-    setting = (
-        db.query(models.GameSetting)
-        .filter(models.GameSetting.game_id == "slot")
-        .first()
-    )
+    setting = SETTINGS_CACHE.game("slot")
     if setting is None:
         raise HTTPException(status_code=400, detail="설정이 없습니다.")
+    # pop으로 세션을 차지한 요청 하나만 정산한다(여러 워커가 같은 세션을 동시에 resolve해도 한 번).
+    claimed = SLOT_PENDING.pop(payload.session_id)
+    if claimed is None:
+        raise HTTPException(status_code=400, detail="이미 처리된 슬롯 게임입니다.")
     try:
-        response = run_slot_round(
+        return run_slot_round(
             db,
             current_user,
             setting,
@@ -1797,9 +1948,12 @@ def api_game_slot_resolve(
             charge_bet=False,
             bet_split=bet_split,
         )
-    finally:
-        SLOT_PENDING.pop(payload.session_id, None)
-    return response
+    except Exception:
+        # 정산이 실패하면 차감된 베팅이 사라지지 않게 세션을 되돌린다(다시 resolve하거나 만료 정산된다).
+        # 실패한 판의 쓰기 잠금을 먼저 놓아야 sqlite 저장소에 쓸 수 있다.
+        db.rollback()
+        SLOT_PENDING.put(payload.session_id, claimed)
+        raise
 
 
 @app.post("/api/game/slot", response_model=schemas.GameResponse)
@@ -1808,11 +1962,7 @@ def api_game_slot(
 ):
     if get_total_balance(current_user) < payload.bet_amount:
         raise HTTPException(status_code=400, detail="잔액이 부족합니다.")
-    setting = (
-        db.query(models.GameSetting)
-        .filter(models.GameSetting.game_id == "slot")
-        .first()
-    )
+    setting = SETTINGS_CACHE.game("slot")
     if setting is None:
         raise HTTPException(status_code=400, detail="설정이 없습니다.")
     global_min, global_max = get_global_limits(db)
@@ -1828,11 +1978,7 @@ def api_game_baccarat_start(
 ):
     if get_total_balance(current_user) < payload.bet_amount:
         raise HTTPException(status_code=400, detail="잔액이 부족합니다.")
-    setting = (
-        db.query(models.GameSetting)
-        .filter(models.GameSetting.game_id == "baccarat")
-        .first()
-    )
+    setting = SETTINGS_CACHE.game("baccarat")
     if setting is None:
         raise HTTPException(status_code=400, detail="설정이 없습니다.")
     setting_dict = {
@@ -1846,24 +1992,21 @@ def api_game_baccarat_start(
     gmin, gmax = get_global_limits(db)
     enforce_bet_limits(setting, gmin, gmax, payload.bet_amount)
     bet_split = compute_bet_split(current_user, payload.bet_amount)
-    apply_balance_change(
+    session_id = str(uuid.uuid4())
+    charge_pending_bet(
         db,
         current_user,
-        description="game:baccarat:start",
-        game_type="baccarat",
-        result_type="game",
-        delta_seed=-bet_split["seed"],
-        delta_charge=-bet_split["charge"],
-        delta_exchange=-bet_split["exchange"],
+        BACCARAT_PENDING,
+        session_id,
+        {
+            "user_id": current_user.id,
+            "bet_amount": payload.bet_amount,
+            "bet_choice": payload.bet_choice,
+            "bet_split": bet_split,
+            "created_at": datetime.utcnow(),
+        },
+        "baccarat",
     )
-    session_id = str(uuid.uuid4())
-    BACCARAT_PENDING[session_id] = {
-        "user_id": current_user.id,
-        "bet_amount": payload.bet_amount,
-        "bet_choice": payload.bet_choice,
-        "bet_split": bet_split,
-        "created_at": datetime.utcnow(),
-    }
     log_game_event(
         db,
         current_user,
@@ -1901,11 +2044,7 @@ def api_game_baccarat_resolve(
     bet_amount = pending["bet_amount"]
     bet_choice = pending["bet_choice"]
     bet_split = pending.get("bet_split")
-    setting = (
-        db.query(models.GameSetting)
-        .filter(models.GameSetting.game_id == "baccarat")
-        .first()
-    )
+    setting = SETTINGS_CACHE.game("baccarat")
     if setting is None:
         raise HTTPException(status_code=400, detail="설정이 없습니다.")
     setting_dict = {
@@ -1918,8 +2057,12 @@ def api_game_baccarat_resolve(
         raise HTTPException(status_code=400, detail="점검 중입니다.")
     gmin, gmax = get_global_limits(db)
     enforce_bet_limits(setting, gmin, gmax, bet_amount)
+    # pop으로 세션을 차지한 요청 하나만 정산한다(여러 워커가 같은 세션을 동시에 resolve해도 한 번).
+    claimed = BACCARAT_PENDING.pop(payload.session_id)
+    if claimed is None:
+        raise HTTPException(status_code=400, detail="이미 처리된 바카라 게임입니다.")
     try:
-        response = run_baccarat_round(
+        return run_baccarat_round(
             db,
             current_user,
             setting_dict,
@@ -1928,9 +2071,12 @@ def api_game_baccarat_resolve(
             charge_bet=False,
             bet_split=bet_split,
         )
-    finally:
-        BACCARAT_PENDING.pop(payload.session_id, None)
-    return response
+    except Exception:
+        # 정산이 실패하면 차감된 베팅이 사라지지 않게 세션을 되돌린다(다시 resolve하거나 만료 정산된다).
+        # 실패한 판의 쓰기 잠금을 먼저 놓아야 sqlite 저장소에 쓸 수 있다.
+        db.rollback()
+        BACCARAT_PENDING.put(payload.session_id, claimed)
+        raise
 
 
 @app.post("/api/game/baccarat", response_model=schemas.GameResponse)
@@ -1941,11 +2087,7 @@ def api_game_baccarat(
 ):
     if get_total_balance(current_user) < payload.bet_amount:
         raise HTTPException(status_code=400, detail="잔액이 부족합니다.")
-    setting = (
-        db.query(models.GameSetting)
-        .filter(models.GameSetting.game_id == "baccarat")
-        .first()
-    )
+    setting = SETTINGS_CACHE.game("baccarat")
     if setting is None:
         raise HTTPException(status_code=400, detail="설정이 없습니다.")
     setting_dict = {
@@ -2012,10 +2154,109 @@ def _parse_detail(detail_raw):
         return {}
 
 
+HORSE_TIMELINE_FORMATS = ("compact", "json")
+
+
+def _with_horse_timeline(detail: dict, timeline_format: str = "compact") -> dict:
+    """
+    저장하지 않은 타임라인/이벤트를 시드로 다시 시뮬레이션해 채운다(LRU 캐시).
+    기록된 엔진 버전이 현재와 다르거나 재생 결과의 우승마가 다르면 replay_mismatch로 표시.
+    timeline_format="compact"면 타임라인을 encode_horse_timeline 형식으로 보낸다(json은 예전 형식).
+    events_version이 없는 예전 이벤트(틱마다 SLIP/HEATCAP)는 구간 이벤트로 합쳐서 보낸다.
+    """
+    if timeline_format not in HORSE_TIMELINE_FORMATS:
+        raise HTTPException(status_code=400, detail="timeline_format은 compact 또는 json이어야 합니다.")
+    if detail.get("timeline"):
+        detail = {**detail}
+        if timeline_format == "compact" and isinstance(detail["timeline"], list):
+            detail["timeline"] = encode_horse_timeline(detail["timeline"])
+        if detail.get("events") and detail.get("events_version", 1) < HORSE_EVENTS_VERSION:
+            detail["events"] = coalesce_horse_events(detail["events"])
+            detail["events_version"] = HORSE_EVENTS_VERSION
+        return detail
+    if detail.get("race_seed") is None or not detail.get("horses"):
+        return detail
+    winner_id, events, _, sim_detail = replay_horse_race(
+        detail["horses"],
+        detail.get("map_type", "oval"),
+        detail["race_seed"],
+        detail.get("engine") or HORSE_ENGINE,
+    )
+    mismatch = _horse_replay_mismatch(detail, winner_id)
+    timeline = sim_detail.get("timeline") or []
+    return {
+        **detail,
+        "events": events,
+        "events_version": HORSE_EVENTS_VERSION,
+        "timeline": encode_horse_timeline(timeline) if timeline_format == "compact" else timeline,
+        "replay_engine_version": HORSE_ENGINE_VERSION,
+        "replay_mismatch": mismatch,
+    }
+
+
+def _horse_replay_mismatch(detail: dict, winner_id: str) -> bool:
+    return detail.get("engine_version", HORSE_ENGINE_VERSION) != HORSE_ENGINE_VERSION or (
+        detail.get("winner_id") not in (None, winner_id)
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def _next_horse_chunk(steps) -> tuple:
+    try:
+        return "chunk", next(steps)
+    except StopIteration as done:
+        return "done", done.value
+
+
+async def _stream_horse_race(detail: dict):
+    """
+    경주를 시드로 다시 시뮬레이션하면서 SSE로 흘려보낸다: meta → chunk(압축 타임라인 + 확정된 이벤트)… → done.
+    전체 타임라인을 메모리에 모으지 않으며(LRU 캐시도 거치지 않음), 클라이언트는 첫 chunk부터 재생할 수 있다.
+    """
+    meta = {k: v for k, v in detail.items() if k not in ("timeline", "events")}
+    yield _sse("meta", {**meta, "timeline_encoding": HORSE_TIMELINE_ENCODING, "events_version": HORSE_EVENTS_VERSION})
+    if detail.get("timeline"):
+        # 타임라인이 저장된 예전 기록은 한 번에 보낸다.
+        full = _with_horse_timeline(detail)
+        yield _sse("chunk", {"timeline": full["timeline"], "events": full.get("events") or []})
+        yield _sse("done", {"winner_id": detail.get("winner_id"), "finish_times": detail.get("finish_times")})
+        return
+    steps = iter_horse_race(
+        detail["horses"], detail.get("map_type", "oval"), detail["race_seed"], detail.get("engine") or HORSE_ENGINE
+    )
+    while True:
+        kind, value = await run_in_threadpool(_next_horse_chunk, steps)
+        if kind == "done":
+            break
+        timeline, events = value
+        yield _sse("chunk", {"timeline": encode_horse_timeline(timeline), "events": events})
+    winner_id, _, _, sim_detail = value
+    yield _sse(
+        "done",
+        {
+            "winner_id": winner_id,
+            "finish_times": sim_detail.get("finish_times"),
+            "replay_engine_version": HORSE_ENGINE_VERSION,
+            "replay_mismatch": _horse_replay_mismatch(detail, winner_id),
+        },
+    )
+
+
+def _horse_event_stream(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/api/horse/replay/{game_result_id}")
-def api_horse_replay(game_result_id: int, db: Session = Depends(get_db)):
+def api_horse_replay(game_result_id: int, timeline_format: str = "compact", db: Session = Depends(get_db)):
     row = _load_horse_result_by_id(db, game_result_id)
-    detail = _parse_detail(row.detail)
+    detail = _with_horse_timeline(_parse_detail(row.detail), timeline_format)
     return {
         "id": row.id,
         "seed": detail.get("race_seed"),
@@ -2028,27 +2269,40 @@ def api_horse_replay(game_result_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/api/horse/replay/by-seed/{seed}")
-def api_horse_replay_by_seed(seed: str, db: Session = Depends(get_db)):
-    rows = (
-        db.query(models.GameResult)
-        .filter(models.GameResult.game_id == "horse")
-        .order_by(models.GameResult.timestamp.desc())
-        .limit(1000)
-        .all()
-    )
-    for row in rows:
-        detail = _parse_detail(row.detail)
-        if str(detail.get("race_seed")) == str(seed):
-            return {
-                "id": row.id,
-                "seed": detail.get("race_seed"),
-                "detail": detail,
-                "bet_amount": row.bet_amount,
-                "payout_amount": row.payout_amount,
-                "result": row.result,
-                "timestamp": row.timestamp,
-            }
-    raise HTTPException(status_code=404, detail="해당 시드의 경마 기록을 찾을 수 없습니다.")
+def api_horse_replay_by_seed(seed: str, timeline_format: str = "compact", db: Session = Depends(get_db)):
+    try:
+        seed_value = int(seed)
+    except ValueError:
+        seed_value = None
+    row = None
+    if seed_value is not None:
+        row = (
+            db.query(models.GameResult)
+            .filter(models.GameResult.race_seed == seed_value, models.GameResult.game_id == "horse")
+            .order_by(models.GameResult.timestamp.desc())
+            .first()
+        )
+    if not row:
+        raise HTTPException(status_code=404, detail="해당 시드의 경마 기록을 찾을 수 없습니다.")
+    detail = _with_horse_timeline(_parse_detail(row.detail), timeline_format)
+    return {
+        "id": row.id,
+        "seed": detail.get("race_seed"),
+        "detail": detail,
+        "bet_amount": row.bet_amount,
+        "payout_amount": row.payout_amount,
+        "result": row.result,
+        "timestamp": row.timestamp,
+    }
+
+
+@app.get("/api/horse/replay/{game_result_id}/stream")
+def api_horse_replay_stream(game_result_id: int, db: Session = Depends(get_db)):
+    row = _load_horse_result_by_id(db, game_result_id)
+    detail = _parse_detail(row.detail)
+    if not detail.get("timeline") and (detail.get("race_seed") is None or not detail.get("horses")):
+        raise HTTPException(status_code=404, detail="재생할 수 있는 경마 기록이 아닙니다.")
+    return _horse_event_stream(_stream_horse_race({**detail, "result_id": row.id}))
 
 
 @app.post("/api/game/horse/start", response_model=schemas.GameResponse)
@@ -2065,56 +2319,291 @@ def api_game_horse_start(
 # =========================
 
 
-def sweep_horse_sessions():
+def _cancel_horse_race(session_id: str) -> None:
+    race_future = HORSE_RACE_FUTURES.pop(session_id, None)
+    if race_future is not None:
+        race_future.cancel()
+
+
+def update_session(store, session_id: str, fn, ttl: float | None = None) -> dict | None:
+    """저장소 항목을 원자적으로 갱신(store.update). 다른 요청과 계속 충돌하면 409."""
+    try:
+        return store.update(session_id, fn, ttl=ttl)
+    except SessionConflict:
+        raise HTTPException(status_code=409, detail="같은 게임의 다른 요청을 처리 중입니다. 잠시 후 다시 시도하세요.")
+
+
+def _touch_horse_session(sess: dict) -> dict | None:
+    if sess.get("status") != "RUNNING":
+        return None
+    sess["last_heartbeat"] = datetime.utcnow()
+    return sess
+
+
+def _end_horse_session(session_id: str, status: str, when=None) -> dict | None:
+    """
+    세션을 원자적으로 끝낸다(FORFEIT 등). 이미 끝났거나 when(sess)이 거짓이면 그대로 두고 None.
+    다른 워커가 같은 세션을 정산/갱신하는 중이어도 한쪽만 반영된다.
+    """
+    ended_at = datetime.utcnow()
+
+    def end(sess: dict) -> dict | None:
+        if sess.get("status") in ("FINISHED", "FORFEIT") or (when is not None and not when(sess)):
+            return None
+        sess["status"] = status
+        sess["ended_at"] = ended_at
+        return sess
+
+    ended = update_session(HORSE_SESSIONS, session_id, end, ttl=HORSE_ENDED_TTL)
+    if ended is not None:
+        HORSE_HEARTBEAT_TIMER.cancel(session_id)
+        _cancel_horse_race(session_id)
+    return ended
+
+
+def _settle_expired_round(namespace: str, pending: dict) -> dict:
+    """
+    resolve되지 않고 지워진 슬롯/바카라 세션을 정산한다. 결과는 resolve 시점에 뽑히므로 평소 resolve와
+    같은 경로로 한 판을 돌리고, 설정이 없으면 차감한 베팅을 돌려준다(유저가 삭제됐으면 로그만 남긴다).
+    """
+    db = SessionLocal()
+    try:
+        user = db.get(models.User, pending.get("user_id"))
+        if user is None:
+            return {"settled": None}
+        bet_amount = pending["bet_amount"]
+        bet_split = pending.get("bet_split")
+        setting = SETTINGS_CACHE.game(namespace)
+        if setting is not None and namespace == "slot":
+            outcome = run_slot_round(db, user, setting, bet_amount, charge_bet=False, bet_split=bet_split)
+            return {"settled": outcome.result, "payout_amount": outcome.payout_amount}
+        if setting is not None and namespace == "baccarat":
+            setting_dict = {
+                "maintenance_mode": bool(setting.maintenance_mode),
+                "baccarat_payout_player": setting.baccarat_payout_player,
+                "baccarat_payout_banker": setting.baccarat_payout_banker,
+                "baccarat_payout_tie": setting.baccarat_payout_tie,
+            }
+            outcome = run_baccarat_round(
+                db, user, setting_dict, bet_amount, pending["bet_choice"], charge_bet=False, bet_split=bet_split
+            )
+            return {"settled": outcome.result, "payout_amount": outcome.payout_amount}
+        bet_split = bet_split or compute_bet_split(user, bet_amount)
+        apply_balance_change(
+            db,
+            user,
+            description=f"{namespace}:expired",
+            game_type=namespace,
+            result_type="refund",
+            delta_seed=bet_split["seed"],
+            delta_charge=bet_split["charge"],
+            delta_exchange=bet_split["exchange"],
+        )
+        db.commit()
+        return {"settled": "refund", "payout_amount": bet_amount}
+    except Exception:
+        db.rollback()
+        logger.exception("Settling expired %s session failed", namespace)
+        return {"settled": "error"}
+    finally:
+        db.close()
+
+
+def _replay_horse_settlement(session_id: str, sess: dict) -> dict:
+    """
+    finish 없이 끝난 진행 중 경마 세션을 저장된 시드로 경주를 다시 계산해 정산한다. 결과는 시드로
+    이미 정해져 있으므로 finish가 냈을 결과와 같다(말을 고르지 않았거나 유저가 삭제됐으면 로그만 남긴다).
+    """
+    db = SessionLocal()
+    try:
+        user = db.get(models.User, sess.get("user_id"))
+        if user is None or not sess.get("selected_horse"):
+            return {"settled": None}
+        winner_id, _, profile, sim_detail = run_horse_race(
+            sess.get("horses") or [], sess.get("map_type", "oval"), sess.get("seed"), HORSE_ENGINE, record=False
+        )
+        outcome = _settle_horse_session(db, user, session_id, sess, winner_id, profile, sim_detail)
+        return {"settled": outcome.result, "payout_amount": outcome.payout_amount}
+    except Exception:
+        db.rollback()
+        logger.exception("Settling abandoned horse session %s failed", session_id)
+        return {"settled": "error"}
+    finally:
+        db.close()
+
+
+def _on_sessions_evicted(namespace: str, evicted: list) -> None:
+    """
+    세션 저장소가 만료/용량 초과로 지운 세션 처리. 경마는 경주 계산을 취소하고,
+    베팅이 이미 차감된 세션(업다운/슬롯/바카라, 진행 중 경마)은 game_logs에 expired로 남긴다.
+    슬롯/바카라는 결과가 resolve에서 정해지므로 지워질 때 그 자리에서 정산하고, 진행 중 경마는
+    저장된 시드로 경주를 다시 계산해 정산한다(베팅을 잃지 않게).
+    evict는 세션을 지운 워커 하나에서만 이 콜백을 부르므로 같은 세션이 두 번 정산되지 않는다.
+    """
+    rows = []
+    for session_id, value, reason in evicted:
+        if namespace == "horse":
+            HORSE_HEARTBEAT_TIMER.cancel(session_id)
+            _cancel_horse_race(session_id)
+            if value.get("status") not in ("RUNNING", "SETTLING"):
+                continue
+        detail = {"session_id": session_id, "bet_amount": value.get("bet_amount"), "reason": reason}
+        if namespace in ("slot", "baccarat"):
+            detail.update(_settle_expired_round(namespace, value))
+        elif namespace == "horse":
+            detail.update(_replay_horse_settlement(session_id, value))
+        rows.append(
+            models.GameLog(
+                user_id=value.get("user_id"),
+                game_id=namespace,
+                action="expired",
+                detail=json.dumps(detail, ensure_ascii=False),
+            )
+        )
+    if not rows:
+        return
+    db = SessionLocal()
+    try:
+        db.add_all(rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _watch_horse_heartbeat(session_id: str, sess: dict) -> None:
+    """마지막 하트비트 + HORSE_HEARTBEAT_TIMEOUT을 기한으로 등록(같은 세션의 이전 기한은 무시된다)."""
+    last = sess.get("last_heartbeat") or datetime.utcnow()
+    last_ts = last.replace(tzinfo=timezone.utc).timestamp()
+    HORSE_HEARTBEAT_TIMER.schedule(session_id, max(last_ts + HORSE_HEARTBEAT_TIMEOUT, time.time()) + 0.05)
+
+
+def _expire_horse_session(session_id: str) -> None:
+    """
+    하트비트 기한이 지난 세션을 FORFEIT 처리한다. 그 사이 다른 워커에서 하트비트가 왔으면 새 기한으로,
+    정산(SETTLING) 중이면 한 주기 뒤로 다시 등록하되, HORSE_SETTLING_GRACE를 넘기면 세션을 차지해
+    저장된 시드로 직접 정산한다(finish 요청이 사라져도 베팅이 남지 않게).
+    """
     now = datetime.utcnow()
-    expired = []
-    for sid, sess in list(HORSE_SESSIONS.items()):
-        if sess.get("status") == "RUNNING":
-            last = sess.get("last_heartbeat") or sess.get("created_at") or now
-            if (now - last).total_seconds() > HORSE_HEARTBEAT_TIMEOUT:
-                sess["status"] = "FORFEIT"
-                sess["ended_at"] = now
-                expired.append((sid, sess))
-    return expired
 
-def smoothstep(edge0: float, edge1: float, t: float) -> float:
-    u = min(1.0, max(0.0, (t - edge0) / (edge1 - edge0)))
-    return u * u * (3 - 2 * u)
+    def stale(sess: dict) -> bool:
+        last = sess.get("last_heartbeat") or sess.get("created_at") or now
+        return sess.get("status") == "RUNNING" and (now - last).total_seconds() > HORSE_HEARTBEAT_TIMEOUT
+
+    if _end_horse_session(session_id, "FORFEIT", when=stale) is not None:
+        return
+    sess = HORSE_SESSIONS.get(session_id)
+    if sess is None:
+        return
+    if sess.get("status") == "RUNNING":
+        _watch_horse_heartbeat(session_id, sess)
+    elif sess.get("status") == "SETTLING":
+        since = sess.get("settling_at") or now
+        if (now - since).total_seconds() <= HORSE_SETTLING_GRACE:
+            HORSE_HEARTBEAT_TIMER.schedule(session_id, time.time() + HORSE_HEARTBEAT_TIMEOUT)
+            return
+
+        def claim(current: dict) -> dict | None:
+            if current.get("status") != "SETTLING" or current.get("settling_at") != sess.get("settling_at"):
+                return None
+            current["status"] = "FINISHED"
+            return current
+
+        # 늦게 돌아온 finish 요청은 SETTLING → FINISHED에 실패해 400을 받으므로 정산은 한 번뿐이다.
+        claimed = update_session(HORSE_SESSIONS, session_id, claim)
+        if claimed is not None:
+            _cancel_horse_race(session_id)
+            detail = {"session_id": session_id, "bet_amount": claimed.get("bet_amount"), "reason": "settling"}
+            detail.update(_replay_horse_settlement(session_id, claimed))
+            if detail["settled"] == "error":
+                # 정산 실패: 다시 SETTLING으로 돌려 다음 주기에 재시도(베팅이 사라지지 않게)
+                def retry(current: dict) -> dict | None:
+                    if current.get("status") != "FINISHED" or "result_detail" in current:
+                        return None
+                    current["status"] = "SETTLING"
+                    current["settling_at"] = datetime.utcnow()
+                    return current
+
+                if update_session(HORSE_SESSIONS, session_id, retry) is not None:
+                    HORSE_HEARTBEAT_TIMER.schedule(session_id, time.time() + HORSE_HEARTBEAT_TIMEOUT)
+                return
+            db = SessionLocal()
+            try:
+                db.add(
+                    models.GameLog(
+                        user_id=claimed.get("user_id"),
+                        game_id="horse",
+                        action="expired",
+                        detail=json.dumps(detail, ensure_ascii=False),
+                    )
+                )
+                db.commit()
+            finally:
+                db.close()
+
+
+def watch_running_horse_sessions() -> None:
+    """재시작 전에 진행 중이던 경마 세션의 하트비트 기한을 다시 등록한다(서버 시작 시 한 번)."""
+    for session_id, sess in HORSE_SESSIONS.items():
+        if sess.get("status") in ("RUNNING", "SETTLING"):
+            _watch_horse_heartbeat(session_id, sess)
 
 
-def eff_exp(raw: float, k: float) -> float:
-    return 1 - math.exp(-k * raw)
+def horse_seed_commitment(seed: int, salt: str) -> str:
+    """경주 시드 커밋: sha256("시드:솔트"). 32비트 시드를 해시 대조로 역산하지 못하게 솔트를 섞는다."""
+    return hashlib.sha256(f"{int(seed)}:{salt}".encode()).hexdigest()
 
 
 @app.post("/api/horse/session/create", response_model=schemas.HorseSessionCreateResponse)
 def api_horse_session_create(
     payload: schemas.HorseSessionCreateRequest,
-    current_user: models.User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_identity),
 ):
-    sweep_horse_sessions()
     session_id = str(uuid.uuid4())
-    seed = random.getrandbits(32)
-    horses = generate_horse_pool(seed)
     map_type = "oval"
+    # 미리 배당을 계산해 둔 말 풀을 꺼내 쓰고, 비어 있으면 고정 배당으로 진행
+    priced = take_priced_pool(map_type)
+    odds = None
+    if priced:
+        seed = priced["seed"]
+        horses = priced["horses"]
+        setting = SETTINGS_CACHE.game("horse")
+        house_edge = setting.casino_advantage_percent if setting else 0.0
+        odds = price_horse_odds(priced["stats"], priced["sims"], house_edge)
+    else:
+        seed = random.getrandbits(32)
+        horses = generate_horse_pool(seed)
+    # 시드는 정산 뒤에만 공개하고, 생성 시에는 커밋(해시)만 내려 결과를 미리 계산하지 못하게 한다.
+    seed_salt = secrets.token_hex(16)
+    seed_commitment = horse_seed_commitment(seed, seed_salt)
     now = datetime.utcnow()
-    HORSE_SESSIONS[session_id] = {
-        "user_id": current_user.id,
-        "bet_amount": payload.bet_amount,
-        "seed": seed,
-        "horses": horses,
-        "map_type": map_type,
-        "track_length": HORSE_TRACK_LENGTH,
-        "laps": HORSE_LAPS,
-        "status": "CREATED",
-        "created_at": now,
-        "last_heartbeat": now,
-        "selected_horse": None,
-    }
-    # 클라이언트에는 최소 정보만 노출 (id/name만 전달)
-    horses_public = [{"id": h["id"], "name": h.get("name", h["id"])} for h in horses]
+    HORSE_SESSIONS.put(
+        session_id,
+        {
+            "user_id": current_user.id,
+            "bet_amount": payload.bet_amount,
+            "seed": seed,
+            "seed_salt": seed_salt,
+            "seed_commitment": seed_commitment,
+            "horses": horses,
+            "map_type": map_type,
+            "track_length": HORSE_TRACK_LENGTH,
+            "laps": HORSE_LAPS,
+            "status": "CREATED",
+            "created_at": now,
+            "last_heartbeat": now,
+            "selected_horse": None,
+            "odds": odds,
+            "odds_stats": priced["stats"] if priced else None,
+        },
+    )
+    # 클라이언트에는 최소 정보만 노출 (id/name/배당만 전달)
+    horses_public = [
+        {"id": h["id"], "name": h.get("name", h["id"]), "odds": odds.get(h["id"]) if odds else None}
+        for h in horses
+    ]
     return schemas.HorseSessionCreateResponse(
         session_id=session_id,
-        seed=seed,
+        seed_commitment=seed_commitment,
         horses=horses_public,
         track_length=HORSE_TRACK_LENGTH,
         laps=HORSE_LAPS,
@@ -2129,7 +2618,6 @@ def api_horse_session_lock(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    sweep_horse_sessions()
     sess = HORSE_SESSIONS.get(payload.session_id)
     if not sess or sess.get("user_id") != current_user.id:
         raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
@@ -2143,25 +2631,53 @@ def api_horse_session_lock(
     if payload.horse_id not in horse_ids:
         raise HTTPException(status_code=400, detail="선택한 말이 유효하지 않습니다.")
 
-    # 차감
     bet_split = compute_bet_split(current_user, payload.bet_amount)
-    apply_balance_change(
-        db,
-        current_user,
-        description="horse:lock",
-        game_type="horse",
-        result_type="game",
-        delta_seed=-bet_split["seed"],
-        delta_charge=-bet_split["charge"],
-        delta_exchange=-bet_split["exchange"],
-    )
-    db.commit()
-    db.refresh(current_user)
 
-    sess["status"] = "RUNNING"
-    sess["selected_horse"] = payload.horse_id
-    sess["last_heartbeat"] = datetime.utcnow()
-    sess["bet_split"] = bet_split
+    # CREATED → RUNNING을 먼저 원자적으로 바꿔, 같은 세션의 동시 lock이 베팅을 두 번 차감하지 않게 한다.
+    def lock(current: dict) -> dict:
+        if current.get("status") != "CREATED":
+            raise HTTPException(status_code=400, detail="세션 상태가 올바르지 않습니다.")
+        current.update(
+            status="RUNNING", selected_horse=payload.horse_id, last_heartbeat=datetime.utcnow(), bet_split=bet_split
+        )
+        return current
+
+    def unlock(current: dict) -> dict | None:
+        if current.get("status") != "RUNNING":
+            return None
+        current.update(status="CREATED", selected_horse=None, bet_split=None)
+        return current
+
+    sess = update_session(HORSE_SESSIONS, payload.session_id, lock)
+    if sess is None:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+    # 차감
+    try:
+        apply_balance_change(
+            db,
+            current_user,
+            description="horse:lock",
+            game_type="horse",
+            result_type="game",
+            delta_seed=-bet_split["seed"],
+            delta_charge=-bet_split["charge"],
+            delta_exchange=-bet_split["exchange"],
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        update_session(HORSE_SESSIONS, payload.session_id, unlock)
+        raise
+    db.refresh(current_user)
+    _watch_horse_heartbeat(payload.session_id, sess)
+    # 결과는 시드와 선택으로 이미 정해져 있으므로 애니메이션 동안 미리 계산해 둔다.
+    # 대기열이 가득 차면 finish에서 다시 제출한다.
+    try:
+        HORSE_RACE_FUTURES[payload.session_id] = HORSE_RACE_POOL.submit(
+            sess.get("horses") or [], sess.get("map_type", "oval"), sess.get("seed")
+        )
+    except HorseRaceQueueFull:
+        pass
     return {
         "status": "ok",
         "balance": current_user.balance,
@@ -2174,40 +2690,161 @@ def api_horse_session_lock(
 @app.post("/api/horse/session/heartbeat")
 def api_horse_session_heartbeat(
     payload: schemas.HorseSessionHeartbeatRequest,
-    current_user: models.User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_identity),
 ):
-    expired = sweep_horse_sessions()
+    def touch(sess: dict) -> dict | None:
+        if sess.get("user_id") != current_user.id:
+            raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+        return _touch_horse_session(sess)
+
+    # 진행 중이면 조회+갱신 한 번(PK 조회)과 기한 힙 push(O(log n))만 한다.
+    sess = update_session(HORSE_SESSIONS, payload.session_id, touch)
+    if sess is not None:
+        _watch_horse_heartbeat(payload.session_id, sess)
+        return {"status": sess.get("status")}
     sess = HORSE_SESSIONS.get(payload.session_id)
     if not sess or sess.get("user_id") != current_user.id:
         raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
-    if sess.get("status") == "RUNNING":
-        sess["last_heartbeat"] = datetime.utcnow()
-    return {"status": sess.get("status"), "expired": [sid for sid, _ in expired]}
+    return {"status": sess.get("status")}
+
+
+@app.get("/api/horse/session/{session_id}/stream")
+def api_horse_session_stream(session_id: str, current_user: UserSnapshot = Depends(get_current_identity)):
+    """
+    세션 하나의 SSE 스트림. 정산 전에는 HORSE_STREAM_HEARTBEAT마다 하트비트를 갱신하며 heartbeat 이벤트를 보내고
+    (연결이 열려 있는 동안은 별도 heartbeat POST가 필요 없다), 정산되면 같은 연결로 경주 타임라인/이벤트를 흘려보낸다.
+    포기/만료되면 end 이벤트로 끝난다.
+    """
+    sess = HORSE_SESSIONS.get(session_id)
+    if not sess or sess.get("user_id") != current_user.id:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+
+    async def events():
+        last_beat = None
+        current = sess
+        while "result_detail" not in current:
+            status = current.get("status")
+            if status not in ("CREATED", "RUNNING", "SETTLING", "FINISHED"):
+                yield _sse("end", {"status": status})
+                return
+            now = time.monotonic()
+            if last_beat is None or now - last_beat >= HORSE_STREAM_HEARTBEAT:
+                if status == "RUNNING":
+                    touched = update_session(HORSE_SESSIONS, session_id, _touch_horse_session)
+                    if touched is not None:
+                        _watch_horse_heartbeat(session_id, touched)
+                last_beat = now
+                yield _sse("heartbeat", {"status": status, "timeout_seconds": HORSE_HEARTBEAT_TIMEOUT})
+            await asyncio.sleep(HORSE_STREAM_POLL)
+            # 저장소에서 다시 읽어 다른 요청(정산/포기)이 바꾼 상태를 본다.
+            current = HORSE_SESSIONS.get(session_id)
+            if current is None:
+                yield _sse("end", {"status": "EXPIRED"})
+                return
+        async for part in _stream_horse_race(current["result_detail"]):
+            yield part
+
+    return _horse_event_stream(events())
 
 
 @app.post("/api/horse/session/finish", response_model=schemas.GameResponse)
-def api_horse_session_finish(
+async def api_horse_session_finish(
     payload: schemas.HorseSessionFinishRequest,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    sweep_horse_sessions()
     sess = HORSE_SESSIONS.get(payload.session_id)
     if not sess or sess.get("user_id") != current_user.id:
         raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
     if sess.get("status") != "RUNNING":
         raise HTTPException(status_code=400, detail="세션 상태가 올바르지 않습니다.")
-    bet = sess.get("bet_amount", 0)
-    chosen = sess.get("selected_horse")
-    if not chosen:
+    if not sess.get("selected_horse"):
         raise HTTPException(status_code=400, detail="말을 선택하지 않았습니다.")
 
+    # 정산은 우승마만 필요 → 타임라인/이벤트 없이 경주 전용 프로세스 풀에서 계산하고,
+    # 재생 데이터는 리플레이 API에서 생성. 대기 중에는 SETTLING으로 두어 하트비트 만료/중복 정산을 막는다.
+    session_id = payload.session_id
+    race_future = HORSE_RACE_FUTURES.get(session_id)
+    if race_future is None:
+        try:
+            race_future = HORSE_RACE_POOL.submit(sess.get("horses") or [], sess.get("map_type", "oval"), sess.get("seed"))
+        except HorseRaceQueueFull:
+            raise HTTPException(status_code=503, detail="경주 대기열이 가득 찼습니다. 잠시 후 다시 시도하세요.")
+        HORSE_RACE_FUTURES[session_id] = race_future
+
+    def move(from_status: str, to_status: str):
+        def change(current: dict) -> dict:
+            if current.get("status") != from_status:
+                raise HTTPException(status_code=400, detail="세션 상태가 올바르지 않습니다.")
+            current["status"] = to_status
+            if to_status == "SETTLING":
+                current["settling_at"] = datetime.utcnow()
+            return current
+
+        return change
+
+    # RUNNING → SETTLING, 대기 후 SETTLING → FINISHED를 원자적으로 바꿔 워커가 여러 개여도 한 요청만 정산한다.
+    if update_session(HORSE_SESSIONS, session_id, move("RUNNING", "SETTLING")) is None:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+
+    def _back_to_running(heartbeat: bool) -> None:
+        def back(current: dict) -> dict | None:
+            if current.get("status") not in ("SETTLING", "FINISHED") or "result_detail" in current:
+                return None
+            current["status"] = "RUNNING"
+            if heartbeat:
+                current["last_heartbeat"] = datetime.utcnow()
+            return current
+
+        current = update_session(HORSE_SESSIONS, session_id, back)
+        if current is not None:
+            _watch_horse_heartbeat(session_id, current)
+
+    try:
+        winner_id, _, profile, sim_detail = await HORSE_RACE_POOL.wait(race_future, HORSE_RACE_TIMEOUT)
+    except asyncio.TimeoutError:
+        _back_to_running(heartbeat=True)
+        raise HTTPException(status_code=503, detail="경주 계산이 지연되고 있습니다. 잠시 후 다시 시도하세요.")
+    except asyncio.CancelledError:
+        # 대기 중에 세션이 포기(forfeit)되어 경주가 취소된 경우
+        if not race_future.cancelled():
+            raise
+        raise HTTPException(status_code=400, detail="세션 상태가 올바르지 않습니다.")
+    except Exception:
+        _back_to_running(heartbeat=False)
+        HORSE_RACE_FUTURES.pop(session_id, None)
+        raise
+    # 기다리는 동안 포기/만료됐으면 여기서 400
+    sess = update_session(HORSE_SESSIONS, session_id, move("SETTLING", "FINISHED"))
+    if not sess:
+        raise HTTPException(status_code=400, detail="세션 상태가 올바르지 않습니다.")
+    try:
+        return await run_in_threadpool(
+            _settle_horse_session, db, current_user, session_id, sess, winner_id, profile, sim_detail
+        )
+    except Exception:
+        db.rollback()
+        _back_to_running(heartbeat=True)
+        raise
+
+
+def _settle_horse_session(
+    db: Session,
+    current_user: models.User,
+    session_id: str,
+    sess: dict,
+    winner_id: str,
+    profile: dict,
+    sim_detail: dict,
+) -> schemas.GameResponse:
+    bet = sess.get("bet_amount", 0)
+    chosen = sess.get("selected_horse")
     horses = sess.get("horses") or []
     map_type = sess.get("map_type", "oval")
     race_seed = sess.get("seed")
-    winner_id, events, profile, sim_detail = run_horse_race(horses, map_type, race_seed)
     result = "win" if chosen == winner_id else "lose"
-    payout_multiplier = 3.0 if result == "win" else 0.0
+    odds = sess.get("odds") or {}
+    payout_multiplier = odds.get(chosen, HORSE_FIXED_PAYOUT) if result == "win" else 0.0
     bet_split = sess.get("bet_split")
     delta_seed, delta_charge, delta_exchange, payout_amount = compute_game_balance_deltas(
         current_user,
@@ -2233,6 +2870,8 @@ def api_horse_session_finish(
 
     sess["status"] = "FINISHED"
     sess["ended_at"] = datetime.utcnow()
+    HORSE_RACE_FUTURES.pop(session_id, None)
+    HORSE_HEARTBEAT_TIMER.cancel(session_id)
     horses_public = [
         {
             "id": h["id"],
@@ -2243,33 +2882,37 @@ def api_horse_session_finish(
         for h in horses
     ]
     detail = {
-        "session_id": payload.session_id,
+        "session_id": session_id,
         "horses": horses_public,
         "map_type": map_type,
         "map_name": profile.get("name", map_type) if isinstance(profile, dict) else map_type,
         "race_seed": race_seed,
+        "seed_salt": sess.get("seed_salt"),
+        "seed_commitment": sess.get("seed_commitment"),
+        "engine": HORSE_ENGINE,
+        "engine_version": HORSE_ENGINE_VERSION,
         "winner_id": winner_id,
         "bet_choice": chosen,
-        "events": events,
-        "timeline": sim_detail.get("timeline"),
+        "odds": sess.get("odds"),
         "finish_times": sim_detail.get("finish_times"),
         "track_length": sim_detail.get("track_length", HORSE_TRACK_LENGTH),
         "laps": sim_detail.get("laps", HORSE_LAPS),
     }
-    db.add(
-        models.GameResult(
-            user_id=current_user.id,
-            session_key=payload.session_id,
-            game_id="horse",
-            bet_amount=bet,
-            bet_choice=chosen,
-            result=result,
-            payout_multiplier=payout_multiplier,
-            payout_amount=payout_amount,
-            detail=json.dumps(detail, ensure_ascii=False),
-            timestamp=datetime.utcnow(),
-        )
+    game_result = models.GameResult(
+        user_id=current_user.id,
+        session_key=session_id,
+        game_id="horse",
+        bet_amount=bet,
+        bet_choice=chosen,
+        result=result,
+        payout_multiplier=payout_multiplier,
+        payout_amount=payout_amount,
+        detail=json.dumps(detail, ensure_ascii=False),
+        race_seed=race_seed,
+        timestamp=datetime.utcnow(),
     )
+    db.add(game_result)
+    record_game_stat(db, "horse", result, bet, payout_amount, user_id=current_user.id)
     log_game_event(
         db,
         current_user,
@@ -2280,6 +2923,9 @@ def api_horse_session_finish(
     )
     db.commit()
     db.refresh(current_user)
+    detail["result_id"] = game_result.id
+    sess["result_detail"] = detail
+    HORSE_SESSIONS.put(session_id, sess, ttl=HORSE_ENDED_TTL)
     return schemas.GameResponse(
         result=result,
         payout_multiplier=payout_multiplier,
@@ -2296,17 +2942,15 @@ def api_horse_session_finish(
 @app.post("/api/horse/session/forfeit")
 def api_horse_session_forfeit(
     payload: schemas.HorseSessionForfeitRequest,
-    current_user: models.User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_identity),
     db: Session = Depends(get_db),
 ):
-    sweep_horse_sessions()
     sess = HORSE_SESSIONS.get(payload.session_id)
     if not sess or sess.get("user_id") != current_user.id:
         raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
-    if sess.get("status") in ("FINISHED", "FORFEIT"):
-        return {"status": sess.get("status")}
-    sess["status"] = "FORFEIT"
-    sess["ended_at"] = datetime.utcnow()
+    if _end_horse_session(payload.session_id, "FORFEIT") is None:
+        current = HORSE_SESSIONS.get(payload.session_id) or sess
+        return {"status": current.get("status")}
     log_game_event(
         db,
         current_user,
@@ -2337,27 +2981,43 @@ def apply_balance_change(
     delta_charge: int = 0,
     delta_exchange: int = 0,
 ):
-    before_total = get_total_balance(user)
-    user.seed_balance += delta_seed
-    user.charge_balance += delta_charge
-    user.exchange_balance += delta_exchange
-    if user.seed_balance < 0 or user.charge_balance < 0 or user.exchange_balance < 0:
+    # 잔액 검사와 변경을 조건부 UPDATE 한 번으로 처리한다: 같은 유저의 요청이 동시에 들어와도(다른 워커 포함)
+    # 각자 DB의 현재 잔액에 더하고, 어느 항목이든 음수가 되면 행이 갱신되지 않는다.
+    users = models.User.__table__
+    seed = users.c.seed_balance + delta_seed
+    charge = users.c.charge_balance + delta_charge
+    exchange = users.c.exchange_balance + delta_exchange
+    now = datetime.utcnow()
+    row = db.execute(
+        update(users)
+        .where(users.c.id == user.id, seed >= 0, charge >= 0, exchange >= 0)
+        .values(
+            seed_balance=seed,
+            charge_balance=charge,
+            exchange_balance=exchange,
+            balance=seed + charge + exchange,
+            updated_at=now,
+        )
+        .returning(users.c.seed_balance, users.c.charge_balance, users.c.exchange_balance, users.c.balance)
+    ).first()
+    if row is None:
         raise HTTPException(status_code=400, detail="잔액이 부족합니다.")
-    sync_total_balance(user)
-    user.updated_at = datetime.utcnow()
-    delta_total = user.balance - before_total
+    for name, value in row._mapping.items():
+        set_committed_value(user, name, value)
+    set_committed_value(user, "updated_at", now)
+    mark_user_changed(db, user.id)
+    delta_total = delta_seed + delta_charge + delta_exchange
     db.add(
         models.Transaction(
             user_id=user.id,
             type=result_type,
             game_type=game_type,
             amount=delta_total,
-            before_balance=before_total,
+            before_balance=user.balance - delta_total,
             after_balance=user.balance,
             description=description,
         )
     )
-    db.add(user)
 
 
 def normalize_payouts(payouts: List[float]) -> List[float]:
@@ -2370,374 +3030,6 @@ def normalize_payouts(payouts: List[float]) -> List[float]:
     return normalized
 
 
-def generate_horse_pool(seed: int | None = None) -> List[dict]:
-    """Generate 4 horses using fixed stat budget (sum=N) with constrained speed."""
-    rng = random.Random(seed)
-    horses = []
-    total = HORSE_STAT_TOTAL
-    min_stat = HORSE_MIN_STAT
-    min_other_sum = 4 * min_stat
-    # Base speed ensures >=50 and <=100, and spread <=30 using per-horse offset.
-    base_speed = min(70, 50 + rng.randint(0, 20))
-    for i in range(4):
-        # Speed with max spread 30
-        speed_offset = rng.randint(0, 30)
-        speed_val = min(100, base_speed + speed_offset)
-        # Ensure enough budget remains for other stats
-        max_allowed_speed = total - min_other_sum
-        if speed_val > max_allowed_speed:
-            speed_val = max(max_allowed_speed, 50)
-        remaining = total - speed_val
-        extra = max(0, remaining - min_other_sum)
-        cuts = sorted([rng.randint(0, extra) for _ in range(3)])
-        portions = [
-            cuts[0],
-            cuts[1] - cuts[0],
-            cuts[2] - cuts[1],
-            extra - cuts[2],
-        ]
-        rng.shuffle(portions)
-        stats = {
-            "speed": speed_val,
-            "accel": min_stat + portions[0],
-            "stamina": min_stat + portions[1],
-            "stability": min_stat + portions[2],
-            "cornering": min_stat + portions[3],
-        }
-        horses.append({"id": f"h{i+1}", "name": f"Horse {i+1}", "stats": stats})
-    return horses
-
-
-def run_horse_race(
-    horses: List[dict], map_key: str, seed: int | None = None
-) -> tuple[str, list, dict, dict]:
-    """
-    Horse race engine (pure physics + stochastic events) per FINAL INTEGRATED SPEC.
-    """
-    rng = random.Random(seed)
-    profile = HORSE_MAPS.get(map_key, HORSE_MAPS["oval"])
-    finish_distance = HORSE_TRACK_LENGTH * HORSE_LAPS
-    slope_profile = [
-        (0.0, 0.25, 0.0),
-        (0.25, 0.50, 0.01),
-        (0.50, 0.75, -0.008),
-        (0.75, 1.0, 0.0),
-    ]
-    wind_sigma = 0.08
-
-    def in_corner(frac: float) -> bool:
-        return any(
-            seg_type == "corner" and start <= frac < end
-            for start, end, seg_type in HORSE_SEGMENTS
-        )
-
-    def slope_at(frac: float) -> float:
-        for start, end, slope in slope_profile:
-            if start <= frac < end:
-                return slope
-        return 0.0
-
-    def condition_factor(stability: int) -> float:
-        R_eff = eff_exp(stability / 100, K_R)
-        sigma = SIGMA_MIN + (SIGMA_MAX - SIGMA_MIN) * (1 - R_eff)
-        z = rng.normalvariate(0, sigma)
-        return math.exp(z)
-
-    # Constants
-    Vref = 15.0
-    gamma = 2.2
-    gamma2 = 2.6
-    e0 = 0.015
-    e1 = 0.035
-    P0 = 8.0
-    P1 = 10.0
-    V0 = 14.0
-    V1 = 6.0
-    D0 = 0.010
-    D1 = 0.0006
-    Bc = 2.3
-    KAPPA = 0.03
-    eps = 1e-6
-    ALAT0 = 2.0
-    ALAT1 = 5.5
-    H0 = 0.9
-    Hdecay = 2.8
-
-    traits = []
-    for h in horses:
-        stats = h.get("stats", {})
-        heat_resist = 0.9 + 0.3 * rng.random()  # [0.9,1.2]
-        recover_rate = 0.85 + 0.25 * rng.random()  # [0.85,1.1]
-        luck = 0.8 + 0.4 * rng.random()  # [0.8,1.2]
-        tactic_roll = rng.random()
-        tactic = "front" if tactic_roll < 0.33 else "stalker" if tactic_roll < 0.66 else "closer"
-        traits.append(
-            {
-                "horse_id": h["id"],
-                "heat_resist": heat_resist,
-                "recover_rate": recover_rate,
-                "luck": luck,
-                "tactic": tactic,
-                "stats": stats,
-            }
-        )
-
-    states = []
-    for idx, (h, tr) in enumerate(zip(horses, traits)):
-        stats = tr["stats"]
-        F = condition_factor(stats.get("stability", HORSE_MIN_STAT))
-        states.append(
-            {
-                "idx": idx,
-                "horse_id": h["id"],
-                "pos": 0.0,
-                "v": 0.0,
-                "stats": stats,
-                "finished": False,
-                "finish_time": math.inf,
-                "condition": F,
-                "E": 1.0,
-                "H": 0.0,
-                "trait": tr,
-                "prev_event": None,
-            }
-        )
-
-    timeline = []
-    next_sample = 0.0
-    t = 0.0
-    events_flat = []
-
-    def push_event(kind: str, st, magnitude: float, note: str):
-        events_flat.append(
-            {
-                "t": round(t, 3),
-                "horse_id": st["horse_id"],
-                "kind": kind,
-                "mag": magnitude,
-                "note": note,
-            }
-        )
-
-    while t < HORSE_MAX_TICKS * HORSE_DT:
-        if all(st["finished"] for st in states):
-            break
-
-        wind = rng.normalvariate(0.0, wind_sigma)
-        wind_factor = max(0.2, 1 + wind)
-
-        # sort by position for slipstream/contact
-        ordered = sorted(states, key=lambda s: (-s["pos"], s["horse_id"]))
-        for rank, st in enumerate(ordered):
-            st["rank"] = rank + 1
-
-        for st in states:
-            if st["finished"]:
-                continue
-            total_frac = st["pos"] / finish_distance
-            lap_frac = (st["pos"] % HORSE_TRACK_LENGTH) / HORSE_TRACK_LENGTH
-            in_cor = in_corner(lap_frac)
-            slope = slope_at(lap_frac)
-
-            stats = st["stats"]
-            Sn = stats.get("speed", HORSE_MIN_STAT) / 100
-            An = stats.get("accel", HORSE_MIN_STAT) / 100
-            Tn = stats.get("stamina", HORSE_MIN_STAT) / 100
-            Cn = stats.get("cornering", HORSE_MIN_STAT) / 100
-            T_eff = eff_exp(Tn, K_T)
-            C_eff = eff_exp(Cn, K_C)
-            R_eff = eff_exp(stats.get("stability", HORSE_MIN_STAT) / 100, K_R)
-            trait = st["trait"]
-            heat_resist = trait["heat_resist"]
-            recover_rate = trait["recover_rate"]
-            luck = trait["luck"]
-
-            # Target speed (profiling only)
-            Vcap_base = V0 + V1 * math.sqrt(Sn)
-            if trait["tactic"] == "front":
-                target_v = Vcap_base * 0.90
-                if total_frac > 0.65:
-                    target_v *= 0.92
-            elif trait["tactic"] == "stalker":
-                target_v = Vcap_base * 0.85
-                if total_frac > 0.50:
-                    target_v *= 1.05
-            else:  # closer
-                target_v = Vcap_base * (0.75 + 0.15 * total_frac)
-
-            # Speed cap & saturation
-            Vcap = Vcap_base
-            eta = 1.8 + 1.2 * (1 - An)
-            sat = max(0.0, 1 - (st["v"] / max(Vcap, 1e-6)) ** eta)
-
-            # Power
-            Pmax = P0 + P1 * Sn
-            P = Pmax * st["condition"] * (0.35 + 0.65 * st["E"])
-            power_push = P * sat
-
-            # Drag
-            drag = (D0 * (st["v"] ** 2) + D1 * (st["v"] ** 3)) * wind_factor
-
-            # Slipstream
-            lead = next((s for s in ordered if s["pos"] > st["pos"] and (s["pos"] - st["pos"]) < 20), None)
-            if lead:
-                drag *= 0.9
-                st["H"] += 0.01
-                push_event("SLIP", st, 0.1, "슬립스트림")
-
-            # Slope
-            drag += 9.8 * slope * st["v"] / Vref
-
-            # Events (Poisson)
-            lambda_stumble = 0.003 * (1 + (1 - R_eff))
-            if st["prev_event"] == "STUMBLE":
-                lambda_stumble *= (1 + (1 - R_eff))
-            p_stumble = 1 - math.exp(-lambda_stumble * HORSE_DT)
-            if rng.random() < p_stumble:
-                mag = rng.uniform(0.08, 0.18)
-                power_push *= (1 - mag)
-                st["v"] *= (1 - 0.5 * mag)
-                st["prev_event"] = "STUMBLE"
-                push_event("STUMBLE", st, mag, "stumble")
-            else:
-                st["prev_event"] = None
-
-            p_boost = 1 - math.exp(-(0.0025 * luck) * HORSE_DT)
-            if rng.random() < p_boost:
-                mag = rng.uniform(0.04, 0.12)
-                power_push *= (1 + mag)
-                st["prev_event"] = "BOOST"
-                push_event("BOOST", st, mag, "boost")
-
-            if lead and (lead["pos"] - st["pos"]) < 6:
-                p_contact = 1 - math.exp(-0.02 * HORSE_DT)
-                if rng.random() < p_contact:
-                    hit = rng.uniform(0.05, 0.15)
-                    st["v"] *= (1 - hit)
-                    st["prev_event"] = "CONTACT"
-                    push_event("CONTACT", st, hit, "contact")
-
-            # Corner braking
-            kappa = KAPPA if in_cor else 0.0
-            a_lat_max = ALAT0 + ALAT1 * (C_eff ** 1.1)
-            a_lat_eff = a_lat_max / (1 + st["H"])
-            v_corner_max = math.sqrt(a_lat_eff / max(kappa, eps)) if kappa > 0 else float("inf")
-            corner_brake = Bc * (st["v"] - v_corner_max) ** 2 if st["v"] > v_corner_max else 0.0
-
-            # Corner miss penalty
-            if in_cor and v_corner_max < float("inf") and v_corner_max > 0:
-                excess = (st["v"] - v_corner_max) / v_corner_max
-                if excess > 0.25:
-                    st["H"] += 0.15 * excess
-                    st["v"] *= (1 - 0.08 * excess)
-                    push_event("CORNER_MISS", st, excess, "corner miss")
-
-            # Energy/heat drain
-            speed_load = 1 + SPD_K_SD * Sn
-            dE = (
-                e0 * speed_load * ((st["v"] / Vref) ** gamma)
-                + e1 * (1 if in_cor else 0) * ((st["v"] / Vref) ** gamma2) * (1 - 0.5 * T_eff)
-            ) * HORSE_DT
-            dH = (
-                H0
-                * (1 if in_cor else 0)
-                * ((st["v"] / Vref) ** 2)
-                * (1 - C_eff)
-                * (1 + HT_TWEAK * (1 - T_eff))
-                * HORSE_DT
-            )
-
-            # Overheat cap
-            heat_cap = max(0.6, 1.0 - 0.2 * heat_resist)
-            if st["H"] > heat_cap:
-                power_push *= 0.75
-                push_event("HEATCAP", st, st["H"], "heat cap")
-
-            # Overdrive
-            w_od = smoothstep(0.7, 0.9, total_frac)
-            h_ratio = st["H"] / (st["H"] + OD_H_HALF)
-            spurt_gate = max(0.35, min(1.0, 0.7 + 0.3 * st["E"] - 0.2 * h_ratio))
-            iod = (
-                w_od
-                * max(0.0, min(1.0, 0.35 + 0.65 * T_eff - 0.3 * (1 - R_eff)))
-                * smoothstep(0.12, 0.3, st["E"])
-                * (1 - math.exp(-ACC_K_A * An))
-                * spurt_gate
-            )
-            eta_eff = max(OD_ETA_MIN, eta * (1 - OD_PHI * iod))
-            sat_eff = max(0.0, 1 - (st["v"] / max(Vcap, 1e-6)) ** eta_eff)
-            # Preserve prior modifiers (events/heat cap) by scaling current push
-            if sat > 1e-6:
-                power_push *= (sat_eff / sat)
-            else:
-                power_push = P * sat_eff
-            power_push *= (1 + OD_ALPHA * iod)
-            dE += OD_LAMBDA * iod * (st["v"] / Vref) ** OD_RHO * HORSE_DT
-            dH *= (1 + OD_MU * iod)
-
-            # Recovery when slow
-            if st["v"] < target_v * 0.6:
-                dE *= 0.8 * recover_rate
-                dH *= 0.8 * recover_rate
-
-            st["E"] = min(1.0, max(0.0, st["E"] - dE))
-            st["H"] = max(0.0, st["H"] + dH - Hdecay * st["H"] * HORSE_DT * heat_resist)
-
-            # Acceleration
-            a_val = power_push - drag - corner_brake
-            st["v"] = max(0.0, st["v"] + a_val * HORSE_DT)
-            st["pos"] += st["v"] * HORSE_DT
-            if st["pos"] >= finish_distance:
-                st["pos"] = finish_distance
-                st["finished"] = True
-                st["finish_time"] = t
-
-        t += HORSE_DT
-        if t >= next_sample:
-            timeline.append(
-                {
-                    "t": round(t, 3),
-                    "positions": [s["pos"] for s in states],
-                    "speeds": [s["v"] for s in states],
-                    "energy": [s["E"] for s in states],
-                    "heat": [s["H"] for s in states],
-                }
-            )
-            next_sample += HORSE_TIMELINE_INTERVAL
-
-    # ensure all finish times are finite
-    for st in states:
-        if not math.isfinite(st["finish_time"]):
-            st["finish_time"] = t
-
-    winner_idx = min(range(len(states)), key=lambda i: (states[i]["finish_time"], states[i]["idx"]))
-    winner_id = states[winner_idx]["horse_id"]
-    finish_times = {s["horse_id"]: s["finish_time"] for s in states}
-
-    sim_detail = {
-        "timeline": timeline,
-        "finish_times": finish_times,
-        "laps": HORSE_LAPS,
-        "track_length": HORSE_TRACK_LENGTH,
-        "conditions": {s["horse_id"]: s["condition"] for s in states},
-    }
-
-    return winner_id, events_flat, profile, sim_detail
-
-
-def estimate_horse_win_probs(horses: List[dict], sims: int = 200, seed: int | None = None) -> List[float]:
-    rng = random.Random(seed)
-    wins = [0 for _ in horses]
-    for i in range(sims):
-        sim_seed = rng.getrandbits(32)
-        winner_id, _, _, _ = run_horse_race(horses, "oval", sim_seed)
-        for idx, h in enumerate(horses):
-            if h["id"] == winner_id:
-                wins[idx] += 1
-                break
-    return [w / sims for w in wins]
-
-
 def play_updown_logic(guesses: List[int], payouts: List[float] | None = None) -> tuple[str, float, dict]:
     target = random.randint(1, 100)
     payouts_full = payouts or [7, 5, 4, 3, 2, 0, 0, 0, 0, 0]
@@ -2795,14 +3087,17 @@ def align_updown_detail(detail: dict, result: str, last_guess: int | None = None
 
 
 def play_updown_guess(session_id: str, user_id: int, guess: int) -> tuple[dict, bool]:
-    state = UPDOWN_STATE.get(session_id)
+    def add_guess(state: dict) -> dict:
+        if state.get("user_id") != user_id:
+            raise HTTPException(status_code=403, detail="본인의 게임만 진행할 수 있습니다.")
+        state["attempts"] += 1
+        state["guesses"].append(guess)
+        return state
+
+    state = update_session(UPDOWN_STATE, session_id, add_guess)
     if not state:
         raise HTTPException(status_code=400, detail="게임을 시작해주세요.")
-    if state.get("user_id") != user_id:
-        raise HTTPException(status_code=403, detail="본인의 게임만 진행할 수 있습니다.")
     target = state["target"]
-    state["attempts"] += 1
-    state["guesses"].append(guess)
     attempts = state["attempts"]
     finished = False
     result = "continue"
@@ -2867,32 +3162,28 @@ def play_slot_logic(
         multiplier = 0
     jackpot_win = False
     jackpot_amount = 0.0
+    pool = setting.jackpot_pool
     if setting.jackpot_enabled and bet_amount > 0 and setting.jackpot_trigger_percent > 0:
+        # setting은 캐시 스냅샷이므로 적립금은 DB에서 원자적으로 갱신한다(같은 트랜잭션이 쓰기 잠금을 쥔다).
         contrib = bet_amount * (setting.jackpot_contrib_percent / 100.0)
-        setting.jackpot_pool += contrib
-        db.add(setting)
+        jackpot = db.query(models.GameSetting).filter(models.GameSetting.game_id == setting.game_id)
+        jackpot.update({models.GameSetting.jackpot_pool: models.GameSetting.jackpot_pool + contrib}, synchronize_session=False)
+        pool = jackpot.with_entities(models.GameSetting.jackpot_pool).scalar()
         if random.random() < (setting.jackpot_trigger_percent / 100.0):
             jackpot_win = True
-            jackpot_amount = setting.jackpot_pool
-            setting.jackpot_pool = 0.0
-            db.add(setting)
+            jackpot_amount = pool
+            pool = 0.0
+            jackpot.update({models.GameSetting.jackpot_pool: 0.0}, synchronize_session=False)
     result = "win" if multiplier > 0 or jackpot_win else "lose"
     total_payout = bet_amount * multiplier + jackpot_amount
-    detail = {"symbols": symbols, "jackpot_win": jackpot_win, "jackpot_amount": jackpot_amount, "pool": setting.jackpot_pool}
+    detail = {"symbols": symbols, "jackpot_win": jackpot_win, "jackpot_amount": jackpot_amount, "pool": pool}
     payout_override = total_payout if jackpot_win else None
     return result, float(multiplier), detail, payout_override
 
 
-def parse_bias_rules(setting: models.GameSetting) -> list[dict]:
-    if isinstance(setting.bias_rules, list):
-        return setting.bias_rules
-    try:
-        rules = json.loads(setting.bias_rules or "[]")
-        if isinstance(rules, list):
-            return rules
-    except Exception:
-        pass
-    return []
+def parse_bias_rules(setting: models.GameSetting) -> CompiledBiasRules:
+    # 규칙 텍스트가 바뀔 때만 다시 컴파일하고(캐시), 라운드마다 JSON 파싱/정렬/해시를 하지 않는다.
+    return compile_bias_rules(setting.bias_rules)
 
 
 def get_user_streak(db: Session, user_id: int, game_id: str, lookback: int = 50) -> tuple[int, int]:
@@ -2936,8 +3227,15 @@ def get_recent_rtp(db: Session, game_id: str, window: int = 100) -> float | None
 
 
 def build_bias_context(db: Session, user: models.User, game_id: str, bet_amount: int, bet_choice: str | None) -> dict:
-    win_streak, lose_streak = get_user_streak(db, user.id, game_id)
-    rtp_recent = get_recent_rtp(db, game_id)
+    if RESULT_TRACKER.warmed:
+        # 시작 시 DB에서 채우고 game_results를 id 순으로 따라가는 메모리 추적기. 이 워커가 결과를 커밋했거나
+        # RESULT_TRACKER_SYNC_SEC이 지났을 때만 새 행을 읽고(모든 워커의 결과 반영), 그 밖의 베팅은 조회 0회.
+        RESULT_TRACKER.sync()
+        win_streak, lose_streak = RESULT_TRACKER.streak(user.id, game_id)
+        rtp_recent = RESULT_TRACKER.recent_rtp(game_id)
+    else:
+        win_streak, lose_streak = get_user_streak(db, user.id, game_id)
+        rtp_recent = get_recent_rtp(db, game_id)
     return {
         "user_id": user.id,
         "game_id": game_id,
@@ -3039,11 +3337,7 @@ def run_baccarat_round(
     bet_split: dict | None = None,
 ) -> schemas.GameResponse:
     base_result, multiplier, detail = play_baccarat_logic(bet_choice, setting_dict, None)
-    setting_obj = (
-        db.query(models.GameSetting)
-        .filter(models.GameSetting.game_id == "baccarat")
-        .first()
-    )
+    setting_obj = SETTINGS_CACHE.game("baccarat")
     rules = parse_bias_rules(setting_obj) if setting_obj else []
     bias_ctx = build_bias_context(db, current_user, "baccarat", bet_amount, bet_choice)
     result, multiplier, applied_rule = apply_bias("baccarat", bet_amount, base_result, multiplier, rules, bias_ctx)
@@ -3084,61 +3378,20 @@ def apply_bias(
     bet_amount: int,
     result: str,
     multiplier: float,
-    rules: list[dict],
+    rules: CompiledBiasRules | list[dict],
     context: dict,
 ) -> tuple[str, float, dict]:
-    applied_rule = None
     now_ts = time.time()
-    sorted_rules = sorted(rules, key=lambda r: r.get("priority", 0), reverse=True)
-    for rule in sorted_rules:
-        if not rule.get("enabled", True):
-            continue
-        games = rule.get("games")
-        if games and game_id not in games:
-            continue
-        bet_min = rule.get("bet_min", 0)
-        bet_max = rule.get("bet_max", 10**12)
-        if bet_amount < bet_min or bet_amount > bet_max:
-            continue
-        choice_in = rule.get("bet_choices")
-        if choice_in and context.get("bet_choice") not in choice_in:
-            continue
-        streak_win = rule.get("streak_win_at_least", 0)
-        streak_lose = rule.get("streak_lose_at_least", 0)
-        if streak_win and context.get("win_streak", 0) < streak_win:
-            continue
-        if streak_lose and context.get("lose_streak", 0) < streak_lose:
-            continue
-        target_rtp = rule.get("target_rtp")
-        rtp_recent = context.get("rtp_recent")
-        direction = rule.get("direction")
-        if direction not in ("house", "player"):
-            continue
-        if target_rtp is not None and rtp_recent is not None:
-            if direction == "house" and rtp_recent <= target_rtp:
-                continue
-            if direction == "player" and rtp_recent >= target_rtp:
-                continue
-        cooldown = rule.get("cooldown_sec", 0)
-        rule_id = str(rule.get("id") or rule.get("name") or hash(json.dumps(rule, sort_keys=True)))
-        last_applied = BIAS_COOLDOWN_STATE.get(rule_id, 0)
-        if cooldown and now_ts - last_applied < cooldown:
-            continue
-        prob = float(rule.get("probability", rule.get("weight", 0)))
-        if prob <= 0:
-            continue
-        if random.random() >= prob:
-            continue
-        applied_rule = rule | {"rule_id": rule_id}
-        if direction == "house" and result == "win":
-            result = "lose"
-            multiplier = 0.0
-        elif direction == "player" and result == "lose":
-            result = "win"
-            multiplier = rule.get("win_multiplier", max(multiplier, 1.0))
-        BIAS_COOLDOWN_STATE[rule_id] = now_ts
-        break
-    return result, multiplier, applied_rule or {}
+    rule = compile_bias_rules(rules).select(game_id, bet_amount, context, BIAS_COOLDOWNS, now_ts, random.random)
+    if rule is None:
+        return result, multiplier, {}
+    if rule.direction == "house" and result == "win":
+        result = "lose"
+        multiplier = 0.0
+    elif rule.direction == "player" and result == "lose":
+        result = "win"
+        multiplier = rule.win_multiplier if rule.win_multiplier is not None else max(multiplier, 1.0)
+    return result, multiplier, rule.rule | {"rule_id": rule.rule_id}
 
 
 def baccarat_draw_card(deck: List[dict]) -> dict:
@@ -3353,7 +3606,9 @@ def update_game_settings(
         setting.bias_rules = json.dumps(item.bias_rules or [], ensure_ascii=False) if isinstance(item.bias_rules, list) else str(item.bias_rules or "[]")
         setting.updated_at = datetime.utcnow()
         updated_items.append(setting)
+    bump_settings_version(db)
     db.commit()
+    SETTINGS_CACHE.invalidate()
     # 응답 직렬화를 위해 문자열로 저장된 bias_rules를 리스트로 변환
     for s in updated_items:
         if isinstance(s.bias_rules, str):
@@ -3383,18 +3638,7 @@ def get_global_settings(db: Session = Depends(get_db), admin=Depends(require_adm
 
 @app.get("/api/public/global_settings", response_model=schemas.PublicGlobalSettingItem)
 def get_public_global_settings(db: Session = Depends(get_db)):
-    gs = db.query(models.GlobalSetting).filter(models.GlobalSetting.id == 1).first()
-    if not gs:
-        gs = models.GlobalSetting(
-            id=1,
-            min_bet=1,
-            max_bet=10000,
-            term_cycle_enabled=False,
-            neutral_bg_enabled=False,
-        )
-        db.add(gs)
-        db.commit()
-        db.refresh(gs)
+    gs = SETTINGS_CACHE.global_settings()
     return schemas.PublicGlobalSettingItem(
         term_cycle_enabled=bool(gs.term_cycle_enabled),
         neutral_bg_enabled=bool(gs.neutral_bg_enabled),
@@ -3416,6 +3660,8 @@ def update_global_settings(
     gs.term_cycle_enabled = bool(payload.term_cycle_enabled)
     gs.neutral_bg_enabled = bool(payload.neutral_bg_enabled)
     gs.updated_at = datetime.utcnow()
+    gs.settings_version = (gs.settings_version or 0) + 1
     db.commit()
+    SETTINGS_CACHE.invalidate()
     db.refresh(gs)
     return gs
@@ -0,0 +1,138 @@
+"""
+Offline maintenance for the server database. Run from the repository root while the server is stopped
+(or at least idle), since each command rewrites its table in one transaction:
+
+    python -m server.maintenance rebuild-stats        # recompute game_stats and ledger_summary from the raw tables
+    python -m server.maintenance check-ledger         # reconcile them, exit 1 on a mismatch
+    python -m server.maintenance check-ledger --fix   # ... and rebuild when they disagree
+    python -m server.maintenance compact-horse-details [--dry-run]  # drop stored horse timelines that replay faithfully
+"""
+import argparse
+import json
+import sys
+from typing import List
+
+from . import models
+from .aggregates import check_ledger, rebuild_game_stats, rebuild_ledger_summary
+from .database import Base, SessionLocal, engine
+from .horse_engine import HORSE_ENGINE, HORSE_ENGINE_VERSION, run_horse_race
+
+
+def _create_aggregate_tables() -> None:
+    Base.metadata.create_all(bind=engine, tables=[models.GameStat.__table__, models.LedgerSummary.__table__])
+
+
+def _cmd_rebuild_stats(args: argparse.Namespace) -> None:
+    _create_aggregate_tables()
+    db = SessionLocal()
+    try:
+        games = rebuild_game_stats(db)
+        totals = rebuild_ledger_summary(db)
+        db.commit()
+        for row in db.query(models.GameStat).order_by(models.GameStat.game_id).all():
+            print(
+                f"{row.game_id:<10} total={row.total:<8} win={row.player_wins:<8} lose={row.casino_wins:<8} "
+                f"tie={row.ties:<6} profit={row.bet_sum - row.payout_sum:.2f}"
+            )
+        print(f"rebuilt {games} games; ledger {totals}")
+    finally:
+        db.close()
+
+
+def _print_ledger_report(report: dict) -> None:
+    for name, diff in report["ledger"].items():
+        print(f"ledger {name:<16} stored={diff['stored']} actual={diff['actual']}")
+    for game_id, fields in report["games"].items():
+        for name, diff in fields.items():
+            print(f"game   {game_id}.{name:<12} stored={diff['stored']} actual={diff['actual']}")
+    print("ok" if report["ok"] else "MISMATCH")
+
+
+def _cmd_check_ledger(args: argparse.Namespace) -> None:
+    _create_aggregate_tables()
+    db = SessionLocal()
+    try:
+        report = check_ledger(db)
+        _print_ledger_report(report)
+        if not report["ok"] and args.fix:
+            rebuild_game_stats(db)
+            rebuild_ledger_summary(db)
+            db.commit()
+            report = check_ledger(db)
+            print("rebuilt;", "ok" if report["ok"] else "still MISMATCH")
+        if not report["ok"]:
+            sys.exit(1)
+    finally:
+        db.close()
+
+
+def _replays_faithfully(detail: dict) -> bool:
+    """True when the stored inputs regenerate the stored race (same engine version and winner)."""
+    if detail.get("race_seed") is None or not detail.get("horses"):
+        return False
+    if detail.get("engine_version", HORSE_ENGINE_VERSION) != HORSE_ENGINE_VERSION:
+        return False
+    horses = detail["horses"]
+    engine_name = detail.get("engine") or HORSE_ENGINE
+    winner_id, _, _, _ = run_horse_race(horses, detail.get("map_type", "oval"), int(detail["race_seed"]), engine_name, False)
+    return detail.get("winner_id") in (None, winner_id)
+
+
+def _cmd_compact_horse_details(args: argparse.Namespace) -> None:
+    """
+    Strip timeline/events from horse results and logs written before races were stored as inputs only.
+    A row keeps its stored race unless the replay endpoints can regenerate it from seed and horses.
+    """
+    db = SessionLocal()
+    try:
+        for model in (models.GameResult, models.GameLog):
+            compacted = kept = 0
+            rows = db.query(model).filter(model.game_id == "horse", model.detail.like('%"timeline"%'))
+            for row in rows.yield_per(500):
+                try:
+                    detail = json.loads(row.detail or "{}")
+                except ValueError:
+                    continue
+                if not isinstance(detail, dict) or "timeline" not in detail:
+                    continue
+                if not _replays_faithfully(detail):
+                    kept += 1
+                    continue
+                detail.pop("timeline", None)
+                detail.pop("events", None)
+                compacted += 1
+                if not args.dry_run:
+                    row.detail = json.dumps(detail, ensure_ascii=False)
+            print(f"{model.__tablename__:<13} compacted={compacted} kept={kept} (no faithful replay)")
+        if args.dry_run:
+            db.rollback()
+            print("dry run; nothing written")
+        else:
+            db.commit()
+    finally:
+        db.close()
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m server.maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = sub.add_parser("rebuild-stats", help="recompute game_stats and ledger_summary from the raw tables")
+    rebuild.set_defaults(func=_cmd_rebuild_stats)
+
+    check = sub.add_parser("check-ledger", help="reconcile ledger_summary/game_stats with game_results and adjustments")
+    check.add_argument("--fix", action="store_true", help="rebuild both tables when they disagree")
+    check.set_defaults(func=_cmd_check_ledger)
+
+    compact = sub.add_parser(
+        "compact-horse-details", help="drop stored horse timelines/events that the replay endpoints can regenerate"
+    )
+    compact.add_argument("--dry-run", action="store_true", help="only count the rows that would change")
+    compact.set_defaults(func=_cmd_compact_horse_details)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Float, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, String
 
 from .database import Base
 
@@ -18,6 +18,14 @@ class Session(Base):
 
 class GameResult(Base):
     __tablename__ = "game_results"
+    __table_args__ = (
+        # get_user_streak: user_id + game_id, newest first
+        Index("ix_game_results_user_game_ts", "user_id", "game_id", "timestamp"),
+        # get_recent_rtp / horse history: game_id, newest first
+        Index("ix_game_results_game_ts", "game_id", "timestamp"),
+        # admin dashboard / results feed: newest first over all games
+        Index("ix_game_results_timestamp", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=True)
@@ -29,11 +37,53 @@ class GameResult(Base):
     payout_multiplier = Column(Float, nullable=False)
     payout_amount = Column(Float, nullable=False)
     detail = Column(String, nullable=True)
+    race_seed = Column(Integer, index=True, nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 
+class GameStat(Base):
+    __tablename__ = "game_stats"
+    # running per-game totals of game_results, kept in step by server/aggregates.py
+
+    id = Column(Integer, primary_key=True, index=True)
+    game_id = Column(String, unique=True, nullable=False)
+    total = Column(Integer, default=0, nullable=False)
+    player_wins = Column(Integer, default=0, nullable=False)
+    casino_wins = Column(Integer, default=0, nullable=False)
+    ties = Column(Integer, default=0, nullable=False)
+    bet_sum = Column(Float, default=0.0, nullable=False)
+    payout_sum = Column(Float, default=0.0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class LedgerSummary(Base):
+    __tablename__ = "ledger_summary"
+    # single row (id=1): running totals behind get_profit_totals, kept in step by server/aggregates.py
+
+    id = Column(Integer, primary_key=True)
+    results = Column(Integer, default=0, nullable=False)
+    game_profit = Column(Float, default=0.0, nullable=False)
+    adjustments = Column(Integer, default=0, nullable=False)
+    adjustment_total = Column(Float, default=0.0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class PendingSession(Base):
+    __tablename__ = "pending_sessions"
+    # in-flight game sessions of the SQLite session store (server/session_store.py); expiry sweep
+    __table_args__ = (Index("ix_pending_sessions_expires", "namespace", "expires_at"),)
+
+    namespace = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=False)  # JSON
+    expires_at = Column(Float, nullable=False)  # unix time
+    created_at = Column(Float, nullable=False)
+
+
 class Transaction(Base):
     __tablename__ = "transactions"
+    # admin_user_transactions: user_id, newest first
+    __table_args__ = (Index("ix_transactions_user_created", "user_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False)
@@ -132,11 +182,15 @@ class GlobalSetting(Base):
     max_bet = Column(Integer, default=10000, nullable=False)
     term_cycle_enabled = Column(Boolean, default=False, nullable=False)
     neutral_bg_enabled = Column(Boolean, default=False, nullable=False)
+    # bumped with every game/global settings write; workers reload their settings cache on change
+    settings_version = Column(Integer, default=0, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 
 class GameLog(Base):
     __tablename__ = "game_logs"
+    # admin_game_logs / admin_active_games: newest first, optionally since a cutoff
+    __table_args__ = (Index("ix_game_logs_created", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=True)
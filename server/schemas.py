@@ -244,6 +244,7 @@ class HorseInfo(BaseModel):
     id: str
     name: str
     stats: HorseStatsModel | None = None
+    odds: float | None = None
 
 
 class HorseSessionCreateRequest(BaseModel):
@@ -252,7 +253,7 @@ class HorseSessionCreateRequest(BaseModel):
 
 class HorseSessionCreateResponse(BaseModel):
     session_id: str
-    seed: int
+    seed_commitment: str
     horses: List[HorseInfo]
     track_length: float
     laps: int
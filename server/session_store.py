@@ -0,0 +1,458 @@
+"""
+Stores for in-flight game sessions: updown rounds, slot/baccarat starts and horse sessions.
+
+Each store is one namespace with a default TTL and a size cap. ``put`` inserts or replaces an
+entry and restarts its TTL; expired entries are invisible to ``get``/``items`` and are removed by
+``evict``, which ``SessionSweeper`` runs in the background. ``evict`` also trims the entries
+closest to expiry above ``max_size`` and hands everything it removed to ``on_evict``; so does
+``pop`` when the entry it claims has just expired.
+
+Values are plain JSON-able dicts (datetimes allowed). Callers ``get`` a value, change it and
+``put`` it back; only the memory backend shares the object, so a change that is not put back is
+lost on the SQLite backend. When several requests (or worker processes) may touch the same entry,
+use the atomic operations instead: ``update`` runs a read-modify-write that is retried if the
+entry changed underneath it, ``pop`` claims an entry for exactly one caller and ``add`` inserts
+only if no live entry exists.
+
+Backends (``SESSION_STORE``):
+
+- ``sqlite`` (default): rows in ``pending_sessions`` on the app database, so pending games and
+  their already-deducted bets survive a restart.
+- ``memory``: a process-local dict; fastest, lost on restart, and only correct with a single
+  worker process since other workers cannot see it.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from . import models
+from .database import engine
+
+SESSION_STORE_BACKENDS = ("memory", "sqlite")
+SESSION_STORE_BACKEND = os.environ.get("SESSION_STORE", "sqlite").lower()
+SESSION_STORE_MAX = int(os.environ.get("SESSION_STORE_MAX", "10000"))
+SESSION_SWEEP_SEC = float(os.environ.get("SESSION_SWEEP_SEC", "30"))
+SESSION_UPDATE_RETRIES = 8
+if SESSION_STORE_BACKEND not in SESSION_STORE_BACKENDS:
+    raise ValueError(f"SESSION_STORE must be one of {', '.join(SESSION_STORE_BACKENDS)}")
+
+# (key, value, reason) with reason "expired" or "overflow"
+Evicted = Tuple[str, dict, str]
+
+
+class SessionConflict(RuntimeError):
+    """``update`` kept losing to concurrent writers of the same entry."""
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _json_object(obj: dict):
+    if len(obj) == 1 and "$dt" in obj:
+        return datetime.fromisoformat(obj["$dt"])
+    return obj
+
+
+def encode_session(value: dict) -> str:
+    return json.dumps(value, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_session(text: str) -> dict:
+    return json.loads(text, object_hook=_json_object)
+
+
+class SessionStore:
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        max_size: int = SESSION_STORE_MAX,
+        on_evict: Optional[Callable[[str, List[Evicted]], None]] = None,
+    ) -> None:
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_size = max_size
+        self.on_evict = on_evict
+
+    def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def put(self, key: str, value: dict, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def _pop(self, key: str) -> Optional[Tuple[float, dict]]:
+        raise NotImplementedError
+
+    def pop(self, key: str) -> Optional[dict]:
+        """
+        Remove and return a live entry; of several concurrent callers exactly one gets it. An
+        expired entry claimed here is reported to ``on_evict`` as the sweeper would have done,
+        and None is returned.
+        """
+        claimed = self._pop(key)
+        if claimed is None:
+            return None
+        expires_at, value = claimed
+        if expires_at > time.time():
+            return value
+        if self.on_evict is not None:
+            self.on_evict(self.namespace, [(key, value, "expired")])
+        return None
+
+    def add(self, key: str, value: dict, ttl: Optional[float] = None) -> bool:
+        """Insert unless a live entry exists; True if this call inserted it."""
+        raise NotImplementedError
+
+    def update(self, key: str, fn: Callable[[dict], Optional[dict]], ttl: Optional[float] = None) -> Optional[dict]:
+        """
+        Atomically replace a live entry with ``fn(value)`` and restart its TTL; returns the new
+        value, or None if there is no live entry. ``fn`` may run more than once (it is retried when
+        another writer got in first); it returns None to leave the entry as it is, or raises to
+        abort, and nothing is written in either case.
+        """
+        raise NotImplementedError
+
+    def items(self) -> List[Tuple[str, dict]]:
+        """Live entries, oldest first."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _evict(self, now: float) -> List[Evicted]:
+        raise NotImplementedError
+
+    def evict(self, now: Optional[float] = None) -> List[Evicted]:
+        """Remove expired and over-capacity entries and report them to ``on_evict``."""
+        evicted = self._evict(time.time() if now is None else now)
+        if evicted and self.on_evict is not None:
+            self.on_evict(self.namespace, evicted)
+        return evicted
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, dict]] = {}
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
+
+    def put(self, key: str, value: dict, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+
+    def _pop(self, key: str) -> Optional[Tuple[float, dict]]:
+        with self._lock:
+            return self._entries.pop(key, None)
+
+    def add(self, key: str, value: dict, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return False
+            self._entries[key] = (now + (self.ttl if ttl is None else ttl), value)
+        return True
+
+    def update(self, key: str, fn: Callable[[dict], Optional[dict]], ttl: Optional[float] = None) -> Optional[dict]:
+        with self._lock:
+            now = time.time()
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                return None
+            value = fn(entry[1])
+            if value is None:
+                return None
+            self._entries[key] = (now + (self.ttl if ttl is None else ttl), value)
+        return value
+
+    def items(self) -> List[Tuple[str, dict]]:
+        now = time.time()
+        return [(key, value) for key, (expires_at, value) in list(self._entries.items()) if expires_at > now]
+
+    def __len__(self) -> int:
+        return len(self.items())
+
+    def _evict(self, now: float) -> List[Evicted]:
+        with self._lock:
+            evicted = [(key, value, "expired") for key, (expires_at, value) in self._entries.items() if expires_at <= now]
+            for key, _, _ in evicted:
+                del self._entries[key]
+            overflow = len(self._entries) - self.max_size
+            if overflow > 0:
+                soonest = sorted(self._entries.items(), key=lambda item: item[1][0])[:overflow]
+                for key, (_, value) in soonest:
+                    del self._entries[key]
+                    evicted.append((key, value, "overflow"))
+        return evicted
+
+
+class SqliteSessionStore(SessionStore):
+    table = models.PendingSession.__table__
+
+    def get(self, key: str) -> Optional[dict]:
+        t = self.table
+        with engine.connect() as conn:
+            text = conn.execute(
+                select(t.c.value).where(t.c.namespace == self.namespace, t.c.key == key, t.c.expires_at > time.time())
+            ).scalar()
+        return decode_session(text) if text is not None else None
+
+    def put(self, key: str, value: dict, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        text = encode_session(value)
+        stmt = sqlite_insert(self.table).values(
+            namespace=self.namespace, key=key, value=text, expires_at=expires_at, created_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.table.c.namespace, self.table.c.key],
+            set_={"value": text, "expires_at": expires_at},
+        )
+        with engine.begin() as conn:
+            conn.execute(stmt)
+
+    def _pop(self, key: str) -> Optional[Tuple[float, dict]]:
+        t = self.table
+        with engine.begin() as conn:
+            row = conn.execute(
+                delete(t)
+                .where(t.c.namespace == self.namespace, t.c.key == key)
+                .returning(t.c.value, t.c.expires_at)
+            ).first()
+        return (row.expires_at, decode_session(row.value)) if row is not None else None
+
+    def add(self, key: str, value: dict, ttl: Optional[float] = None) -> bool:
+        t = self.table
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        text = encode_session(value)
+        # Only an expired row may be overwritten; RETURNING yields nothing when the row was live.
+        stmt = (
+            sqlite_insert(t)
+            .values(namespace=self.namespace, key=key, value=text, expires_at=expires_at, created_at=now)
+            .on_conflict_do_update(
+                index_elements=[t.c.namespace, t.c.key],
+                set_={"value": text, "expires_at": expires_at, "created_at": now},
+                where=t.c.expires_at <= now,
+            )
+            .returning(t.c.key)
+        )
+        with engine.begin() as conn:
+            return conn.execute(stmt).first() is not None
+
+    def update(self, key: str, fn: Callable[[dict], Optional[dict]], ttl: Optional[float] = None) -> Optional[dict]:
+        t = self.table
+        row = (t.c.namespace == self.namespace) & (t.c.key == key)
+        for _ in range(SESSION_UPDATE_RETRIES):
+            with engine.connect() as conn:
+                text = conn.execute(select(t.c.value).where(row, t.c.expires_at > time.time())).scalar()
+            if text is None:
+                return None
+            value = fn(decode_session(text))
+            if value is None:
+                return None
+            # Compare-and-swap on the stored text: loses (and retries) if anyone wrote in between.
+            stmt = (
+                t.update()
+                .where(row, t.c.value == text)
+                .values(value=encode_session(value), expires_at=time.time() + (self.ttl if ttl is None else ttl))
+            )
+            with engine.begin() as conn:
+                if conn.execute(stmt).rowcount:
+                    return value
+        raise SessionConflict(f"{self.namespace}:{key} changed {SESSION_UPDATE_RETRIES} times during update")
+
+    def items(self) -> List[Tuple[str, dict]]:
+        t = self.table
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(t.c.key, t.c.value)
+                .where(t.c.namespace == self.namespace, t.c.expires_at > time.time())
+                .order_by(t.c.created_at)
+            ).all()
+        return [(key, decode_session(text)) for key, text in rows]
+
+    def __len__(self) -> int:
+        t = self.table
+        with engine.connect() as conn:
+            return conn.execute(
+                select(func.count()).where(t.c.namespace == self.namespace, t.c.expires_at > time.time())
+            ).scalar()
+
+    def _evict(self, now: float) -> List[Evicted]:
+        t = self.table
+        mine = t.c.namespace == self.namespace
+        with engine.begin() as conn:
+            rows = conn.execute(delete(t).where(mine, t.c.expires_at <= now).returning(t.c.key, t.c.value)).all()
+            evicted = [(key, decode_session(text), "expired") for key, text in rows]
+            overflow = conn.execute(select(func.count()).where(mine)).scalar() - self.max_size
+            if overflow > 0:
+                soonest = select(t.c.key).where(mine).order_by(t.c.expires_at).limit(overflow)
+                rows = conn.execute(
+                    delete(t).where(mine, t.c.key.in_(soonest)).returning(t.c.key, t.c.value)
+                ).all()
+                evicted.extend((key, decode_session(text), "overflow") for key, text in rows)
+        return evicted
+
+
+def make_session_store(namespace: str, ttl: float, **kwargs) -> SessionStore:
+    store_type = SqliteSessionStore if SESSION_STORE_BACKEND == "sqlite" else MemorySessionStore
+    return store_type(namespace, ttl, **kwargs)
+
+
+class SessionSweeper:
+    """Daemon thread that runs ``evict`` on every registered store each ``interval`` seconds."""
+
+    def __init__(self, stores: List[SessionStore], interval: float = SESSION_SWEEP_SEC, logger=None) -> None:
+        self.stores = stores
+        self.interval = interval
+        self.logger = logger
+        self.evicted = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sweep(self) -> int:
+        count = 0
+        for store in self.stores:
+            try:
+                count += len(store.evict())
+            except Exception:
+                if self.logger is not None:
+                    self.logger.exception("Session sweep failed for %s", store.namespace)
+        self.evicted += count
+        return count
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sweep()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "backend": SESSION_STORE_BACKEND,
+            "interval": self.interval,
+            "evicted": self.evicted,
+            "stores": {store.namespace: len(store) for store in self.stores},
+        }
+
+
+class DeadlineTimer:
+    """
+    Calls ``on_expire(key)`` from a daemon thread once the key's deadline (unix time) passes.
+
+    Deadlines sit in a min-heap with lazy deletion: ``schedule`` pushes an entry (O(log n)) and
+    records it as the key's current deadline, ``cancel`` only forgets the key, and superseded
+    entries are dropped when they reach the top. The heap is rebuilt from the live deadlines when
+    stale entries outnumber them. The thread sleeps until the earliest deadline and is woken early
+    when a sooner one is scheduled.
+    """
+
+    def __init__(self, on_expire: Callable[[str], None], name: str = "deadline-timer", logger=None) -> None:
+        self.on_expire = on_expire
+        self.name = name
+        self.logger = logger
+        self.expired = 0
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, key: str, deadline: float) -> None:
+        with self._cond:
+            self._deadlines[key] = deadline
+            heapq.heappush(self._heap, (deadline, key))
+            if len(self._heap) > 2 * len(self._deadlines) + 64:
+                self._heap = [(when, item) for item, when in self._deadlines.items()]
+                heapq.heapify(self._heap)
+            if self._heap[0] == (deadline, key):
+                self._cond.notify()
+
+    def cancel(self, key: str) -> None:
+        with self._cond:
+            self._deadlines.pop(key, None)
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """Keys whose current deadline is at or before ``now``; they are no longer scheduled."""
+        now = time.time() if now is None else now
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, key = heapq.heappop(self._heap)
+                if self._deadlines.get(key) == deadline:
+                    del self._deadlines[key]
+                    due.append(key)
+        return due
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                wait = self._heap[0][0] - time.time() if self._heap else None
+                if wait is None or wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            for key in self.pop_due():
+                try:
+                    self.on_expire(key)
+                    self.expired += 1
+                except Exception:
+                    if self.logger is not None:
+                        self.logger.exception("%s failed for %s", self.name, key)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            return {"scheduled": len(self._deadlines), "heap": len(self._heap), "expired": self.expired}
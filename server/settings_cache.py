@@ -0,0 +1,115 @@
+"""
+Process-wide cache of GameSetting / GlobalSetting snapshots.
+
+Snapshots are immutable namedtuples with the model's column names, so bet handlers keep reading
+``setting.min_bet`` as before but without a query. ``global_settings.settings_version`` is bumped
+in the same transaction as every settings write (``bump_settings_version``); the writing process
+drops its cache right after the commit, and every other worker process notices the new version
+on its next check, at most ``SETTINGS_CACHE_CHECK_SEC`` later. Between checks reads cost no query.
+
+The slot jackpot pool lives in game_settings but is not a setting: it changes every round and is
+updated with SQL (see play_slot_logic), so the snapshot's ``jackpot_pool`` is only the value at load.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+SETTINGS_CACHE_CHECK_SEC = float(os.environ.get("SETTINGS_CACHE_CHECK_SEC", "1.0"))
+
+GameSettingSnapshot = namedtuple(
+    "GameSettingSnapshot", [column.key for column in models.GameSetting.__table__.columns]
+)
+GlobalSettingSnapshot = namedtuple(
+    "GlobalSettingSnapshot", [column.key for column in models.GlobalSetting.__table__.columns]
+)
+
+
+def _snapshot(row, snapshot_type):
+    return snapshot_type(**{name: getattr(row, name) for name in snapshot_type._fields})
+
+
+def bump_settings_version(db: Session) -> None:
+    """Mark settings as changed; call inside the transaction that writes them."""
+    setting = models.GlobalSetting
+    db.query(setting).filter(setting.id == 1).update(
+        {setting.settings_version: setting.settings_version + 1}, synchronize_session=False
+    )
+
+
+class SettingsCache:
+    def __init__(self, check_sec: float = SETTINGS_CACHE_CHECK_SEC) -> None:
+        self.check_sec = check_sec
+        self.version: Optional[int] = None
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._games: Dict[str, GameSettingSnapshot] = {}
+        self._global: Optional[GlobalSettingSnapshot] = None
+        self._checked = 0.0
+
+    def _load(self) -> None:
+        db = SessionLocal()
+        try:
+            gs = db.get(models.GlobalSetting, 1)
+            if gs is None:
+                try:
+                    db.add(models.GlobalSetting(id=1, min_bet=1, max_bet=10000, settings_version=0))
+                    db.commit()
+                except IntegrityError:
+                    # another worker created it first
+                    db.rollback()
+                gs = db.get(models.GlobalSetting, 1)
+            games = {row.game_id: _snapshot(row, GameSettingSnapshot) for row in db.query(models.GameSetting).all()}
+            global_snapshot = _snapshot(gs, GlobalSettingSnapshot)
+        finally:
+            db.close()
+        with self._lock:
+            self._games = games
+            self._global = global_snapshot
+            self.version = global_snapshot.settings_version
+            self._checked = time.monotonic()
+            self.loads += 1
+
+    def _refresh(self) -> None:
+        if self.version is None:
+            self._load()
+            return
+        now = time.monotonic()
+        if now - self._checked < self.check_sec:
+            return
+        # Claim the check so concurrent readers keep using the current snapshot meanwhile.
+        self._checked = now
+        db = SessionLocal()
+        try:
+            version = (
+                db.query(models.GlobalSetting.settings_version).filter(models.GlobalSetting.id == 1).scalar()
+            )
+        finally:
+            db.close()
+        if version != self.version:
+            self._load()
+
+    def game(self, game_id: str) -> Optional[GameSettingSnapshot]:
+        self._refresh()
+        return self._games.get(game_id)
+
+    def global_settings(self) -> GlobalSettingSnapshot:
+        self._refresh()
+        return self._global
+
+    def invalidate(self) -> None:
+        """Reload on the next read; the process that committed a settings change calls this."""
+        self.version = None
+
+    def stats(self) -> dict:
+        return {"version": self.version, "games": len(self._games), "loads": self.loads, "check_sec": self.check_sec}
+
+
+SETTINGS_CACHE = SettingsCache()
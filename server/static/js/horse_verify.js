@@ -43,6 +43,7 @@
     metaArea.innerHTML = `
       <div><strong>Game ID:</strong> ${payload.id}</div>
       <div><strong>Seed:</strong> ${payload.seed}</div>
+      <div><strong>Commitment:</strong> ${d.seed_commitment || '-'} (sha256 "${payload.seed}:${d.seed_salt || ''}")</div>
       <div><strong>Winner:</strong> ${d.winner_id || '-'}</div>
       <div><strong>Picked:</strong> ${d.bet_choice || '-'}</div>
       <div><strong>Bet:</strong> ${payload.bet_amount} / Result: ${payload.result} / Payout: ${payload.payout_amount}</div>
@@ -53,7 +54,7 @@
 
   const renderReplay = (detail) => {
     const horses = detail.horses || [];
-    const timeline = detail.timeline || [];
+    const timeline = decodeHorseTimeline(detail.timeline);
     const events = detail.events || [];
     const winnerId = detail.winner_id;
     const pickedId = detail.bet_choice;
@@ -107,7 +108,9 @@
     let nextEventIdx = 0;
 
     const formatEventText = (ev) => {
-      const time = Number.isFinite(ev.t) ? ev.t.toFixed(2) : (ev.t ?? '-');
+      let time = Number.isFinite(ev.t) ? ev.t.toFixed(2) : (ev.t ?? '-');
+      // events_version 2: SLIP/HEATCAP은 t~t_end 구간 이벤트(mag는 구간 최대값)
+      if (Number.isFinite(ev.t_end) && ev.t_end > ev.t) time = `${time}~${ev.t_end.toFixed(2)}`;
       const horseName = horseNameById.get(ev.horse_id) || ev.horse_id || '-';
       const note = ev.note || ev.kind || 'event';
       const mag = Number.isFinite(ev.mag) ? ` (${ev.mag.toFixed(3)})` : '';
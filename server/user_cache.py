@@ -0,0 +1,145 @@
+"""
+Caches behind the authentication dependencies in main.py.
+
+- ``TOKEN_CACHE``: bearer token -> user id for ``AUTH_CACHE_SEC`` (never past the token's own
+  expiry), so a repeated token skips the HMAC check.
+- ``USER_CACHE``: user id -> ``UserSnapshot`` (immutable, the users columns) for ``USER_CACHE_SEC``.
+  Read-only endpoints (``get_current_identity``) use it and run no query on a hit.
+
+Every flush that updates or deletes a User row marks the id, and the snapshot is dropped right
+after that transaction commits. A load that overlaps such a commit is not cached (per-id
+generation check), so this process never keeps a pre-commit row. Other worker processes drop
+their copy only when its TTL runs out; that TTL is the staleness bound of read-only endpoints.
+Endpoints that change a balance do not use snapshots: ``get_current_user`` loads the row fresh
+and ``apply_balance_change`` serializes the change itself with a conditional UPDATE.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+AUTH_CACHE_SEC = float(os.environ.get("AUTH_CACHE_SEC", "60"))
+USER_CACHE_SEC = float(os.environ.get("USER_CACHE_SEC", "2"))
+AUTH_CACHE_MAX = int(os.environ.get("AUTH_CACHE_MAX", "10000"))
+
+UserSnapshot = namedtuple("UserSnapshot", [column.key for column in models.User.__table__.columns])
+
+
+def user_snapshot(user: models.User) -> UserSnapshot:
+    return UserSnapshot(**{name: getattr(user, name) for name in UserSnapshot._fields})
+
+
+class TtlCache:
+    """Small LRU with a per-entry expiry; the oldest entries go first once ``max_size`` is reached."""
+
+    def __init__(self, ttl: float, max_size: int = AUTH_CACHE_MAX) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[object, tuple]" = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, object]:
+        return {"size": len(self._entries), "ttl": self.ttl, "hits": self.hits, "misses": self.misses}
+
+
+class UserCache(TtlCache):
+    def __init__(self, ttl: float = USER_CACHE_SEC, max_size: int = AUTH_CACHE_MAX) -> None:
+        super().__init__(ttl, max_size)
+        self._generations: Dict[int, int] = {}
+
+    def load(self, user_id: int, loader: Callable[[int], Optional[UserSnapshot]]) -> Optional[UserSnapshot]:
+        """Cached snapshot, or ``loader(user_id)`` cached unless the user changed while it ran."""
+        snapshot = self.get(user_id)
+        if snapshot is not None:
+            return snapshot
+        generation = self._generations.get(user_id, 0)
+        snapshot = loader(user_id)
+        if snapshot is not None:
+            with self._lock:
+                current = self._generations.get(user_id, 0) == generation
+            if current:
+                self.put(user_id, snapshot)
+        return snapshot
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+
+
+TOKEN_CACHE = TtlCache(AUTH_CACHE_SEC)
+USER_CACHE = UserCache()
+
+def load_user_snapshot(user_id: int) -> Optional[UserSnapshot]:
+    db = SessionLocal()
+    try:
+        user = db.get(models.User, user_id)
+        return user_snapshot(user) if user is not None else None
+    finally:
+        db.close()
+
+
+def mark_user_changed(session: Session, user_id: int) -> None:
+    """Drop ``user_id``'s snapshot once ``session`` commits; for Core UPDATEs the mapper events miss."""
+    session.info.setdefault("changed_users", set()).add(user_id)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _mark_user_changed(mapper, connection, target: models.User) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        mark_user_changed(session, target.id)
+    else:
+        USER_CACHE.invalidate(target.id)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _drop_changed_users(session: Session) -> None:
+    for user_id in session.info.pop("changed_users", ()):
+        USER_CACHE.invalidate(user_id)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop("changed_users", None)
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Point the app database at a scratch file before any server module creates its engine.
+_DB_DIR = tempfile.mkdtemp(prefix="bet-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/test.db")
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from server import models
+from server.database import Base, SessionLocal, engine
+from server.main import apply_balance_change
+
+Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def user_id():
+    db = SessionLocal()
+    user = models.User(name="balance-test", pin="0000", balance=100, seed_balance=100)
+    db.add(user)
+    db.commit()
+    yield user.id
+    db.query(models.Transaction).filter_by(user_id=user.id).delete()
+    db.delete(user)
+    db.commit()
+    db.close()
+
+
+def test_insufficient_balance_leaves_the_row_alone(user_id):
+    db = SessionLocal()
+    user = db.get(models.User, user_id)
+    with pytest.raises(HTTPException) as exc:
+        apply_balance_change(db, user, "bet", delta_seed=-101)
+    assert exc.value.status_code == 400
+    apply_balance_change(db, user, "bet", delta_seed=-40, delta_exchange=15)
+    assert (user.seed_balance, user.exchange_balance, user.balance) == (60, 15, 75)
+    db.commit()
+    tx = db.query(models.Transaction).filter_by(user_id=user_id).one()
+    assert (tx.amount, tx.before_balance, tx.after_balance) == (-25, 100, 75)
+    db.close()
+
+
+def test_concurrent_bets_from_stale_rows_never_overdraw(user_id):
+    results = []
+    loaded = threading.Barrier(8)
+
+    def bet():
+        db = SessionLocal()
+        try:
+            user = db.get(models.User, user_id)  # every thread sees balance 100
+            loaded.wait()
+            apply_balance_change(db, user, "bet", delta_seed=-30)
+            db.commit()
+            results.append("ok")
+        except HTTPException as exc:
+            db.rollback()
+            results.append(exc.status_code)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=bet) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count("ok") == 3 and results.count(400) == 5
+    db = SessionLocal()
+    user = db.get(models.User, user_id)
+    assert (user.seed_balance, user.balance) == (10, 10)
+    txs = db.query(models.Transaction).filter_by(user_id=user_id).order_by(models.Transaction.id).all()
+    assert [(tx.before_balance, tx.after_balance) for tx in txs] == [(100, 70), (70, 40), (40, 10)]
+    db.close()
@@ -0,0 +1,46 @@
+import time
+
+from server.bias import SharedBiasCooldowns, compile_bias_rules
+from server.session_store import MemorySessionStore
+
+RULES = [{"id": "flip", "direction": "house", "probability": 1.0, "cooldown_sec": 60}]
+
+
+class CountingStore(MemorySessionStore):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        return super().get(key)
+
+    def add(self, key, value, ttl=None):
+        self.calls += 1
+        return super().add(key, value, ttl)
+
+
+def test_shared_cooldown_is_claimed_once_across_workers():
+    store = CountingStore("bias_cooldown", 0)
+    worker_a, worker_b = SharedBiasCooldowns(store), SharedBiasCooldowns(store)
+    rules = compile_bias_rules(RULES)
+
+    assert rules.select("slot", 10, {}, worker_a, 100.0, lambda: 0.0).rule_id == "flip"
+    # Worker b has not seen the claim yet: its draw wins, the claim loses and it learns the start time.
+    assert rules.select("slot", 10, {}, worker_b, 101.0, lambda: 0.0) is None
+    assert worker_b.last["flip"] == 100.0
+
+    calls = store.calls
+    for now in (102.0, 130.0, 159.0):
+        assert rules.select("slot", 10, {}, worker_a, now, lambda: 0.0) is None
+        assert rules.select("slot", 10, {}, worker_b, now, lambda: 0.0) is None
+    assert store.calls == calls  # rounds during a known cooldown never touch the store
+
+
+def test_shared_cooldown_reopens_after_it_expires():
+    store = CountingStore("bias_cooldown", 0)
+    cooldowns = SharedBiasCooldowns(store)
+    rules = compile_bias_rules([{**RULES[0], "cooldown_sec": 0.01}])
+    assert rules.select("slot", 10, {}, cooldowns, 1.0, lambda: 0.0) is not None
+    time.sleep(0.02)
+    assert rules.select("slot", 10, {}, cooldowns, 2.0, lambda: 0.0) is not None
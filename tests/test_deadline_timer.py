@@ -0,0 +1,57 @@
+import threading
+import time
+
+from server.session_store import DeadlineTimer
+
+
+def test_pop_due_returns_keys_in_deadline_order():
+    timer = DeadlineTimer(lambda key: None)
+    for key, deadline in [("c", 30.0), ("a", 10.0), ("d", 40.0), ("b", 20.0)]:
+        timer.schedule(key, deadline)
+    assert timer.pop_due(5.0) == []
+    assert timer.pop_due(25.0) == ["a", "b"]
+    assert timer.pop_due(100.0) == ["c", "d"]
+    assert len(timer) == 0
+
+
+def test_reschedule_and_cancel_supersede_earlier_deadlines():
+    timer = DeadlineTimer(lambda key: None)
+    timer.schedule("a", 10.0)
+    timer.schedule("b", 20.0)
+    timer.schedule("a", 30.0)  # pushed back: the entry at 10 is stale
+    timer.schedule("c", 15.0)
+    timer.cancel("c")
+    assert timer.pop_due(25.0) == ["b"]
+    assert timer.pop_due(35.0) == ["a"]
+
+
+def test_heap_is_rebuilt_when_stale_entries_pile_up():
+    timer = DeadlineTimer(lambda key: None)
+    for k in range(1000):
+        timer.schedule("a", 1000.0 + k)
+    assert timer.stats()["heap"] < 100
+    assert timer.pop_due(1998.0) == []
+    assert timer.pop_due(1999.0) == ["a"]
+
+
+def test_thread_fires_in_deadline_order_and_wakes_for_sooner_deadlines():
+    fired = []
+    done = threading.Event()
+
+    def on_expire(key):
+        fired.append(key)
+        if len(fired) == 3:
+            done.set()
+
+    timer = DeadlineTimer(on_expire)
+    timer.start()
+    try:
+        now = time.time()
+        timer.schedule("late", now + 0.30)
+        timer.schedule("mid", now + 0.15)
+        timer.schedule("soon", now + 0.05)  # earlier than the one the thread is sleeping on
+        assert done.wait(2)
+    finally:
+        timer.stop()
+    assert fired == ["soon", "mid", "late"]
+    assert timer.stats()["expired"] == 3
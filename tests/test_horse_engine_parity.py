@@ -0,0 +1,28 @@
+import pytest
+
+from server.horse_engine import HORSE_DT, generate_horse_pool, iter_horse_race, run_horse_race, simulate_horse_batch
+
+
+@pytest.mark.parametrize("field_size", [3, 8, 16])
+@pytest.mark.parametrize("record", [True, False])
+def test_numpy_engine_matches_python_seed_for_seed(field_size, record):
+    horses = generate_horse_pool(field_size * 31, field_size)
+    seed = field_size * 7919
+    expected = run_horse_race(horses, "oval", seed, "python", record)
+    assert run_horse_race(horses, "oval", seed, "numpy", record) == expected
+
+
+def test_numpy_engine_streams_the_same_chunks():
+    horses = generate_horse_pool(77, 6)
+    python_chunks = list(iter_horse_race(horses, "oval", 99, "python", chunk=40))
+    assert list(iter_horse_race(horses, "oval", 99, "numpy", chunk=40)) == python_chunks
+
+
+def test_batch_races_are_settlement_races():
+    horses = generate_horse_pool(5, 4)
+    seeds = [11, 12, 13]
+    finish = simulate_horse_batch(horses, "oval", seeds)
+    for row, seed in zip(finish.tolist(), seeds):
+        times = run_horse_race(horses, "oval", seed, "python", record=False)[3]["finish_times"]
+        # One tick of slack: NumPy's vectorized pow may round a last bit differently from libm.
+        assert row == pytest.approx([times[h["id"]] for h in horses], abs=HORSE_DT)
@@ -0,0 +1,41 @@
+import pytest
+
+from server.horse_engine import (
+    HORSE_TIMELINE_ENCODING,
+    decode_horse_timeline,
+    encode_horse_timeline,
+    generate_horse_pool,
+    run_horse_race,
+)
+
+FIELDS = ("positions", "speeds", "energy", "heat")
+
+
+@pytest.mark.parametrize("field_size", [2, 4, 8])
+def test_timeline_round_trip_within_quantization(field_size):
+    horses = generate_horse_pool(11, field_size)
+    timeline = run_horse_race(horses, "oval", 4242)[3]["timeline"]
+    encoded = encode_horse_timeline(timeline)
+    assert encoded["encoding"] == HORSE_TIMELINE_ENCODING
+    decoded = decode_horse_timeline(encoded)
+    assert len(decoded) == len(timeline)
+    for original, restored in zip(timeline, decoded):
+        assert restored["t"] == pytest.approx(original["t"], abs=0.005)
+        for name in FIELDS:
+            assert restored[name] == pytest.approx(original[name], abs=0.005)
+
+
+def test_timeline_round_trip_handles_wide_deltas():
+    timeline = [
+        {"t": 0.2, "positions": [0.0, 1.0], "speeds": [0.0, 0.0], "energy": [1.0, 1.0], "heat": [0.0, 0.0]},
+        {"t": 0.4, "positions": [1999.99, -5.5], "speeds": [30.0, 0.0], "energy": [0.0, 1.0], "heat": [3.25, 0.0]},
+        {"t": 0.6, "positions": [2000.0, 0.0], "speeds": [0.0, 12.5], "energy": [0.5, 0.0], "heat": [0.0, 9.0]},
+    ]
+    decoded = decode_horse_timeline(encode_horse_timeline(timeline))
+    for original, restored in zip(timeline, decoded):
+        for name in FIELDS:
+            assert restored[name] == pytest.approx(original[name], abs=0.005)
+
+
+def test_empty_timeline_round_trips():
+    assert decode_horse_timeline(encode_horse_timeline([])) == []
@@ -0,0 +1,84 @@
+import pytest
+from fastapi import HTTPException
+
+from server import main, models, schemas
+from server.database import Base, SessionLocal, engine
+from server.settings_cache import SETTINGS_CACHE
+
+Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def user_id():
+    db = SessionLocal()
+    if db.query(models.GameSetting).filter_by(game_id="slot").first() is None:
+        db.add(models.GameSetting(game_id="slot"))
+    user = models.User(name="resolve-test", pin="0000", balance=90, seed_balance=90)
+    db.add(user)
+    db.commit()
+    SETTINGS_CACHE.invalidate()
+    yield user.id
+    for model in (models.GameResult, models.GameLog, models.Transaction):
+        db.query(model).filter_by(user_id=user.id).delete()
+    db.delete(user)
+    db.commit()
+    db.close()
+
+
+def test_failed_resolve_puts_the_session_back(user_id, monkeypatch):
+    pending = {"user_id": user_id, "bet_amount": 10, "bet_split": {"seed": 10, "charge": 0, "exchange": 0}}
+    main.SLOT_PENDING.put("resolve-fails", pending)
+
+    def fail(*args, **kwargs):
+        raise HTTPException(status_code=400, detail="rejected")
+
+    monkeypatch.setattr(main, "run_slot_round", fail)
+    db = SessionLocal()
+    try:
+        user = db.get(models.User, user_id)
+        with pytest.raises(HTTPException):
+            main.api_game_slot_resolve(schemas.SessionResolveRequest(session_id="resolve-fails"), user, db)
+    finally:
+        db.close()
+    assert main.SLOT_PENDING.pop("resolve-fails") == pending
+
+
+def _settling_horse_session(user_id, settling_at):
+    seed = 20240611
+    return {
+        "user_id": user_id,
+        "bet_amount": 10,
+        "bet_split": {"seed": 10, "charge": 0, "exchange": 0},
+        "seed": seed,
+        "horses": main.generate_horse_pool(seed),
+        "map_type": "oval",
+        "status": "SETTLING",
+        "selected_horse": "h1",
+        "settling_at": settling_at,
+    }
+
+
+def _horse_result(session_id):
+    db = SessionLocal()
+    try:
+        return db.query(models.GameResult).filter_by(session_key=session_id).one()
+    finally:
+        db.close()
+
+
+def test_evicted_horse_session_is_settled_from_its_seed(user_id):
+    sess = _settling_horse_session(user_id, main.datetime.utcnow())
+    winner_id = main.run_horse_race(sess["horses"], "oval", sess["seed"], record=False)[0]
+    main._on_sessions_evicted("horse", [("horse-evicted", dict(sess), "expired")])
+    result = _horse_result("horse-evicted")
+    assert result.result == ("win" if winner_id == "h1" else "lose")
+    assert main.HORSE_SESSIONS.get("horse-evicted")["status"] == "FINISHED"
+
+
+def test_stuck_settling_horse_session_is_settled_once(user_id):
+    stuck_since = main.datetime.utcnow() - main.timedelta(seconds=main.HORSE_SETTLING_GRACE + 1)
+    main.HORSE_SESSIONS.put("horse-stuck", _settling_horse_session(user_id, stuck_since))
+    main._expire_horse_session("horse-stuck")
+    main._expire_horse_session("horse-stuck")
+    assert _horse_result("horse-stuck").bet_amount == 10
+    assert "result_detail" in main.HORSE_SESSIONS.get("horse-stuck")
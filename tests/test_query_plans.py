@@ -0,0 +1,18 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from server.bench import _hot_queries, check_query_plans
+
+HOT_QUERIES = [name for name, _, _ in _hot_queries(Session())]
+
+
+@pytest.fixture(scope="module")
+def plans():
+    return {row["query"]: row for row in check_query_plans(2000)}
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_its_index(plans, name):
+    row = plans[name]
+    assert any(row["index"] in step for step in row["plan"]), row["plan"]
+    assert not any("TEMP B-TREE" in step for step in row["plan"]), row["plan"]
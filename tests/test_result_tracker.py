@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, insert, update
+
+from server import models
+from server.aggregates import RESULT_TRACKER, ResultTracker, record_game_stat, rebuild_ledger_summary
+from server.database import DATABASE_URL, Base, SessionLocal, engine
+
+Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    session.query(models.GameResult).delete()
+    rebuild_ledger_summary(session)
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def other_worker():
+    """A second engine, so its commits do not go through this process's SessionLocal hooks."""
+    other = create_engine(DATABASE_URL)
+
+    def commit_result(user_id, game_id, result, bet=10.0, payout=0.0):
+        with other.begin() as conn:
+            conn.execute(
+                insert(models.GameResult).values(
+                    user_id=user_id, session_key="w2", game_id=game_id, bet_amount=bet, result=result,
+                    payout_multiplier=payout / bet, payout_amount=payout, timestamp=datetime.utcnow(),
+                )
+            )
+            ledger = models.LedgerSummary
+            conn.execute(update(ledger).where(ledger.id == 1).values(results=ledger.results + 1))
+
+    yield commit_result
+    other.dispose()
+
+
+def _commit_local(db, user_id, game_id, result, bet=10.0, payout=0.0):
+    db.add(
+        models.GameResult(
+            user_id=user_id, session_key="w1", game_id=game_id, bet_amount=bet, result=result,
+            payout_multiplier=payout / bet, payout_amount=payout, timestamp=datetime.utcnow(),
+        )
+    )
+    record_game_stat(db, game_id, result, bet, payout, user_id=user_id)
+    db.commit()
+
+
+def test_sync_sees_rounds_committed_by_other_workers(db, other_worker):
+    tracker = ResultTracker(sync_sec=3600)
+    tracker.warm(db)
+    for _ in range(3):
+        other_worker(1, "slot", "lose")
+    tracker.sync()
+    assert tracker.streak(1, "slot") == (0, 0)  # not due yet: no local commit, interval not over
+    tracker.sync(force=True)
+    assert tracker.streak(1, "slot") == (0, 3)
+    other_worker(1, "slot", "win", payout=20.0)
+    tracker.sync(force=True)
+    assert tracker.streak(1, "slot") == (1, 0)
+    assert tracker.recent_rtp("slot") == pytest.approx(20.0 / 40.0)
+    assert tracker.rewarms == 0
+
+
+def test_local_commit_makes_the_next_sync_due(db):
+    RESULT_TRACKER.warm(db)
+    syncs = RESULT_TRACKER.syncs
+    _commit_local(db, 2, "baccarat", "win", payout=20.0)
+    _commit_local(db, 2, "baccarat", "win", payout=20.0)
+    RESULT_TRACKER.sync()
+    assert RESULT_TRACKER.streak(2, "baccarat") == (2, 0)
+    RESULT_TRACKER.sync()
+    assert RESULT_TRACKER.syncs == syncs + 1
+
+
+def test_deleted_results_trigger_a_rebuild(db, other_worker):
+    tracker = ResultTracker(sync_sec=3600)
+    other_worker(3, "slot", "lose")
+    other_worker(3, "slot", "lose")
+    tracker.warm(db)
+    assert tracker.streak(3, "slot") == (0, 2)
+    newest = db.query(models.GameResult).order_by(models.GameResult.id.desc()).first()
+    db.delete(newest)
+    rebuild_ledger_summary(db)
+    db.commit()
+    other_worker(3, "slot", "win", payout=20.0)  # may reuse the deleted id
+    tracker.sync(force=True)
+    assert tracker.rewarms == 1
+    assert tracker.streak(3, "slot") == (1, 0)
+    assert tracker.recent_rtp("slot") == pytest.approx(20.0 / 20.0)
@@ -0,0 +1,143 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from server import models
+from server.database import engine
+from server.session_store import MemorySessionStore, SessionConflict, SqliteSessionStore
+
+models.PendingSession.__table__.create(bind=engine, checkfirst=True)
+
+
+@pytest.fixture(params=[MemorySessionStore, SqliteSessionStore], ids=["memory", "sqlite"])
+def make_store(request):
+    created = []
+
+    def make(ttl=60.0, **kwargs):
+        store = request.param(f"test-{request.node.name}-{len(created)}", ttl, **kwargs)
+        created.append(store)
+        return store
+
+    yield make
+    for store in created:
+        for key, _ in store.items():
+            store.pop(key)
+
+
+def test_put_get_round_trips_datetimes(make_store):
+    store = make_store()
+    when = datetime(2024, 5, 1, 12, 30)
+    store.put("a", {"n": 1, "at": when, "nested": {"x": [1, 2]}})
+    assert store.get("a") == {"n": 1, "at": when, "nested": {"x": [1, 2]}}
+    assert "a" in store and "b" not in store
+
+
+def test_expired_entries_are_invisible_and_evicted(make_store):
+    seen = []
+    store = make_store(on_evict=lambda ns, evicted: seen.extend(evicted))
+    store.put("old", {"n": 1}, ttl=-1)
+    store.put("new", {"n": 2})
+    assert store.get("old") is None
+    assert [key for key, _ in store.items()] == ["new"]
+    assert store.evict() == [("old", {"n": 1}, "expired")]
+    assert seen == [("old", {"n": 1}, "expired")]
+    assert len(store) == 1
+
+
+def test_pop_of_an_expired_entry_goes_to_on_evict(make_store):
+    seen = []
+    store = make_store(on_evict=lambda ns, evicted: seen.extend(evicted))
+    store.put("old", {"n": 1}, ttl=-1)
+    assert store.pop("old") is None
+    assert seen == [("old", {"n": 1}, "expired")]
+    assert store.pop("old") is None and store.evict() == []
+    assert seen == [("old", {"n": 1}, "expired")]
+
+
+def test_evict_trims_entries_closest_to_expiry_over_max_size(make_store):
+    store = make_store(max_size=2)
+    store.put("soon", {"n": 1}, ttl=10)
+    store.put("late", {"n": 2}, ttl=100)
+    store.put("mid", {"n": 3}, ttl=50)
+    assert store.evict() == [("soon", {"n": 1}, "overflow")]
+    assert sorted(key for key, _ in store.items()) == ["late", "mid"]
+
+
+def test_pop_claims_once(make_store):
+    store = make_store()
+    store.put("a", {"n": 1})
+    assert store.pop("a") == {"n": 1}
+    assert store.pop("a") is None
+
+
+def test_add_inserts_only_over_missing_or_expired(make_store):
+    store = make_store()
+    assert store.add("a", {"n": 1})
+    assert not store.add("a", {"n": 2})
+    assert store.get("a") == {"n": 1}
+    store.put("b", {"n": 1}, ttl=-1)
+    assert store.add("b", {"n": 2})
+    assert store.get("b") == {"n": 2}
+
+
+def test_update_skips_missing_and_none(make_store):
+    store = make_store()
+    assert store.update("missing", lambda v: {"n": 1}) is None
+    store.put("a", {"n": 1})
+    assert store.update("a", lambda v: None) is None
+    assert store.update("a", lambda v: {**v, "n": v["n"] + 1}) == {"n": 2}
+    assert store.get("a") == {"n": 2}
+
+
+def test_update_restarts_ttl(make_store):
+    store = make_store()
+    store.put("a", {"n": 1}, ttl=0.2)
+    store.update("a", lambda v: v, ttl=60)
+    time.sleep(0.3)
+    assert store.get("a") == {"n": 1}
+
+
+def test_concurrent_updates_lose_nothing(make_store):
+    store = make_store()
+    store.put("a", {"n": 0})
+
+    def bump(_):
+        for _ in range(25):
+            while True:
+                try:
+                    store.update("a", lambda v: {"n": v["n"] + 1})
+                    break
+                except SessionConflict:
+                    continue
+
+    threads = [threading.Thread(target=bump, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get("a") == {"n": 100}
+
+
+def test_sqlite_update_retries_when_the_row_changes_underneath():
+    store = SqliteSessionStore("test-cas", 60)
+    store.put("a", {"n": 0})
+    calls = []
+
+    def fn(value):
+        calls.append(value["n"])
+        if len(calls) == 1:
+            store.put("a", {"n": 10})  # a concurrent writer wins the first round
+        return {"n": value["n"] + 1}
+
+    assert store.update("a", fn) == {"n": 11}
+    assert calls == [0, 10]
+
+    def always_loses(value):
+        store.put("a", {"n": value["n"] + 100})
+        return {"n": -1}
+
+    with pytest.raises(SessionConflict):
+        store.update("a", always_loses)
+    store.pop("a")
@@ -0,0 +1,35 @@
+// Benchmark driver for the TypeScript engine, spawned by `python -m server.bench golden`:
+//   npx tsx webclient/horse-sim/bench.ts corpus.json
+// Reads { races: [{ horses, seed }] }, runs every race on DEFAULT_TRACK and prints one JSON
+// line: { races, ticks, elapsed_ms, peak_heap_bytes, digest }.
+
+import { createHash } from "crypto";
+import { readFileSync } from "fs";
+import { DEFAULT_TRACK, DT, LAPS } from "./constants";
+import { simulateRace } from "./raceEngine";
+import { RaceHorseInput } from "./types";
+
+type Corpus = { races: { horses: RaceHorseInput[]; seed: number }[] };
+
+const corpus: Corpus = JSON.parse(readFileSync(process.argv[2], "utf8"));
+const hash = createHash("sha256");
+let ticks = 0;
+let peakHeap = process.memoryUsage().heapUsed;
+const started = performance.now();
+for (const race of corpus.races) {
+  const result = simulateRace(race.horses, DEFAULT_TRACK, race.seed, { laps: LAPS });
+  ticks += Math.round(Math.max(...result.finishTimes) / DT) + 1;
+  hash.update(JSON.stringify([result.winnerIndex, result.finishTimes, result.conditions]));
+  peakHeap = Math.max(peakHeap, process.memoryUsage().heapUsed);
+}
+const elapsedMs = performance.now() - started;
+
+console.log(
+  JSON.stringify({
+    races: corpus.races.length,
+    ticks,
+    elapsed_ms: elapsedMs,
+    peak_heap_bytes: peakHeap,
+    digest: hash.digest("hex").slice(0, 16),
+  })
+);
@@ -4,6 +4,7 @@ import { Track } from "./types";
 
 export const TRACK_LENGTH = 1000; // units (single lap)
 export const LAPS = 2;
+export const DEFAULT_LAPS = LAPS; // raceEngine default when RaceOptions.laps is unset
 
 export const TRACK_SEGMENTS: Track["segments"] = [
   { startFrac: 0.0, endFrac: 0.42, type: "straight" },
@@ -15,6 +15,8 @@ const API = {
   horseHeartbeat: "/api/horse/session/heartbeat",
   horseFinish: "/api/horse/session/finish",
   horseForfeit: "/api/horse/session/forfeit",
+  horseSession: "/api/horse/session",
+  horseReplay: "/api/horse/replay",
 };
 
 const withMarqueeControl = (cb) => {
@@ -75,7 +77,7 @@ let updownInProgress = false;
 let slotSessionId = null;
 let baccaratSessionId = null;
 let horseSessionId = null;
-let horseSessionSeed = null;
+let horseSessionCommitment = null;
 let horseSessionHorses = [];
 let horseHeartbeatTimer = null;
 let horseSessionStatus = "idle"; // idle | running
@@ -852,7 +854,7 @@ const startHorseFlow = async () => {
     }
     const data = await res.json();
     horseSessionId = data.session_id;
-    horseSessionSeed = data.seed;
+    horseSessionCommitment = data.seed_commitment;
     horseSessionHorses = data.horses || [];
     horseSessionStatus = "created";
     renderHorseSelection(horseSessionHorses, bet);
@@ -880,6 +882,7 @@ const resolveHorseFlow = async () => {
   selectionLocked = true;
   updateGameLock();
   horseSessionStatus = "running";
+  let stream = null;
   try {
     const res = await fetch(API.horseLock, {
       method: "POST",
@@ -892,13 +895,20 @@ const resolveHorseFlow = async () => {
     }
     const data = await res.json();
     updateBalanceDisplay(data);
+    // 정산 전 하트비트와 정산 후 경주 데이터를 한 스트림으로 받는다.
+    stream = openHorseStream(horseSessionId);
 
-    // Finish on server (authoritative)
-    const finishRes = await fetch(API.horseFinish, {
-      method: "POST",
-      headers: { "Content-Type": "application/json", ...auth.headers() },
-      body: JSON.stringify({ session_id: horseSessionId }),
-    });
+    // Finish on server (authoritative). 503은 경주 계산 대기열이 밀린 것이므로 잠시 후 재시도.
+    let finishRes = null;
+    for (let attempt = 0; attempt < 5; attempt += 1) {
+      finishRes = await fetch(API.horseFinish, {
+        method: "POST",
+        headers: { "Content-Type": "application/json", ...auth.headers() },
+        body: JSON.stringify({ session_id: horseSessionId }),
+      });
+      if (finishRes.status !== 503) break;
+      await sleep(1000);
+    }
     if (!finishRes.ok) {
       const msg = await finishRes.text();
       throw new Error(msg || "경마 결과 조회에 실패했습니다.");
@@ -906,11 +916,16 @@ const resolveHorseFlow = async () => {
     const payload = await finishRes.json();
     updateBalanceDisplay(payload);
 
-    renderHorseResult(payload.detail || {}, payload);
+    // 정산 응답에는 타임라인이 없으므로 재생 데이터는 세션 스트림으로 받으며 도착하는 대로 재생한다.
+    const detail = payload.detail || {};
+    if (detail.result_id) completeHorseStream(stream, detail.result_id);
+    else stream.done = true;
+    renderHorseResult({ ...detail, timeline: stream.timeline, events: stream.events }, payload, stream);
     horseSessionId = null;
     horseSessionStatus = "idle";
     // unlock은 애니메이션 완료 시 renderHorseResult에서 수행
   } catch (error) {
+    if (stream) stream.abort();
     horseSessionStatus = "idle";
     gameBoard.innerHTML = `<p class="text-danger">오류: ${error.message}</p>`;
     selectionLocked = false;
@@ -1008,7 +1023,7 @@ const resetSelection = () => {
   slotSessionId = null;
   baccaratSessionId = null;
   horseSessionId = null;
-  horseSessionSeed = null;
+  horseSessionCommitment = null;
   horseSessionHorses = [];
   horseSessionStatus = "idle";
   if (horseHeartbeatTimer) {
@@ -1127,6 +1142,7 @@ const renderHorseSelection = (horses, betValue) => {
             <input class="form-check-input" type="radio" name="horsePick" value="${h.id}" id="pick-${h.id}">
             <label class="form-check-label fw-bold" for="pick-${h.id}">${h.name}</label>
           </div>
+          <span class="badge text-bg-light">배당 ${h.odds ? `${Number(h.odds).toFixed(2)}x` : "3.00x"}</span>
         </div>
       </div>
     `
@@ -1148,9 +1164,67 @@ const renderHorseSelection = (horses, betValue) => {
   if (startBtn) startBtn.onclick = resolveHorseFlow;
 };
 
-const renderHorseResult = (detail, payload) => {
+// SSE 응답(fetch 스트림)을 읽어 이벤트마다 onEvent(name, data) 호출. 헤더 인증이 필요해 EventSource 대신 fetch 사용.
+const readEventStream = async (url, onEvent, signal = undefined) => {
+  const res = await fetch(url, { headers: auth.headers(), signal });
+  if (!res.ok || !res.body) throw new Error(await res.text());
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let cut = buffer.indexOf("\n\n");
+    while (cut >= 0) {
+      const block = buffer.slice(0, cut);
+      buffer = buffer.slice(cut + 2);
+      let name = "message";
+      let data = "";
+      block.split("\n").forEach((line) => {
+        if (line.startsWith("event: ")) name = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      });
+      if (data) onEvent(name, JSON.parse(data));
+      cut = buffer.indexOf("\n\n");
+    }
+  }
+};
+
+// 세션 스트림: 정산 전에는 하트비트, 정산 후에는 경주 chunk가 같은 연결로 온다.
+// stream.timeline은 renderHorseResult가 그대로 재생하므로 chunk가 도착하는 대로 이어 붙인다.
+const openHorseStream = (sessionId) => {
+  const controller = new AbortController();
+  const stream = { timeline: [], events: [], done: false, abort: () => controller.abort() };
+  stream.closed = readEventStream(`${API.horseSession}/${sessionId}/stream`, (name, data) => {
+    if (name === "chunk") {
+      stream.timeline.push(...decodeHorseTimeline(data.timeline));
+      stream.events.push(...(data.events || []));
+    } else if (name === "done") {
+      stream.done = true;
+    }
+  }, controller.signal).catch((error) => console.error(error));
+  return stream;
+};
+
+// 스트림이 끊겨 done을 받지 못했으면 리플레이 API로 전체 타임라인을 받아 채운다.
+const completeHorseStream = async (stream, resultId) => {
+  await stream.closed;
+  if (stream.done) return;
+  try {
+    const replayRes = await fetch(`${API.horseReplay}/${resultId}`);
+    if (replayRes.ok) {
+      const replay = await replayRes.json();
+      stream.timeline.splice(0, stream.timeline.length, ...decodeHorseTimeline(replay.detail?.timeline));
+    }
+  } finally {
+    stream.done = true;
+  }
+};
+
+const renderHorseResult = (detail, payload, stream = null) => {
   const horses = detail.horses || [];
-  const timeline = detail.timeline || [];
+  const timeline = decodeHorseTimeline(detail.timeline);
   const events = detail.events || [];
   const trackId = `horse-track-${Date.now()}`;
   const speedCtrlId = `${trackId}-speed`;
@@ -1327,8 +1401,10 @@ const renderHorseResult = (detail, payload) => {
     }
   };
 
+  const streamDone = () => !stream || stream.done;
+
   const playTimeline = () => {
-    if (!timeline.length) {
+    if (!timeline.length && streamDone()) {
       renderPositions(horses.map(() => finishDist));
       applyWinner();
       selectionLocked = false;
@@ -1336,10 +1412,20 @@ const renderHorseResult = (detail, payload) => {
       setGameMarqueePaused(false);
       return;
     }
-    const start = performance.now();
-    const lastT = timeline[timeline.length - 1].t || 0;
+    let start = null;
 
     const step = (now) => {
+      // 스트리밍 중이면 첫 chunk가 올 때까지 기다렸다가 받은 구간까지만 재생한다.
+      if (!timeline.length) {
+        if (streamDone()) {
+          playTimeline();
+          return;
+        }
+        requestAnimationFrame(step);
+        return;
+      }
+      if (start === null) start = now;
+      const lastT = timeline[timeline.length - 1].t || 0;
       const elapsed = (now - start) / 1000;
       const simT = Math.min(lastT, elapsed * speedMult);
       let prev = timeline[0];
@@ -1359,7 +1445,7 @@ const renderHorseResult = (detail, payload) => {
       });
       renderPositions(interp);
 
-      if (simT >= lastT - 1e-3) {
+      if (streamDone() && simT >= lastT - 1e-3) {
         renderPositions(next.positions || interp);
         applyWinner();
         selectionLocked = false;
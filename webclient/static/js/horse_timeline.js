@@ -0,0 +1,39 @@
+// qdelta-v1 경마 타임라인 디코더. 게임 화면(app.js)과 검증 페이지(horse_verify.js)가 함께 쓴다.
+// 서버 인코더는 server/horse_engine.py의 encode_horse_timeline.
+const HORSE_TIMELINE_FIELDS = ["positions", "speeds", "energy", "heat"];
+const HORSE_TIMELINE_WIDTHS = { i1: 1, i2: 2, i4: 4 };
+
+// 서버의 qdelta-v1 타임라인(필드별 정수 delta + base64)을 {t, positions, speeds, energy, heat} 배열로 복원
+const decodeHorseTimeline = (timeline) => {
+  if (!timeline) return [];
+  if (Array.isArray(timeline)) return timeline;
+  if (timeline.encoding !== "qdelta-v1") throw new Error(`unknown timeline encoding: ${timeline.encoding}`);
+  const samples = timeline.samples || 0;
+  const columns = {};
+  Object.entries(timeline.fields || {}).forEach(([name, field]) => {
+    const base = field.base || [];
+    const width = base.length;
+    const bin = atob(field.data || "");
+    const bytes = new Uint8Array(bin.length);
+    for (let i = 0; i < bin.length; i += 1) bytes[i] = bin.charCodeAt(i);
+    const view = new DataView(bytes.buffer);
+    const size = HORSE_TIMELINE_WIDTHS[field.dtype];
+    const read = size === 1 ? (o) => view.getInt8(o) : size === 2 ? (o) => view.getInt16(o, true) : (o) => view.getInt32(o, true);
+    const acc = base.slice();
+    const rows = samples ? [acc.map((v) => v / field.scale)] : [];
+    for (let r = 1; r < samples; r += 1) {
+      for (let c = 0; c < width; c += 1) acc[c] += read(((r - 1) * width + c) * size);
+      rows.push(acc.map((v) => v / field.scale));
+    }
+    columns[name] = rows;
+  });
+  const out = [];
+  for (let r = 0; r < samples; r += 1) {
+    const entry = { t: columns.t ? columns.t[r][0] : 0 };
+    HORSE_TIMELINE_FIELDS.forEach((name) => {
+      if (columns[name]) entry[name] = columns[name][r];
+    });
+    out.push(entry);
+  }
+  return out;
+};